@@ -0,0 +1,86 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+import click
+from frappe.commands import pass_context
+from frappe.exceptions import SiteNotSpecifiedError
+
+
+@click.command("rebuild-batch-bin-summary")
+@click.option("--company", help="Only rebuild bins of this company")
+@pass_context
+def rebuild_batch_bin_summary(context, company=None):
+	"""Rebuild Batch Bin Summary from the Stock Ledger."""
+	import frappe
+
+	from seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary import rebuild_bin_summary
+
+	for site in get_sites(context):
+		frappe.init(site=site)
+		frappe.connect()
+		try:
+			rebuild_bin_summary(company=company)
+			frappe.db.commit()
+		finally:
+			frappe.destroy()
+
+
+@click.command("check-batch-bin-summary")
+@click.option("--company", help="Only check bins of this company")
+@pass_context
+def check_batch_bin_summary(context, company=None):
+	"""Compare Batch Bin Summary with the Stock Ledger and list mismatching bins."""
+	import frappe
+
+	from seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary import check_bin_summary
+
+	mismatches = 0
+	for site in get_sites(context):
+		frappe.init(site=site)
+		frappe.connect()
+		try:
+			for row in check_bin_summary(company=company):
+				mismatches += 1
+				click.echo(
+					f"{site}: {row.item_code} / {row.warehouse} / {row.batch_no}: "
+					f"ledger {row.ledger_qty}, summary {row.summary_qty}"
+				)
+		finally:
+			frappe.destroy()
+
+	if mismatches:
+		click.secho(f"{mismatches} bin(s) out of sync, run rebuild-batch-bin-summary", fg="red")
+		raise SystemExit(1)
+
+	click.secho("Batch Bin Summary is consistent with the Stock Ledger", fg="green")
+
+
+@click.command("rebuild-variety-sales-fact")
+@click.option("--company", help="Only rebuild sales of this company")
+@pass_context
+def rebuild_variety_sales_fact(context, company=None):
+	"""Rebuild Variety Sales Fact from submitted Sales Invoices."""
+	import frappe
+
+	from seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact import (
+		rebuild_variety_sales_fact as rebuild,
+	)
+
+	for site in get_sites(context):
+		frappe.init(site=site)
+		frappe.connect()
+		try:
+			rebuild(company=company)
+			frappe.db.commit()
+		finally:
+			frappe.destroy()
+
+
+def get_sites(context):
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	return context.sites
+
+
+commands = [rebuild_batch_bin_summary, check_batch_bin_summary, rebuild_variety_sales_fact]
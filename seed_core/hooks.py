@@ -336,6 +336,54 @@ doc_events = {
 	},
 	"Stock Reconciliation": {
 		"validate": "seed_core.seed_core.stock_mixing_validation.validate_stock_mixing"
+	},
+	"Stock Ledger Entry": {
+		"on_submit": [
+			"seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary.update_bin_summary",
+			"seed_core.seed_core.doctype.seed_stock_checkpoint.seed_stock_checkpoint.invalidate_checkpoints"
+		],
+		"on_cancel": [
+			"seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary.update_bin_summary",
+			"seed_core.seed_core.doctype.seed_stock_checkpoint.seed_stock_checkpoint.invalidate_checkpoints"
+		]
+	},
+	"Sales Invoice": {
+		"on_submit": [
+			"seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact.update_variety_sales_fact",
+			"seed_core.seed_core.doctype.variety_sales_delta.variety_sales_delta.record_sales_deltas"
+		],
+		"on_cancel": [
+			"seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact.update_variety_sales_fact",
+			"seed_core.seed_core.doctype.variety_sales_delta.variety_sales_delta.record_sales_deltas"
+		]
+	},
+	"Batch": {
+		"on_update": [
+			"seed_core.seed_core.cache.clear_batch_cache",
+			"seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary.update_batch_flags"
+		],
+		"on_trash": "seed_core.seed_core.cache.clear_batch_cache"
+	},
+	"Seed Crop": {
+		"on_update": [
+			"seed_core.seed_core.cache.clear_hierarchy_cache",
+			"seed_core.seed_core.doctype.seed_variety.seed_variety.enqueue_hierarchy_refresh"
+		],
+		"on_trash": "seed_core.seed_core.cache.clear_hierarchy_cache"
+	},
+	"Seed Segment": {
+		"on_update": [
+			"seed_core.seed_core.cache.clear_hierarchy_cache",
+			"seed_core.seed_core.doctype.seed_variety.seed_variety.enqueue_hierarchy_refresh"
+		],
+		"on_trash": "seed_core.seed_core.cache.clear_hierarchy_cache"
+	},
+	"Seed SubSegment": {
+		"on_update": [
+			"seed_core.seed_core.cache.clear_hierarchy_cache",
+			"seed_core.seed_core.doctype.seed_variety.seed_variety.enqueue_hierarchy_refresh"
+		],
+		"on_trash": "seed_core.seed_core.cache.clear_hierarchy_cache"
 	}
 }
 
@@ -360,6 +408,17 @@ doc_events = {
 # 	],
 # }
 
+scheduler_events = {
+	"cron": {
+		"*/10 * * * *": [
+			"seed_core.seed_core.doctype.sales_target_plan.sales_target_plan.apply_sales_deltas"
+		]
+	},
+	"daily": [
+		"seed_core.seed_core.doctype.seed_stock_checkpoint.seed_stock_checkpoint.build_stock_checkpoints"
+	]
+}
+
 # Testing
 # -------
 
@@ -373,6 +432,12 @@ doc_events = {
 # 	"Task": "seed_core.custom.task.CustomTaskMixin"
 # }
 
+# Link field queries
+# ------------------------------
+standard_queries = {
+	"Seed Variety": "seed_core.seed_core.doctype.seed_variety_search_token.seed_variety_search_token.variety_query"
+}
+
 # Overriding Methods
 # ------------------------------
 #
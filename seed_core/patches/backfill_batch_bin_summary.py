@@ -0,0 +1,5 @@
+from seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary import rebuild_bin_summary
+
+
+def execute():
+	rebuild_bin_summary()
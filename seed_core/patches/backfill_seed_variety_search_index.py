@@ -0,0 +1,7 @@
+from seed_core.seed_core.doctype.seed_variety_search_token.seed_variety_search_token import (
+	rebuild_search_index,
+)
+
+
+def execute():
+	rebuild_search_index()
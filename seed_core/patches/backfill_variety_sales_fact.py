@@ -0,0 +1,5 @@
+from seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact import rebuild_variety_sales_fact
+
+
+def execute():
+	rebuild_variety_sales_fact()
@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	# One-character prefixes are no longer indexed or queried
+	frappe.db.sql("DELETE FROM `tabSeed Variety Search Token` WHERE token LIKE 'p:_'")
@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+	frappe.db.sql("""
+		UPDATE `tabBatch Bin Summary` bbs
+		LEFT JOIN `tabSeed Variety` sv ON sv.linked_item = bbs.item_code
+		SET
+			bbs.seed_crop = IFNULL(sv.seed_crop, ''),
+			bbs.seed_segment = IFNULL(sv.seed_segment, ''),
+			bbs.seed_variety = IFNULL(sv.name, '')
+	""")
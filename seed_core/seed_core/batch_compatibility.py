@@ -0,0 +1,176 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Batch Compatibility Rules for Seed Core
+
+Batch treatment and certification attributes are encoded as an integer
+bitmask: every attribute has one bit for "present" and one for "absent",
+so rules such as "GSPP must not mix with non-GSPP" can be expressed.
+
+Mixing rules are declared as data in Seed Core Settings and compiled once
+into a bit x bit lookup matrix. Checking an incoming batch against a whole
+bin is then a single AND of the bin's combined mask with the mask of
+attributes the incoming batch may not meet.
+"""
+
+from functools import reduce
+from operator import or_
+
+from frappe import _
+
+# (label, Batch fieldname, is a Data field)
+ATTRIBUTES = (
+	("Organic", "is_organic", False),
+	("Chemically Treated", "is_chemically_treated", False),
+	("Pelleted", "is_pelleted", False),
+	("Primed", "is_primed", False),
+	("Coated", "is_coated", False),
+	("GSPP", "is_gspp", False),
+	("Named Treatment", "treatment_name", True),
+)
+
+ATTRIBUTE_FIELDS = [field for _label, field, _is_data in ATTRIBUTES]
+
+ATTRIBUTE_BITS = {}
+for position, (label, _field, _is_data) in enumerate(ATTRIBUTES):
+	ATTRIBUTE_BITS[label] = 1 << position
+	ATTRIBUTE_BITS[f"Not {label}"] = 1 << (position + len(ATTRIBUTES))
+
+MASK_WIDTH = 2 * len(ATTRIBUTES)
+
+# Used when Seed Core Settings has no mixing rules configured
+DEFAULT_RULES = (
+	("Organic", "Chemically Treated", "Organic batch cannot be mixed with Chemically Treated batch"),
+	("Chemically Treated", "Organic", "Chemically Treated batch cannot be mixed with Organic batch"),
+	("Organic", "Pelleted", "Organic batch cannot be mixed with treated (Pelleted/Primed/Coated) batch"),
+	("Organic", "Primed", "Organic batch cannot be mixed with treated (Pelleted/Primed/Coated) batch"),
+	("Organic", "Coated", "Organic batch cannot be mixed with treated (Pelleted/Primed/Coated) batch"),
+	("Pelleted", "Organic", "Treated batch cannot be mixed with Organic batch"),
+	("Primed", "Organic", "Treated batch cannot be mixed with Organic batch"),
+	("Coated", "Organic", "Treated batch cannot be mixed with Organic batch"),
+)
+
+_compiled_rules = {}
+
+
+def encode_batch(batch):
+	"""Return the attribute bitmask of a batch dict."""
+	if batch.get("attribute_mask") is not None:
+		return batch["attribute_mask"]
+
+	mask = 0
+	for position, (_label, field, _is_data) in enumerate(ATTRIBUTES):
+		if batch.get(field):
+			mask |= 1 << position
+		else:
+			mask |= 1 << (position + len(ATTRIBUTES))
+
+	return mask
+
+
+def get_mask_sql(alias):
+	"""Return a SQL expression computing the attribute bitmask of a Batch row."""
+	terms = []
+	for position, (_label, field, is_data) in enumerate(ATTRIBUTES):
+		condition = f"IFNULL({alias}.{field}, '') != ''" if is_data else f"IFNULL({alias}.{field}, 0) = 1"
+		terms.append(f"IF({condition}, {1 << position}, {1 << (position + len(ATTRIBUTES))})")
+
+	return " + ".join(terms)
+
+
+class CompiledRules:
+	"""Mixing rules compiled into a lookup matrix indexed by attribute bit."""
+
+	def __init__(self, rules):
+		self.rules = []
+		self.matrix = [0] * MASK_WIDTH
+		self._forbidden = {}
+
+		for incoming, existing, message in rules:
+			incoming_bit = ATTRIBUTE_BITS.get(incoming)
+			existing_bit = ATTRIBUTE_BITS.get(existing)
+			if not incoming_bit or not existing_bit:
+				continue
+
+			self.rules.append((incoming_bit, existing_bit, message))
+			self.matrix[incoming_bit.bit_length() - 1] |= existing_bit
+
+	def get_forbidden_mask(self, incoming_mask):
+		"""Return the mask of existing attributes an incoming batch must not meet."""
+		forbidden = self._forbidden.get(incoming_mask)
+		if forbidden is None:
+			forbidden = 0
+			for position in range(MASK_WIDTH):
+				if incoming_mask & (1 << position):
+					forbidden |= self.matrix[position]
+			self._forbidden[incoming_mask] = forbidden
+
+		return forbidden
+
+	def conflicts(self, incoming_mask, existing_mask):
+		return bool(self.get_forbidden_mask(incoming_mask) & existing_mask)
+
+	def get_conflicting(self, incoming_mask, existing_masks):
+		"""Return the indexes of the existing masks that conflict with the incoming mask."""
+		forbidden = self.get_forbidden_mask(incoming_mask)
+		if not forbidden or not existing_masks or not forbidden & reduce(or_, existing_masks):
+			return []
+
+		return [i for i, mask in enumerate(existing_masks) if forbidden & mask]
+
+	def get_messages(self, incoming_mask, existing_mask):
+		"""Return the translated descriptions of all rules violated by the pair."""
+		if not self.conflicts(incoming_mask, existing_mask):
+			return []
+
+		messages = []
+		for incoming_bit, existing_bit, message in self.rules:
+			if incoming_mask & incoming_bit and existing_mask & existing_bit:
+				message = _(message)
+				if message not in messages:
+					messages.append(message)
+
+		return messages
+
+	def get_bin_conflicts(self, masks):
+		"""
+		Check all batches of one bin against each other.
+		Returns (incoming index, existing index) pairs that violate a rule.
+		"""
+		if len(masks) < 2:
+			return []
+
+		combined = reduce(or_, masks)
+		pairs = []
+		for i, mask in enumerate(masks):
+			if not self.get_forbidden_mask(mask) & combined:
+				continue
+
+			pairs.extend((i, j) for j in self.get_conflicting(mask, masks) if j != i)
+
+		return pairs
+
+
+def get_compiled_rules(settings):
+	"""Return the mixing rules of Seed Core Settings, compiled once per settings version."""
+	rows = settings.get("mixing_rules") if settings else None
+	key = settings.modified if rows else None
+
+	if key not in _compiled_rules:
+		if rows:
+			rules = [
+				(
+					row.incoming_attribute,
+					row.existing_attribute,
+					row.message
+					or f"{row.incoming_attribute} batch cannot be mixed with {row.existing_attribute} batch",
+				)
+				for row in rows
+			]
+		else:
+			rules = DEFAULT_RULES
+		_compiled_rules.clear()
+		_compiled_rules[key] = CompiledRules(rules)
+
+	return _compiled_rules[key]
@@ -0,0 +1,212 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Seed Core Cache
+
+Read-through cache for data that every seed_core hot path needs: Seed Core
+Settings, the quality / treatment attributes of Batches and the codes and
+names of the crop / segment / subsegment hierarchy. Values are kept in
+frappe.local for the current request and in Redis across workers, and are
+invalidated from the on_update hooks of the cached doctypes.
+"""
+
+from collections import Counter
+
+import frappe
+
+from seed_core.seed_core.batch_compatibility import ATTRIBUTE_FIELDS
+
+SETTINGS_KEY = "seed_core_settings"
+BATCH_ATTRIBUTES_KEY = "seed_core_batch_attributes"
+HIERARCHY_KEY = "seed_core_hierarchy_nodes"
+
+# Hierarchy doctypes and their (code, name) fields
+HIERARCHY_FIELDS = {
+	"Seed Crop": ("crop_code", "crop_name"),
+	"Seed Segment": ("segment_code", "segment_name"),
+	"Seed SubSegment": ("subsegment_code", "subsegment_name"),
+}
+# Link to the parent level of the hierarchy doctypes below Seed Crop
+HIERARCHY_PARENT_FIELDS = {
+	"Seed Segment": "seed_crop",
+	"Seed SubSegment": "seed_segment",
+}
+
+BATCH_CACHE_FIELDS = [
+	"germination_percent",
+	"purity_percent",
+	"moisture_percent",
+	"seed_vigor",
+	"lab_test_date",
+	"next_retest_date",
+	*ATTRIBUTE_FIELDS,
+]
+
+# Per worker process; see get_cache_stats
+stats = Counter()
+
+
+def get_local_cache():
+	if not hasattr(frappe.local, "seed_core_cache"):
+		frappe.local.seed_core_cache = {"batches": {}}
+
+	return frappe.local.seed_core_cache
+
+
+def get_settings():
+	"""Return Seed Core Settings as a dict, or None if the doctype is not installed yet."""
+	local_cache = get_local_cache()
+	if "settings" in local_cache:
+		stats["settings_hits"] += 1
+		return local_cache["settings"]
+
+	settings = frappe.cache.get_value(SETTINGS_KEY)
+	if settings is not None:
+		stats["settings_hits"] += 1
+	else:
+		stats["settings_misses"] += 1
+		if frappe.db.exists("DocType", "Seed Core Settings"):
+			settings = frappe.get_single("Seed Core Settings").as_dict()
+			frappe.cache.set_value(SETTINGS_KEY, settings)
+
+	local_cache["settings"] = settings
+	return settings
+
+
+def get_hierarchy():
+	"""
+	Return {doctype: {name: {"code", "name", "parent"}}} for all hierarchy
+	doctypes. The tables are small, so they are loaded together on a miss.
+	"""
+	local_cache = get_local_cache()
+	if "hierarchy" in local_cache:
+		stats["hierarchy_hits"] += 1
+		return local_cache["hierarchy"]
+
+	hierarchy = frappe.cache.get_value(HIERARCHY_KEY)
+	if hierarchy is not None:
+		stats["hierarchy_hits"] += 1
+	else:
+		stats["hierarchy_misses"] += 1
+		hierarchy = load_hierarchy()
+		frappe.cache.set_value(HIERARCHY_KEY, hierarchy)
+
+	local_cache["hierarchy"] = hierarchy
+	return hierarchy
+
+
+def load_hierarchy():
+	"""Read the hierarchy from the database, bypassing both cache levels."""
+	hierarchy = {}
+	for doctype, (code, label) in HIERARCHY_FIELDS.items():
+		fields = ["name", f"{code} as code", f"{label} as label"]
+		if doctype in HIERARCHY_PARENT_FIELDS:
+			fields.append(f"{HIERARCHY_PARENT_FIELDS[doctype]} as parent")
+
+		hierarchy[doctype] = {
+			row.name: {"code": row.code, "name": row.label, "parent": row.get("parent")}
+			for row in frappe.get_all(doctype, fields=fields)
+		}
+
+	return hierarchy
+
+
+def get_hierarchy_node(doctype, name):
+	"""Return the cached code and name of one crop, segment or subsegment, or an empty dict."""
+	if not name:
+		return {}
+
+	return get_hierarchy()[doctype].get(name) or {}
+
+
+def get_batch_attributes(batch_nos):
+	"""
+	Return the cached seed attributes of the given batches, keyed by batch name.
+	Batches missing from both cache levels are loaded with one query.
+	"""
+	local_batches = get_local_cache()["batches"]
+	result = {}
+	missing = []
+
+	for batch_no in set(batch_nos):
+		batch = local_batches.get(batch_no)
+		if batch is None:
+			batch = frappe.cache.hget(BATCH_ATTRIBUTES_KEY, batch_no)
+
+		if batch is None:
+			missing.append(batch_no)
+			continue
+
+		stats["batch_hits"] += 1
+		local_batches[batch_no] = result[batch_no] = batch
+
+	if missing:
+		stats["batch_misses"] += len(missing)
+		for batch in frappe.get_all(
+			"Batch",
+			filters={"name": ["in", missing]},
+			fields=["name as batch_no", *BATCH_CACHE_FIELDS],
+		):
+			frappe.cache.hset(BATCH_ATTRIBUTES_KEY, batch.batch_no, batch)
+			local_batches[batch.batch_no] = result[batch.batch_no] = batch
+
+	return result
+
+
+def get_batch(batch_no):
+	"""Return the cached seed attributes of one batch."""
+	return get_batch_attributes([batch_no]).get(batch_no)
+
+
+def delete_on_commit(delete):
+	"""
+	Run a Redis delete now and again after the transaction commits. Until then
+	other workers still read the old rows from the database and may cache them
+	again; the second delete drops those values.
+	"""
+	delete()
+	frappe.db.after_commit.add(delete)
+
+
+def invalidate_batch(batch_no):
+	delete_on_commit(lambda: frappe.cache.hdel(BATCH_ATTRIBUTES_KEY, batch_no))
+	get_local_cache()["batches"].pop(batch_no, None)
+
+
+def clear_batch_cache(doc, method=None):
+	"""Batch on_update and on_trash hook."""
+	invalidate_batch(doc.name)
+
+
+def clear_settings_cache(doc=None, method=None):
+	"""Seed Core Settings on_update hook."""
+	delete_on_commit(lambda: frappe.cache.delete_value(SETTINGS_KEY))
+	get_local_cache().pop("settings", None)
+
+
+def clear_hierarchy_cache(doc=None, method=None):
+	"""Seed Crop / Seed Segment / Seed SubSegment on_update and on_trash hook."""
+	delete_on_commit(lambda: frappe.cache.delete_value(HIERARCHY_KEY))
+	get_local_cache().pop("hierarchy", None)
+
+
+@frappe.whitelist()
+def get_cache_stats():
+	"""Return hit/miss counters of this worker process and the number of cached batches."""
+	frappe.only_for("System Manager")
+
+	return {
+		**{
+			key: stats[key]
+			for key in (
+				"settings_hits",
+				"settings_misses",
+				"batch_hits",
+				"batch_misses",
+				"hierarchy_hits",
+				"hierarchy_misses",
+			)
+		},
+		"cached_batches": len(frappe.cache.hkeys(BATCH_ATTRIBUTES_KEY)),
+	}
@@ -0,0 +1,252 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Batch Bin Summary keeps the running qty and seed treatment flags of every
+(item, warehouse, batch) so that bin contents can be read with an indexed
+lookup instead of re-summing the Stock Ledger. The crop, segment and variety
+of the item are copied onto the rows so that reports can page through them
+in hierarchy order over an index.
+"""
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, now
+
+from seed_core.seed_core import cache
+from seed_core.seed_core.batch_compatibility import ATTRIBUTE_FIELDS, encode_batch, get_mask_sql
+from seed_core.seed_core.stock_mixing_validation import BATCH_ATTRIBUTE_FIELDS
+
+# Seed Variety hierarchy copied onto the rows, with the variety's field it is read from
+HIERARCHY_FIELDS = {"seed_crop": "seed_crop", "seed_segment": "seed_segment", "seed_variety": "name"}
+
+
+class BatchBinSummary(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Batch Bin Summary", ["item_code", "warehouse", "batch_no"], constraint_name="unique_bin_batch"
+	)
+	frappe.db.add_index("Batch Bin Summary", ["batch_no"])
+	# A batch belongs to one item, so this is a unique sort key as well
+	frappe.db.add_index(
+		"Batch Bin Summary",
+		[*HIERARCHY_FIELDS, "batch_no", "warehouse"],
+		index_name="hierarchy_batch_warehouse",
+	)
+
+
+def get_summary_name(item_code, warehouse, batch_no):
+	"""Return the deterministic row name for a bin batch (matches MD5(CONCAT_WS(...)) in SQL)."""
+	return hashlib.md5(f"{item_code}::{warehouse}::{batch_no}".encode()).hexdigest()
+
+
+def update_bin_summary(doc, method=None):
+	"""Apply a Stock Ledger Entry to the bin summary. Called on submit and cancel."""
+	qty = flt(doc.actual_qty)
+	if not doc.get("batch_no") or not qty:
+		return
+
+	# Cancelling a voucher posts reversing entries, which arrive here via
+	# on_submit; on_cancel only fires if a ledger entry itself is cancelled
+	if method == "on_cancel":
+		qty = -qty
+
+	flags = cache.get_batch(doc.batch_no) or frappe._dict()
+	timestamp = now()
+
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabBatch Bin Summary`
+			(name, creation, modified, modified_by, owner, docstatus, idx,
+			item_code, warehouse, batch_no, company, qty, attribute_mask, {flag_columns}, {hierarchy_columns})
+		VALUES
+			(%(name)s, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+			%(item_code)s, %(warehouse)s, %(batch_no)s, %(company)s, %(qty)s, %(attribute_mask)s, {flag_values},
+			{hierarchy_values})
+		ON DUPLICATE KEY UPDATE
+			qty = qty + VALUES(qty),
+			modified = VALUES(modified)
+	""".format(
+			flag_columns=", ".join(BATCH_ATTRIBUTE_FIELDS),
+			flag_values=", ".join(f"%({field})s" for field in BATCH_ATTRIBUTE_FIELDS),
+			hierarchy_columns=", ".join(HIERARCHY_FIELDS),
+			hierarchy_values=", ".join(f"%({field})s" for field in HIERARCHY_FIELDS),
+		),
+		{
+			"name": get_summary_name(doc.item_code, doc.warehouse, doc.batch_no),
+			"timestamp": timestamp,
+			"user": frappe.session.user,
+			"item_code": doc.item_code,
+			"warehouse": doc.warehouse,
+			"batch_no": doc.batch_no,
+			"company": doc.company,
+			"qty": qty,
+			"attribute_mask": encode_batch(flags),
+			**{field: flags.get(field) or 0 for field in BATCH_ATTRIBUTE_FIELDS},
+			**get_item_hierarchy(doc.item_code),
+		},
+	)
+
+
+def get_item_hierarchy(item_code):
+	"""Return the crop, segment and variety of the variety linked to an item ('' when none)."""
+	variety = (
+		frappe.db.get_value(
+			"Seed Variety", {"linked_item": item_code}, list(HIERARCHY_FIELDS.values()), as_dict=True
+		)
+		or {}
+	)
+	return {field: variety.get(source) or "" for field, source in HIERARCHY_FIELDS.items()}
+
+
+def set_item_hierarchy(item_code):
+	"""Copy the current crop, segment and variety of an item onto its bin summary rows."""
+	if not item_code:
+		return
+
+	frappe.db.sql(
+		"""
+		UPDATE `tabBatch Bin Summary`
+		SET {assignments}
+		WHERE item_code = %(item_code)s
+	""".format(assignments=", ".join(f"{field} = %({field})s" for field in HIERARCHY_FIELDS)),
+		{"item_code": item_code, **get_item_hierarchy(item_code)},
+	)
+
+
+def update_variety_hierarchy(doc):
+	"""Refresh the bin summary rows of a Seed Variety whose crop, segment or Item changed."""
+	if not any(doc.has_value_changed(field) for field in ("seed_crop", "seed_segment", "linked_item")):
+		return
+
+	previous = doc.get_doc_before_save()
+	if previous and previous.linked_item != doc.linked_item:
+		set_item_hierarchy(previous.linked_item)
+	set_item_hierarchy(doc.linked_item)
+
+
+def update_batch_flags(doc, method=None):
+	"""Propagate changed treatment flags of a Batch to its bin summary rows."""
+	if not any(doc.has_value_changed(field) for field in ATTRIBUTE_FIELDS):
+		return
+
+	set_batch_flags(doc.name, doc.as_dict())
+
+
+def set_batch_flags(batch_no, batch):
+	"""Write the treatment flags and attribute mask of a batch to all its bin summary rows."""
+	frappe.db.sql(
+		"""
+		UPDATE `tabBatch Bin Summary`
+		SET attribute_mask = %(attribute_mask)s, {assignments}
+		WHERE batch_no = %(batch_no)s
+	""".format(assignments=", ".join(f"{field} = %({field})s" for field in BATCH_ATTRIBUTE_FIELDS)),
+		{
+			"batch_no": batch_no,
+			"attribute_mask": encode_batch(batch),
+			**{field: batch.get(field) or 0 for field in BATCH_ATTRIBUTE_FIELDS},
+		},
+	)
+
+
+def rebuild_bin_summary(company=None):
+	"""Rebuild the bin summary from the Stock Ledger, optionally for one company."""
+	conditions = "AND sle.company = %(company)s" if company else ""
+	timestamp = now()
+
+	frappe.db.sql(
+		"DELETE FROM `tabBatch Bin Summary` {0}".format("WHERE company = %(company)s" if company else ""),
+		{"company": company},
+	)
+
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabBatch Bin Summary`
+			(name, creation, modified, modified_by, owner, docstatus, idx,
+			item_code, warehouse, batch_no, company, qty, attribute_mask, {flag_columns}, {hierarchy_columns})
+		SELECT
+			MD5(CONCAT_WS('::', sle.item_code, sle.warehouse, sle.batch_no)),
+			%(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+			sle.item_code, sle.warehouse, sle.batch_no, sle.company, SUM(sle.actual_qty),
+			{attribute_mask}, {batch_flag_columns}, {variety_columns}
+		FROM `tabStock Ledger Entry` sle
+		JOIN `tabBatch` b ON sle.batch_no = b.name
+		LEFT JOIN `tabSeed Variety` sv ON sv.linked_item = sle.item_code
+		WHERE sle.is_cancelled = 0
+		{conditions}
+		GROUP BY sle.item_code, sle.warehouse, sle.batch_no
+		HAVING SUM(sle.actual_qty) <> 0
+	""".format(
+			flag_columns=", ".join(BATCH_ATTRIBUTE_FIELDS),
+			attribute_mask=get_mask_sql("b"),
+			batch_flag_columns=", ".join(f"b.{field}" for field in BATCH_ATTRIBUTE_FIELDS),
+			hierarchy_columns=", ".join(HIERARCHY_FIELDS),
+			variety_columns=", ".join(
+				f"IFNULL(MAX(sv.{source}), '')" for source in HIERARCHY_FIELDS.values()
+			),
+			conditions=conditions,
+		),
+		{"company": company, "timestamp": timestamp, "user": frappe.session.user},
+	)
+
+
+def check_bin_summary(company=None):
+	"""
+	Compare the bin summary with the Stock Ledger.
+	Returns the bins whose summary qty differs from the ledger balance.
+	"""
+	ledger_conditions = "AND company = %(company)s" if company else ""
+	summary_conditions = "AND s.company = %(company)s" if company else ""
+
+	ledger = """
+		SELECT item_code, warehouse, batch_no, SUM(actual_qty) as qty
+		FROM `tabStock Ledger Entry`
+		WHERE is_cancelled = 0
+		AND IFNULL(batch_no, '') != ''
+		{ledger_conditions}
+		GROUP BY item_code, warehouse, batch_no
+	""".format(ledger_conditions=ledger_conditions)
+
+	return frappe.db.sql(
+		"""
+		SELECT l.item_code, l.warehouse, l.batch_no, l.qty as ledger_qty, IFNULL(s.qty, 0) as summary_qty
+		FROM ({ledger}) l
+		LEFT JOIN `tabBatch Bin Summary` s
+			ON s.item_code = l.item_code AND s.warehouse = l.warehouse AND s.batch_no = l.batch_no
+		WHERE l.qty <> IFNULL(s.qty, 0)
+
+		UNION ALL
+
+		SELECT s.item_code, s.warehouse, s.batch_no, 0 as ledger_qty, s.qty as summary_qty
+		FROM `tabBatch Bin Summary` s
+		LEFT JOIN ({ledger}) l
+			ON s.item_code = l.item_code AND s.warehouse = l.warehouse AND s.batch_no = l.batch_no
+		WHERE l.item_code IS NULL
+		AND s.qty <> 0
+		{summary_conditions}
+	""".format(ledger=ledger, summary_conditions=summary_conditions),
+		{"company": company},
+		as_dict=True,
+	)
+
+
+@frappe.whitelist()
+def enqueue_rebuild_bin_summary(company=None):
+	"""Queue a rebuild of the bin summary."""
+	frappe.only_for("System Manager")
+
+	frappe.enqueue(
+		"seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary.rebuild_bin_summary",
+		queue="long",
+		timeout=3600,
+		job_id=f"rebuild_batch_bin_summary::{company or 'all'}",
+		deduplicate=True,
+		company=company,
+	)
+	frappe.msgprint(_("Batch Bin Summary rebuild has been queued"))
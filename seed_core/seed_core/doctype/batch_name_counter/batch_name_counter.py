@@ -0,0 +1,67 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Batch Name Counter keeps the last suffix used per output batch prefix
+({input batch}-{operation suffix}). The counter row is incremented in the
+database, so it stays locked until the transaction commits and concurrent
+submits of the same prefix get consecutive names.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, now
+
+
+class BatchNameCounter(Document):
+	pass
+
+
+def get_next_batch_name(prefix):
+	"""Return the next free batch name for a prefix: the prefix itself, then prefix1, prefix2, ..."""
+	frappe.db.sql(
+		"""
+		UPDATE `tabBatch Name Counter`
+		SET last_value = last_value + 1, modified = %(modified)s
+		WHERE name = %(prefix)s
+	""",
+		{"prefix": prefix, "modified": now()},
+	)
+	value = frappe.db.sql("SELECT last_value FROM `tabBatch Name Counter` WHERE name = %s", prefix)
+
+	if not value:
+		# First use of the prefix: continue after batches named before the counter existed
+		timestamp = now()
+		frappe.db.sql(
+			"""
+			INSERT INTO `tabBatch Name Counter`
+				(name, creation, modified, modified_by, owner, batch_prefix, last_value)
+			VALUES (%(prefix)s, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, %(prefix)s, %(value)s)
+			ON DUPLICATE KEY UPDATE last_value = last_value + 1, modified = VALUES(modified)
+		""",
+			{
+				"prefix": prefix,
+				"timestamp": timestamp,
+				"user": frappe.session.user,
+				"value": get_existing_batch_value(prefix),
+			},
+		)
+		value = frappe.db.sql("SELECT last_value FROM `tabBatch Name Counter` WHERE name = %s", prefix)
+
+	value = cint(value[0][0])
+	return f"{prefix}{value}" if value else prefix
+
+
+def get_existing_batch_value(prefix):
+	"""Return the counter value that follows the existing batches of a prefix, 0 if there are none."""
+	names = frappe.db.sql_list(
+		"SELECT name FROM `tabBatch` WHERE name LIKE %s",
+		prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%",
+	)
+
+	values = [
+		cint(name[len(prefix) :]) if name != prefix else 0
+		for name in names
+		if name == prefix or name[len(prefix) :].isdigit()
+	]
+	return max(values) + 1 if values else 0
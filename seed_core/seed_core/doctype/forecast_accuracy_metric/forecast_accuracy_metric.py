@@ -0,0 +1,194 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Forecast Accuracy Metric stores MAPE, bias and hit rate of the submitted
+Sales Forecasts of a fiscal year per customer, sales person, variety and
+segment. The rows of a year are computed together from one query and are
+reused until invoices or forecasts of that year change.
+"""
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, get_datetime, now
+
+# Dimension of the metric: row field of the forecast series
+DIMENSIONS = {
+	"Customer": "customer",
+	"Sales Person": "sales_person",
+	"Seed Variety": "seed_variety",
+	"Seed Segment": "seed_segment",
+}
+# A series is a hit when its forecast is within this share of the actual qty
+HIT_TOLERANCE = 0.2
+
+
+class ForecastAccuracyMetric(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Forecast Accuracy Metric", ["fiscal_year", "dimension"])
+
+
+def get_forecast_series(fiscal_year):
+	"""Return forecast and invoiced qty of every customer x variety forecast in the fiscal year."""
+	year_start_date, year_end_date = frappe.db.get_value(
+		"Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"]
+	)
+
+	return frappe.db.sql(
+		"""
+		SELECT
+			f.customer,
+			f.sales_person,
+			f.seed_variety,
+			IFNULL(sv.seed_segment, '') as seed_segment,
+			f.qty as forecast_qty,
+			IFNULL(a.qty, 0) as actual_qty
+		FROM (
+			SELECT sf.customer, MAX(sf.sales_person) as sales_person, fi.seed_variety, SUM(fi.suggested_qty) as qty
+			FROM `tabForecast Item` fi
+			JOIN `tabSales Forecast` sf ON sf.name = fi.parent AND fi.parenttype = 'Sales Forecast'
+			WHERE sf.docstatus = 1
+			AND sf.fiscal_year = %(fiscal_year)s
+			GROUP BY sf.customer, fi.seed_variety
+		) f
+		LEFT JOIN (
+			SELECT customer, seed_variety, SUM(qty) as qty
+			FROM `tabVariety Sales Fact`
+			WHERE posting_month BETWEEN %(year_start_date)s AND %(year_end_date)s
+			GROUP BY customer, seed_variety
+		) a ON a.customer = f.customer AND a.seed_variety = f.seed_variety
+		LEFT JOIN `tabSeed Variety` sv ON sv.name = f.seed_variety
+	""",
+		{"fiscal_year": fiscal_year, "year_start_date": year_start_date, "year_end_date": year_end_date},
+		as_dict=True,
+	)
+
+
+def compute_accuracy_metrics(fiscal_year):
+	"""Replace the metric rows of a fiscal year."""
+	totals = {}
+	for row in get_forecast_series(fiscal_year):
+		forecast_qty, actual_qty = flt(row.forecast_qty), flt(row.actual_qty)
+		error = abs(forecast_qty - actual_qty)
+
+		for dimension, field in DIMENSIONS.items():
+			total = totals.setdefault(
+				(dimension, row[field]),
+				frappe._dict(series=0, forecast_qty=0, actual_qty=0, ape=0, ape_series=0, hits=0),
+			)
+			total.series += 1
+			total.forecast_qty += forecast_qty
+			total.actual_qty += actual_qty
+			total.hits += error <= HIT_TOLERANCE * actual_qty
+			if actual_qty > 0:
+				total.ape += error / actual_qty
+				total.ape_series += 1
+
+	timestamp = now()
+	values = [
+		(
+			hashlib.md5(f"{fiscal_year}::{dimension}::{value}".encode()).hexdigest(),
+			timestamp,
+			timestamp,
+			frappe.session.user,
+			frappe.session.user,
+			fiscal_year,
+			dimension,
+			value,
+			timestamp,
+			total.series,
+			total.forecast_qty,
+			total.actual_qty,
+			100 * total.ape / total.ape_series if total.ape_series else 0,
+			100 * (total.forecast_qty - total.actual_qty) / total.actual_qty if total.actual_qty > 0 else 0,
+			100 * total.hits / total.series,
+		)
+		for (dimension, value), total in totals.items()
+	]
+
+	frappe.db.delete("Forecast Accuracy Metric", {"fiscal_year": fiscal_year})
+	if not values:
+		return
+
+	frappe.db.bulk_insert(
+		"Forecast Accuracy Metric",
+		fields=[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"fiscal_year",
+			"dimension",
+			"dimension_value",
+			"computed_on",
+			"series",
+			"forecast_qty",
+			"actual_qty",
+			"mape",
+			"bias",
+			"hit_rate",
+		],
+		values=values,
+	)
+
+
+def is_stale(fiscal_year):
+	"""Return True if invoices or forecasts of the fiscal year changed after its metrics were computed."""
+	computed_on = frappe.db.sql(
+		"""
+		SELECT MAX(computed_on) FROM `tabForecast Accuracy Metric`
+		WHERE fiscal_year = %s
+	""",
+		fiscal_year,
+	)[0][0]
+	if not computed_on:
+		return True
+
+	year_start_date, year_end_date = frappe.db.get_value(
+		"Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"]
+	)
+	last_sale = frappe.db.sql(
+		"""
+		SELECT MAX(modified) FROM `tabVariety Sales Fact`
+		WHERE posting_month BETWEEN %s AND %s
+	""",
+		(year_start_date, year_end_date),
+	)[0][0]
+	last_forecast = frappe.db.sql(
+		"""
+		SELECT MAX(modified) FROM `tabSales Forecast`
+		WHERE fiscal_year = %s AND docstatus > 0
+	""",
+		fiscal_year,
+	)[0][0]
+
+	computed_on = get_datetime(computed_on)
+	return any(modified and get_datetime(modified) > computed_on for modified in (last_sale, last_forecast))
+
+
+def get_accuracy_metrics(fiscal_year, dimension):
+	"""Return the metric rows of one dimension, recomputing the fiscal year first if it is stale."""
+	if is_stale(fiscal_year):
+		compute_accuracy_metrics(fiscal_year)
+
+	return frappe.get_all(
+		"Forecast Accuracy Metric",
+		filters={"fiscal_year": fiscal_year, "dimension": dimension},
+		fields=[
+			"dimension_value",
+			"series",
+			"forecast_qty",
+			"actual_qty",
+			"mape",
+			"bias",
+			"hit_rate",
+			"computed_on",
+		],
+		order_by="actual_qty desc",
+	)
@@ -0,0 +1,4 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+# import frappe
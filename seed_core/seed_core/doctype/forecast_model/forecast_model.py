@@ -0,0 +1,15 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ForecastModel(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Forecast Model", ["customer", "seed_variety"], constraint_name="unique_customer_variety"
+	)
@@ -10,6 +10,19 @@ frappe.ui.form.on("Sales Forecast", {
                     }
                 });
             }, __("Actions"));
+
+            if (frm.doc.docstatus === 0) {
+                frm.add_custom_button(__("Suggest from History"), function () {
+                    frm.call({
+                        doc: frm.doc,
+                        method: "suggest_from_history",
+                        freeze: true,
+                        callback: function (r) {
+                            frm.reload_doc();
+                        }
+                    });
+                }, __("Actions"));
+            }
         }
     }
 });
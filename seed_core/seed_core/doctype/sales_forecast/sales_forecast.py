@@ -1,10 +1,19 @@
 # Copyright (c) 2026, aremtech and contributors
 # For license information, please see license.txt
 
+import hashlib
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import flt
+from frappe.utils import cint, flt
+
+from seed_core.seed_core.forecast_engine import forecast_series, get_item_values
+
+# Fiscal years fetched into Sales History
+HISTORY_YEARS = 3
+# Customers per background job of the bulk generation
+GENERATE_CHUNK_SIZE = 200
 
 
 class SalesForecast(Document):
@@ -23,54 +32,254 @@ class SalesForecast(Document):
 		self.total_expected_amount = sum(flt(d.expected_amount) for d in self.forecast_items)
 
 	@frappe.whitelist()
-	def fetch_last_year_actuals(self):
-		"""Fetch last year's actual sales for each variety."""
+	def fetch_last_year_actuals(self, years=HISTORY_YEARS):
+		"""
+		Fetch the actual sales of the last fiscal years for each variety: the
+		previous year into the forecast rows and every year into Sales History.
+		"""
 		if not self.fiscal_year or not self.customer:
 			frappe.throw(_("Please set Fiscal Year and Customer first"))
 
-		# Get previous fiscal year
-		current_fy = frappe.get_doc("Fiscal Year", self.fiscal_year)
-		prev_fy = frappe.db.get_value(
+		# Get previous fiscal years, newest first
+		current_fy_start = frappe.db.get_value("Fiscal Year", self.fiscal_year, "year_start_date")
+		fiscal_years = frappe.get_all(
 			"Fiscal Year",
-			{"year_end_date": ["<", current_fy.year_start_date]},
-			"name",
-			order_by="year_end_date desc"
+			filters={"year_end_date": ["<", current_fy_start]},
+			pluck="name",
+			order_by="year_end_date desc",
+			limit=cint(years) or HISTORY_YEARS
 		)
 
-		if not prev_fy:
+		if not fiscal_years:
 			frappe.msgprint(_("No previous fiscal year found"))
 			return
 
-		prev_fy_doc = frappe.get_doc("Fiscal Year", prev_fy)
+		varieties = {item.seed_variety for item in self.forecast_items if item.seed_variety}
+		history = get_customer_history(self.customer, fiscal_years, varieties)
+		prev_fy = fiscal_years[0]
 
 		for item in self.forecast_items:
 			if not item.seed_variety:
 				continue
 
-			# Get linked Item
-			linked_item = frappe.db.get_value("Seed Variety", item.seed_variety, "linked_item")
-			if not linked_item:
-				continue
+			qty, amount = history.get((item.seed_variety, prev_fy), (0, 0))
+			item.last_year_qty = qty
+			item.last_year_amount = amount
 
-			# Query last year's actuals
-			actuals = frappe.db.sql("""
-				SELECT SUM(sii.qty) as qty, SUM(sii.amount) as amount
-				FROM `tabSales Invoice Item` sii
-				JOIN `tabSales Invoice` si ON sii.parent = si.name
-				WHERE si.docstatus = 1
-				AND si.customer = %(customer)s
-				AND sii.item_code = %(item_code)s
-				AND si.posting_date BETWEEN %(start_date)s AND %(end_date)s
-			""", {
-				"customer": self.customer,
-				"item_code": linked_item,
-				"start_date": prev_fy_doc.year_start_date,
-				"end_date": prev_fy_doc.year_end_date
-			}, as_dict=True)
-
-			if actuals and actuals[0]:
-				item.last_year_qty = flt(actuals[0].qty)
-				item.last_year_amount = flt(actuals[0].amount)
+		self.set("actual_history", [])
+		for seed_variety in sorted(varieties):
+			for fiscal_year in fiscal_years:
+				if (seed_variety, fiscal_year) in history:
+					qty, amount = history[(seed_variety, fiscal_year)]
+					self.append("actual_history", {
+						"seed_variety": seed_variety,
+						"fiscal_year": fiscal_year,
+						"qty": qty,
+						"amount": amount
+					})
 
 		self.save()
 		frappe.msgprint(_("Last year actuals fetched from {0}").format(prev_fy))
+
+	@frappe.whitelist()
+	def suggest_from_history(self):
+		"""Fill suggested qty, price and confidence from the statistical forecast of the customer."""
+		if self.docstatus != 0:
+			frappe.throw(_("Suggestions can only be filled into draft forecasts"))
+		if not self.fiscal_year or not self.customer:
+			frappe.throw(_("Please set Fiscal Year and Customer first"))
+
+		results = forecast_series(self.fiscal_year, [self.customer])
+		suggestions = {seed_variety: result for (_customer, seed_variety), result in results.items()}
+		varieties = {item.seed_variety for item in self.forecast_items}
+
+		for item in self.forecast_items:
+			if item.seed_variety in suggestions:
+				item.update(get_item_values(suggestions[item.seed_variety]))
+
+		for seed_variety, result in sorted(suggestions.items()):
+			if seed_variety not in varieties and result.qty:
+				self.append("forecast_items", {"seed_variety": seed_variety, **get_item_values(result)})
+
+		self.save()
+		frappe.msgprint(_("Suggestions filled for {0} varieties").format(len(suggestions)))
+
+
+def get_customer_history(customer, fiscal_years, varieties):
+	"""Return {(seed_variety, fiscal_year): (qty, amount)} of a customer with one grouped query."""
+	if not varieties:
+		return {}
+
+	history = frappe.db.sql("""
+		SELECT vsf.seed_variety, fy.name as fiscal_year, SUM(vsf.qty) as qty, SUM(vsf.amount) as amount
+		FROM `tabVariety Sales Fact` vsf
+		JOIN `tabFiscal Year` fy
+			ON vsf.posting_month BETWEEN fy.year_start_date AND fy.year_end_date
+		WHERE fy.name IN %(fiscal_years)s
+		AND vsf.customer = %(customer)s
+		AND vsf.seed_variety IN %(varieties)s
+		GROUP BY vsf.seed_variety, fy.name
+	""", {
+		"fiscal_years": tuple(fiscal_years),
+		"customer": customer,
+		"varieties": tuple(varieties)
+	}, as_dict=True)
+
+	return {(row.seed_variety, row.fiscal_year): (flt(row.qty), flt(row.amount)) for row in history}
+
+
+def get_customers_to_forecast(fiscal_year, territory=None, customer_grade=None, sales_agent_code=None):
+	"""Return the active customers, optionally filtered, that have no Sales Forecast for the year yet."""
+	conditions = ""
+	values = {"fiscal_year": fiscal_year}
+
+	if territory:
+		conditions += " AND c.territory IN %(territories)s"
+		values["territories"] = tuple([territory, *frappe.db.get_descendants("Territory", territory)])
+
+	if customer_grade:
+		conditions += " AND c.customer_grade = %(customer_grade)s"
+		values["customer_grade"] = customer_grade
+
+	if sales_agent_code:
+		conditions += " AND c.sales_agent_code = %(sales_agent_code)s"
+		values["sales_agent_code"] = sales_agent_code
+
+	return frappe.db.sql_list("""
+		SELECT c.name
+		FROM `tabCustomer` c
+		WHERE c.disabled = 0
+		{conditions}
+		AND NOT EXISTS (
+			SELECT 1 FROM `tabSales Forecast` sf
+			WHERE sf.customer = c.name
+			AND sf.fiscal_year = %(fiscal_year)s
+			AND sf.docstatus < 2
+		)
+		ORDER BY c.name
+	""".format(conditions=conditions), values)
+
+
+def get_customer_sales_persons(customers):
+	"""Return {customer: sales_person} from the Sales Team of each customer, largest allocation first."""
+	sales_persons = {}
+	for row in frappe.db.sql("""
+		SELECT parent, sales_person
+		FROM `tabSales Team`
+		WHERE parenttype = 'Customer'
+		AND parent IN %(customers)s
+		ORDER BY allocated_percentage DESC, idx
+	""", {"customers": tuple(customers)}, as_dict=True):
+		sales_persons.setdefault(row.parent, row.sales_person)
+
+	return sales_persons
+
+
+@frappe.whitelist()
+def generate_forecasts(fiscal_year, territory=None, customer_grade=None, sales_agent_code=None, sales_person=None):
+	"""
+	Queue the creation of Sales Forecasts for every matching active customer
+	without one for the fiscal year. Customers are split into chunks that run
+	as separate jobs, so they are spread over the available workers.
+	"""
+	frappe.has_permission("Sales Forecast", "create", throw=True)
+
+	customers = get_customers_to_forecast(fiscal_year, territory, customer_grade, sales_agent_code)
+	if not customers:
+		frappe.msgprint(_("All matching customers already have a Sales Forecast for {0}").format(fiscal_year))
+		return 0
+
+	for start in range(0, len(customers), GENERATE_CHUNK_SIZE):
+		chunk = customers[start:start + GENERATE_CHUNK_SIZE]
+		frappe.enqueue(
+			"seed_core.seed_core.doctype.sales_forecast.sales_forecast.create_forecasts",
+			queue="long",
+			timeout=3600,
+			job_id=f"generate_sales_forecasts::{fiscal_year}::{chunk[0]}",
+			deduplicate=True,
+			fiscal_year=fiscal_year,
+			customers=chunk,
+			sales_person=sales_person
+		)
+
+	frappe.msgprint(_("Sales Forecasts for {0} customers have been queued in {1} jobs").format(
+		len(customers), -(-len(customers) // GENERATE_CHUNK_SIZE)
+	))
+	return len(customers)
+
+
+def create_forecasts(fiscal_year, customers, sales_person=None):
+	"""
+	Background job: create one draft Sales Forecast per customer, pre-filled
+	with the statistical forecast of the varieties the customer buys.
+	Customers that got a forecast in the meantime are skipped, so reruns are safe:
+	each customer is checked again under a database lock (GET_LOCK) that is held
+	until its forecast is committed, so overlapping jobs cannot both create one.
+	"""
+	existing = set(frappe.get_all(
+		"Sales Forecast",
+		filters={"fiscal_year": fiscal_year, "customer": ["in", customers], "docstatus": ["<", 2]},
+		pluck="customer"
+	))
+	customers = [customer for customer in customers if customer not in existing]
+
+	sales_persons, suggestions = {}, {}
+	if customers:
+		sales_persons = get_customer_sales_persons(customers)
+		for (customer, seed_variety), result in forecast_series(fiscal_year, customers).items():
+			if result.qty:
+				suggestions.setdefault(customer, {})[seed_variety] = result
+
+	# Start a fresh transaction, so each check below reads what other jobs committed
+	frappe.db.commit()
+
+	created, skipped = 0, len(existing)
+	for customer in customers:
+		# Forecast items and the sales person are mandatory; those customers are left for manual entry
+		if not suggestions.get(customer) or not (sales_persons.get(customer) or sales_person):
+			skipped += 1
+			continue
+
+		# A customer locked by another job is being handled there
+		lock = get_forecast_lock(fiscal_year, customer)
+		if not frappe.db.sql("SELECT GET_LOCK(%s, 0)", lock)[0][0]:
+			skipped += 1
+			continue
+
+		try:
+			if forecast_exists(fiscal_year, customer):
+				skipped += 1
+			else:
+				frappe.get_doc({
+					"doctype": "Sales Forecast",
+					"fiscal_year": fiscal_year,
+					"customer": customer,
+					"sales_person": sales_persons.get(customer) or sales_person,
+					"forecast_items": [
+						{"seed_variety": seed_variety, **get_item_values(result)}
+						for seed_variety, result in sorted(suggestions[customer].items())
+					]
+				}).insert()
+				created += 1
+
+			frappe.db.commit()
+		finally:
+			frappe.db.sql("SELECT RELEASE_LOCK(%s)", lock)
+
+	frappe.publish_realtime(
+		"sales_forecast_generation",
+		{"fiscal_year": fiscal_year, "created": created, "skipped": skipped},
+		user=frappe.session.user
+	)
+
+
+def get_forecast_lock(fiscal_year, customer):
+	"""Name of the GET_LOCK held while creating a customer's forecast (at most 64 characters)."""
+	return "sales_forecast::" + hashlib.md5(f"{fiscal_year}::{customer}".encode()).hexdigest()
+
+
+def forecast_exists(fiscal_year, customer):
+	return frappe.db.exists(
+		"Sales Forecast", {"fiscal_year": fiscal_year, "customer": customer, "docstatus": ["<", 2]}
+	)
+
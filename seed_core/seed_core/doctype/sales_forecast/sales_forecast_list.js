@@ -0,0 +1,73 @@
+frappe.listview_settings["Sales Forecast"] = {
+    onload: function (listview) {
+        // Create forecasts for all matching customers of a fiscal year
+        listview.page.add_menu_item(__("Generate Forecasts"), function () {
+            frappe.prompt([
+                {
+                    fieldname: "fiscal_year",
+                    label: __("Fiscal Year"),
+                    fieldtype: "Link",
+                    options: "Fiscal Year",
+                    default: frappe.defaults.get_user_default("fiscal_year"),
+                    reqd: 1
+                },
+                {
+                    fieldname: "territory",
+                    label: __("Territory"),
+                    fieldtype: "Link",
+                    options: "Territory"
+                },
+                {
+                    fieldname: "customer_grade",
+                    label: __("Customer Grade"),
+                    fieldtype: "Select",
+                    options: "\nClass A\nClass B\nClass C"
+                },
+                {
+                    fieldname: "sales_agent_code",
+                    label: __("Sales Agent Code"),
+                    fieldtype: "Data"
+                },
+                {
+                    fieldname: "sales_person",
+                    label: __("Default Sales Person"),
+                    fieldtype: "Link",
+                    options: "Sales Person",
+                    description: __("Used for customers without a Sales Team")
+                }
+            ], function (values) {
+                frappe.call({
+                    method: "seed_core.seed_core.doctype.sales_forecast.sales_forecast.generate_forecasts",
+                    args: values
+                });
+            }, __("Generate Forecasts"));
+        });
+
+        // Pre-fill suggestions of all draft forecasts of a fiscal year
+        listview.page.add_menu_item(__("Suggest from History"), function () {
+            frappe.prompt({
+                fieldname: "fiscal_year",
+                label: __("Fiscal Year"),
+                fieldtype: "Link",
+                options: "Fiscal Year",
+                default: frappe.defaults.get_user_default("fiscal_year"),
+                reqd: 1
+            }, function (values) {
+                frappe.call({
+                    method: "seed_core.seed_core.forecast_engine.enqueue_forecast_engine",
+                    args: { fiscal_year: values.fiscal_year }
+                });
+            }, __("Suggest from History"));
+        });
+
+        frappe.realtime.on("sales_forecast_generation", function (data) {
+            frappe.show_alert({
+                message: __("{0}: {1} Sales Forecasts created, {2} customers skipped", [
+                    data.fiscal_year, data.created, data.skipped
+                ]),
+                indicator: "green"
+            });
+            listview.refresh();
+        });
+    }
+};
@@ -12,6 +12,29 @@ frappe.ui.form.on("Sales Target Plan", {
                 });
             }, __("Actions"));
 
+            // Phase Annual Targets button
+            if (frm.doc.docstatus === 0) {
+                frm.add_custom_button(__("Phase Annual Targets"), function () {
+                    frappe.prompt({
+                        fieldname: "years",
+                        label: __("Years of Sales History"),
+                        fieldtype: "Int",
+                        default: 3,
+                        reqd: 1
+                    }, function (values) {
+                        frm.call({
+                            doc: frm.doc,
+                            method: "phase_annual_targets",
+                            args: { years: values.years },
+                            freeze: true,
+                            callback: function (r) {
+                                frm.reload_doc();
+                            }
+                        });
+                    }, __("Phase Annual Targets"));
+                }, __("Actions"));
+            }
+
             // Consolidate Forecasts button
             frm.add_custom_button(__("Consolidate Forecasts"), function () {
                 // Show dialog to select forecasts
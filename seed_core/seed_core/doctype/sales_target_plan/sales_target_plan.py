@@ -2,9 +2,31 @@
 # For license information, please see license.txt
 
 import frappe
+import numpy as np
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import flt
+from frappe.utils import add_days, cint, flt, getdate, now
+
+from seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact import get_variety_sales
+from seed_core.seed_core.target_phasing import get_seasonality_profiles, split_annual
+
+MONTHS = (
+	"January", "February", "March", "April", "May", "June",
+	"July", "August", "September", "October", "November", "December"
+)
+
+# Sales Invoice / Variety Sales Fact column matching each target type
+ENTITY_FIELDS = {
+	"Company": "company",
+	"Customer": "customer",
+	"Territory": "territory",
+	"Sales Person": "sales_person"
+}
+
+BULK_ACTUALS_THRESHOLD = 20
+CONSOLIDATE_QUEUE_THRESHOLD = 200
+CONSOLIDATE_CHUNK_SIZE = 500
+DELTA_CHUNK_SIZE = 5000
 
 
 class SalesTargetPlan(Document):
@@ -32,61 +54,150 @@ class SalesTargetPlan(Document):
 		if not self.fiscal_year:
 			frappe.throw(_("Please set Fiscal Year"))
 
-		# Get fiscal year dates
-		fy = frappe.get_doc("Fiscal Year", self.fiscal_year)
+		self.check_saved()
+		actuals = get_plan_actuals(
+			self.fiscal_year,
+			self.target_for if self.target_entity else None,
+			[self.target_entity],
+			{item.seed_variety for item in self.target_items if item.seed_variety}
+		)
+		self.set_actuals(actuals.get(self.target_entity or None) or {})
+		frappe.msgprint(_("Actuals calculated from Sales Invoices"))
+
+	def check_saved(self):
+		"""Actuals are written to the saved target rows, so unsaved changes would be lost or overwritten."""
+		if self.is_new() or self.get("__unsaved") or any(item.is_new() for item in self.target_items):
+			frappe.throw(_("Please save the Sales Target Plan first"))
 
+	def set_actuals(self, actuals):
+		"""
+		Write actuals ({(seed_variety, month): [qty, amount]}, month "" for the
+		whole year) to the target rows and totals without re-saving the document.
+		"""
+		updates = {}
 		for item in self.target_items:
-			if not item.seed_variety:
+			qty, amount = actuals.get((item.seed_variety, item.month or ""), (0, 0))
+			if flt(item.actual_qty) != flt(qty) or flt(item.actual_amount) != flt(amount):
+				item.actual_qty, item.actual_amount = flt(qty), flt(amount)
+				updates[item.name] = {"actual_qty": item.actual_qty, "actual_amount": item.actual_amount}
+
+		if updates:
+			frappe.db.bulk_update("Target Item", updates)
+
+		self.calculate_totals()
+		self.db_set({
+			"total_actual_qty": self.total_actual_qty,
+			"total_actual_amount": self.total_actual_amount,
+			"achievement_percent": self.achievement_percent
+		})
+
+	@frappe.whitelist()
+	def phase_annual_targets(self, years=3):
+		"""
+		Replace the annual target rows (no month) with monthly rows, split by the
+		seasonality of the last `years` of sales. Varieties that already have
+		monthly rows are left as they are.
+		"""
+		if self.docstatus != 0:
+			frappe.throw(_("Only draft plans can be phased"))
+		if not self.fiscal_year:
+			frappe.throw(_("Please set Fiscal Year"))
+
+		self.check_permission("write")
+		self.check_saved()
+
+		phased = {item.seed_variety for item in self.target_items if item.month}
+		annual = {}
+		for item in self.target_items:
+			if item.month or not item.seed_variety or item.seed_variety in phased:
 				continue
 
-			# Get linked Item from Seed Variety
-			linked_item = frappe.db.get_value("Seed Variety", item.seed_variety, "linked_item")
-			if not linked_item:
+			row = annual.setdefault(item.seed_variety, frappe._dict(
+				seed_crop=item.seed_crop, target_qty=0, target_amount=0, names=[]
+			))
+			row.target_qty += flt(item.target_qty)
+			row.target_amount += flt(item.target_amount)
+			row.names.append(item.name)
+
+		if not annual:
+			frappe.msgprint(_("There are no annual targets to phase"))
+			return
+
+		year_start_date = getdate(frappe.db.get_value("Fiscal Year", self.fiscal_year, "year_start_date"))
+		varieties = list(annual)
+		profiles = get_seasonality_profiles(
+			varieties,
+			[annual[variety].seed_crop for variety in varieties],
+			add_days(year_start_date, -1),
+			cint(years) or 3
+		)
+
+		# Profiles have calendar months in columns; put them in fiscal order
+		month_order = [(year_start_date.month - 1 + i) % 12 for i in range(12)]
+		profiles = profiles[:, month_order]
+		months = [MONTHS[month] for month in month_order]
+
+		qty = split_annual(
+			np.array([annual[variety].target_qty for variety in varieties]),
+			profiles,
+			cint(frappe.get_precision("Target Item", "target_qty")) or 3
+		)
+		amount = split_annual(
+			np.array([annual[variety].target_amount for variety in varieties]),
+			profiles,
+			cint(frappe.get_precision("Target Item", "target_amount")) or 2
+		)
+
+		actuals = get_plan_actuals(
+			self.fiscal_year,
+			self.target_for if self.target_entity else None,
+			[self.target_entity],
+			varieties
+		).get(self.target_entity or None) or {}
+
+		timestamp = now()
+		fields = [
+			"name", "creation", "modified", "owner", "modified_by",
+			"parent", "parenttype", "parentfield", "idx",
+			"seed_variety", "seed_crop", "month", "target_qty", "target_amount", "actual_qty", "actual_amount"
+		]
+		# Monthly rows take the place of the variety's first annual row and the
+		# rows are renumbered, so idx stays contiguous
+		positions = {variety: i for i, variety in enumerate(varieties)}
+		annual_names = {name for row in annual.values() for name in row.names}
+		idx, values, reordered = 0, [], {}
+		for item in self.target_items:
+			if item.name not in annual_names:
+				idx += 1
+				if cint(item.idx) != idx:
+					reordered[item.name] = {"idx": idx}
 				continue
 
-			# Build query filters
-			filters = {
-				"docstatus": 1,
-				"posting_date": ["between", [fy.year_start_date, fy.year_end_date]],
-				"item_code": linked_item
-			}
-
-			# Add entity-specific filter
-			if self.target_for == "Customer" and self.target_entity:
-				filters["customer"] = self.target_entity
-			elif self.target_for == "Territory" and self.target_entity:
-				filters["territory"] = self.target_entity
-
-			# Add month filter if specified
-			if item.month:
-				month_num = self.get_month_number(item.month)
-				if month_num:
-					filters["posting_date"] = ["between", [
-						f"{fy.year_start_date.year if month_num >= fy.year_start_date.month else fy.year_end_date.year}-{month_num:02d}-01",
-						f"{fy.year_start_date.year if month_num >= fy.year_start_date.month else fy.year_end_date.year}-{month_num:02d}-31"
-					]]
-
-			# Query Sales Invoice Items
-			actuals = frappe.db.sql("""
-				SELECT SUM(sii.qty) as qty, SUM(sii.amount) as amount
-				FROM `tabSales Invoice Item` sii
-				JOIN `tabSales Invoice` si ON sii.parent = si.name
-				WHERE si.docstatus = 1
-				AND sii.item_code = %(item_code)s
-				AND si.posting_date BETWEEN %(start_date)s AND %(end_date)s
-			""", {
-				"item_code": linked_item,
-				"start_date": fy.year_start_date,
-				"end_date": fy.year_end_date
-			}, as_dict=True)
-
-			if actuals and actuals[0]:
-				item.actual_qty = flt(actuals[0].qty)
-				item.actual_amount = flt(actuals[0].amount)
+			if item.name != annual[item.seed_variety].names[0]:
+				continue
 
-		self.calculate_totals()
-		self.save()
-		frappe.msgprint(_("Actuals calculated from Sales Invoices"))
+			i = positions[item.seed_variety]
+			for j, month in enumerate(months):
+				idx += 1
+				actual_qty, actual_amount = actuals.get((item.seed_variety, month), (0, 0))
+				values.append((
+					frappe.generate_hash(length=10), timestamp, timestamp,
+					frappe.session.user, frappe.session.user,
+					self.name, self.doctype, "target_items", idx,
+					item.seed_variety, annual[item.seed_variety].seed_crop, month,
+					float(qty[i, j]), float(amount[i, j]), flt(actual_qty), flt(actual_amount)
+				))
+
+		frappe.db.delete("Target Item", {"name": ["in", list(annual_names)]})
+		frappe.db.bulk_insert("Target Item", fields=fields, values=values)
+		if reordered:
+			frappe.db.bulk_update("Target Item", reordered)
+
+		update_plan_totals([self.name])
+		# The rows were written directly; bumping modified makes forms opened
+		# before the phasing reload instead of saving their old rows over it
+		self.db_set("modified_by", frappe.session.user)
+		frappe.msgprint(_("Phased the annual targets of {0} varieties").format(len(varieties)))
 
 	def get_month_number(self, month_name):
 		"""Convert month name to number."""
@@ -103,28 +214,356 @@ class SalesTargetPlan(Document):
 		if isinstance(forecast_names, str):
 			forecast_names = frappe.parse_json(forecast_names)
 
-		for forecast_name in forecast_names:
-			forecast = frappe.get_doc("Sales Forecast", forecast_name)
-
-			for f_item in forecast.forecast_items:
-				# Check if variety already exists in targets
-				existing = next(
-					(t for t in self.target_items if t.seed_variety == f_item.seed_variety),
-					None
-				)
-
-				if existing:
-					# Sum quantities
-					existing.target_qty = flt(existing.target_qty) + flt(f_item.suggested_qty)
-					existing.target_amount = flt(existing.target_amount) + flt(f_item.expected_amount)
-				else:
-					# Add new target item
-					self.append("target_items", {
-						"seed_variety": f_item.seed_variety,
-						"target_qty": f_item.suggested_qty,
-						"target_amount": f_item.expected_amount
-					})
+		self.check_permission("write")
+
+		if len(forecast_names) > CONSOLIDATE_QUEUE_THRESHOLD:
+			frappe.enqueue(
+				"seed_core.seed_core.doctype.sales_target_plan.sales_target_plan.consolidate_plan_forecasts",
+				queue="long",
+				timeout=3600,
+				job_id=f"consolidate_forecasts::{self.name}",
+				deduplicate=True,
+				plan=self.name,
+				forecast_names=forecast_names
+			)
+			frappe.msgprint(_("Consolidation of {0} forecasts has been queued").format(len(forecast_names)))
+			return
+
+		self.merge_forecasts(forecast_names)
+		frappe.msgprint(_("Consolidated {0} forecasts").format(len(forecast_names)))
+
+	def merge_forecasts(self, forecast_names, show_progress=False):
+		"""Add the forecast totals per (variety, month) to the matching target rows in one pass."""
+		totals = get_forecast_totals(forecast_names, self.name if show_progress else None)
+
+		targets = {}
+		variety_targets = {}
+		for item in self.target_items:
+			targets.setdefault((item.seed_variety, item.month or ""), item)
+			variety_targets.setdefault(item.seed_variety, item)
+
+		for (seed_variety, month), (qty, amount) in totals.items():
+			# Forecasts have no month, so they fall back to any row of the variety
+			existing = targets.get((seed_variety, month)) or variety_targets.get(seed_variety)
+
+			if existing:
+				# Sum quantities
+				existing.target_qty = flt(existing.target_qty) + qty
+				existing.target_amount = flt(existing.target_amount) + amount
+			else:
+				# Add new target item
+				row = self.append("target_items", {
+					"seed_variety": seed_variety,
+					"month": month or None,
+					"target_qty": qty,
+					"target_amount": amount
+				})
+				targets[(seed_variety, month)] = variety_targets[seed_variety] = row
 
 		self.calculate_totals()
 		self.save()
-		frappe.msgprint(_("Consolidated {0} forecasts").format(len(forecast_names)))
+
+def get_plan_actuals(fiscal_year, target_for, entities, varieties=None):
+	"""
+	Return {entity: {(seed_variety, month): [qty, amount]}} for plans of one
+	fiscal year and target type, from one grouped query. Month "" holds the
+	whole-year totals. Territory and Sales Person targets include their
+	descendants; without a target type, sales of all entities are counted.
+	"""
+	year_start_date, year_end_date = frappe.db.get_value(
+		"Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"]
+	)
+	field = ENTITY_FIELDS.get(target_for)
+	entities = [entity for entity in set(entities) if entity] if field else [None]
+	if varieties is not None and not varieties:
+		return {}
+
+	# Map each sales entity to the plan entities it counts towards
+	owners = {}
+	for entity in entities:
+		members = [entity]
+		if target_for in ("Territory", "Sales Person"):
+			members += frappe.db.get_descendants(target_for, entity)
+		for member in members:
+			owners.setdefault(member, []).append(entity)
+
+	if not owners:
+		return {}
+
+	if target_for == "Sales Person":
+		rows = get_sales_person_sales(year_start_date, year_end_date, list(owners), varieties)
+	else:
+		group_by = ("seed_variety", "posting_month", field) if field else ("seed_variety", "posting_month")
+		filters = {field: list(owners)} if field else {}
+		rows = get_variety_sales(
+			year_start_date, year_end_date, group_by=group_by,
+			seed_variety=list(varieties) if varieties else None, **filters
+		)
+
+	actuals = {entity: {} for entity in entities}
+	for row in rows:
+		month = MONTHS[getdate(row.posting_month).month - 1]
+		for entity in owners[row[field]] if field else [None]:
+			for key in ((row.seed_variety, month), (row.seed_variety, "")):
+				totals = actuals[entity].setdefault(key, [0, 0])
+				totals[0] += flt(row.qty)
+				totals[1] += flt(row.amount)
+
+	return actuals
+
+
+def get_sales_person_sales(start_date, end_date, sales_persons, varieties=None):
+	"""Monthly variety sales credited to sales persons by their Sales Team allocation."""
+	conditions = "AND sv.name IN %(varieties)s" if varieties else ""
+
+	return frappe.db.sql("""
+		SELECT
+			st.sales_person,
+			sv.name as seed_variety,
+			DATE_FORMAT(si.posting_date, '%%Y-%%m-01') as posting_month,
+			SUM(sii.qty * st.allocated_percentage / 100) as qty,
+			SUM(sii.amount * st.allocated_percentage / 100) as amount
+		FROM `tabSales Invoice Item` sii
+		JOIN `tabSales Invoice` si ON sii.parent = si.name
+		JOIN `tabSales Team` st ON st.parent = si.name AND st.parenttype = 'Sales Invoice'
+		JOIN `tabSeed Variety` sv ON sv.linked_item = sii.item_code
+		WHERE si.docstatus = 1
+		AND si.posting_date BETWEEN %(start_date)s AND %(end_date)s
+		AND st.sales_person IN %(sales_persons)s
+		{conditions}
+		GROUP BY st.sales_person, sv.name, DATE_FORMAT(si.posting_date, '%%Y-%%m-01')
+	""".format(conditions=conditions), {
+		"start_date": start_date,
+		"end_date": end_date,
+		"sales_persons": tuple(sales_persons),
+		"varieties": tuple(varieties or ())
+	}, as_dict=True)
+
+
+def calculate_plan_actuals(plan_names):
+	"""Recompute the actuals of many plans, with one query per fiscal year and target type."""
+	groups = {}
+	for name in plan_names:
+		plan = frappe.get_doc("Sales Target Plan", name)
+		key = (plan.fiscal_year, plan.target_for if plan.target_entity else None)
+		groups.setdefault(key, []).append(plan)
+
+	for (fiscal_year, target_for), plans in groups.items():
+		if not fiscal_year:
+			continue
+
+		actuals = get_plan_actuals(
+			fiscal_year,
+			target_for,
+			[plan.target_entity for plan in plans],
+			{item.seed_variety for plan in plans for item in plan.target_items if item.seed_variety}
+		)
+		for plan in plans:
+			plan.set_actuals(actuals.get(plan.target_entity or None) or {})
+
+
+@frappe.whitelist()
+def calculate_actuals_for_plans(plan_names):
+	"""Recompute actuals for the selected plans; large selections run in the background."""
+	if isinstance(plan_names, str):
+		plan_names = frappe.parse_json(plan_names)
+
+	for name in plan_names:
+		frappe.has_permission("Sales Target Plan", "write", name, throw=True)
+
+	if len(plan_names) > BULK_ACTUALS_THRESHOLD:
+		frappe.enqueue(
+			"seed_core.seed_core.doctype.sales_target_plan.sales_target_plan.calculate_plan_actuals",
+			queue="long",
+			timeout=3600,
+			plan_names=plan_names
+		)
+		frappe.msgprint(_("Actuals of {0} plans will be calculated in the background").format(len(plan_names)))
+		return
+
+	calculate_plan_actuals(plan_names)
+	frappe.msgprint(_("Actuals calculated for {0} plans").format(len(plan_names)))
+
+
+def apply_sales_deltas():
+	"""
+	Scheduler job: refresh the actuals of the open Sales Target Plans touched by
+	the queued Variety Sales Deltas, then drop the deltas that were read. The
+	actuals of the delta varieties are recomputed from Variety Sales Fact, which
+	the invoice writes in the same transaction as its deltas, so a delta that
+	commits after a higher id is simply picked up by a later run.
+	"""
+	while True:
+		deltas = frappe.get_all(
+			"Variety Sales Delta",
+			fields=["name", "seed_variety", "posting_date", "company", "territory", "customer"],
+			order_by="name asc",
+			limit=DELTA_CHUNK_SIZE
+		)
+		if not deltas:
+			break
+
+		refresh_plan_actuals(get_delta_plans(deltas))
+		frappe.db.delete("Variety Sales Delta", {"name": ["in", [delta.name for delta in deltas]]})
+		frappe.db.commit()
+
+		if len(deltas) < DELTA_CHUNK_SIZE:
+			break
+
+
+def get_open_plans(from_date, to_date):
+	"""Return the plans that are not cancelled or rejected and whose fiscal year overlaps the dates."""
+	plans = frappe.db.sql("""
+		SELECT
+			stp.name, stp.target_for, stp.target_entity,
+			fy.year_start_date, fy.year_end_date
+		FROM `tabSales Target Plan` stp
+		JOIN `tabFiscal Year` fy ON fy.name = stp.fiscal_year
+		WHERE stp.docstatus < 2
+		AND IFNULL(stp.status, '') != 'Rejected'
+		AND fy.year_end_date >= %(from_date)s
+		AND fy.year_start_date <= %(to_date)s
+	""", {"from_date": from_date, "to_date": to_date}, as_dict=True)
+
+	for plan in plans:
+		plan.members = {plan.target_entity}
+		if plan.target_for == "Territory" and plan.target_entity:
+			plan.members.update(frappe.db.get_descendants("Territory", plan.target_entity))
+
+	return plans
+
+
+def get_delta_plans(deltas):
+	"""Return {plan: varieties} of the open plans a chunk of deltas counts towards."""
+	plans = get_open_plans(min(d.posting_date for d in deltas), max(d.posting_date for d in deltas))
+
+	plan_varieties = {}
+	for delta in deltas:
+		for plan in plans:
+			if not plan.year_start_date <= getdate(delta.posting_date) <= plan.year_end_date:
+				continue
+
+			# Sales Team credit is not part of the deltas, so Sales Person plans are refreshed for any sale
+			field = ENTITY_FIELDS.get(plan.target_for)
+			if plan.target_for != "Sales Person" and plan.target_entity and field and delta[field] not in plan.members:
+				continue
+
+			plan_varieties.setdefault(plan.name, set()).add(delta.seed_variety)
+
+	return plan_varieties
+
+
+def refresh_plan_actuals(plan_varieties):
+	"""
+	Recompute the actuals of some varieties in many plans ({plan: varieties}),
+	with one query per fiscal year and target type, and write the changed
+	Target Item rows with bulk updates.
+	"""
+	if not plan_varieties:
+		return
+
+	groups = {}
+	for plan in frappe.get_all(
+		"Sales Target Plan",
+		filters={"name": ["in", list(plan_varieties)]},
+		fields=["name", "fiscal_year", "target_for", "target_entity"]
+	):
+		key = (plan.fiscal_year, plan.target_for if plan.target_entity else None)
+		groups.setdefault(key, []).append(plan)
+
+	items = {}
+	for item in frappe.get_all(
+		"Target Item",
+		filters={
+			"parenttype": "Sales Target Plan",
+			"parent": ["in", list(plan_varieties)],
+			"seed_variety": ["in", list(set().union(*plan_varieties.values()))]
+		},
+		fields=["name", "parent", "seed_variety", "month", "actual_qty", "actual_amount"]
+	):
+		items.setdefault(item.parent, []).append(item)
+
+	updates = {}
+	for (fiscal_year, target_for), plans in groups.items():
+		if not fiscal_year:
+			continue
+
+		actuals = get_plan_actuals(
+			fiscal_year,
+			target_for,
+			[plan.target_entity for plan in plans],
+			set().union(*(plan_varieties[plan.name] for plan in plans))
+		)
+		for plan in plans:
+			plan_actuals = actuals.get(plan.target_entity or None) or {}
+			for item in items.get(plan.name, []):
+				if item.seed_variety not in plan_varieties[plan.name]:
+					continue
+
+				qty, amount = plan_actuals.get((item.seed_variety, item.month or ""), (0, 0))
+				if flt(item.actual_qty) != flt(qty) or flt(item.actual_amount) != flt(amount):
+					updates[item.name] = {"actual_qty": flt(qty), "actual_amount": flt(amount)}
+
+	if updates:
+		frappe.db.bulk_update("Target Item", updates)
+		update_plan_totals(list(plan_varieties))
+
+
+def update_plan_totals(plan_names):
+	"""Recompute the actual totals and achievement of plans from their target rows."""
+	frappe.db.sql("""
+		UPDATE `tabSales Target Plan` stp
+		JOIN (
+			SELECT parent, SUM(actual_qty) as actual_qty, SUM(actual_amount) as actual_amount
+			FROM `tabTarget Item`
+			WHERE parenttype = 'Sales Target Plan'
+			AND parent IN %(plans)s
+			GROUP BY parent
+		) ti ON ti.parent = stp.name
+		SET
+			stp.total_actual_qty = ti.actual_qty,
+			stp.total_actual_amount = ti.actual_amount,
+			stp.achievement_percent = IF(stp.total_target_amount, ti.actual_amount / stp.total_target_amount * 100, 0)
+	""", {"plans": tuple(plan_names)})
+
+
+def get_forecast_totals(forecast_names, plan=None):
+	"""
+	Return {(seed_variety, month): [qty, amount]} summed over the Forecast Items of
+	the given forecasts, read in chunks. Forecast Items have no month, so the
+	month is always "". Progress is published on the plan if one is given.
+	"""
+	totals = {}
+
+	for start in range(0, len(forecast_names), CONSOLIDATE_CHUNK_SIZE):
+		chunk = forecast_names[start:start + CONSOLIDATE_CHUNK_SIZE]
+
+		for row in frappe.db.sql("""
+			SELECT seed_variety, SUM(suggested_qty) as qty, SUM(expected_amount) as amount
+			FROM `tabForecast Item`
+			WHERE parenttype = 'Sales Forecast'
+			AND parent IN %(forecasts)s
+			AND IFNULL(seed_variety, '') != ''
+			GROUP BY seed_variety
+		""", {"forecasts": tuple(chunk)}, as_dict=True):
+			total = totals.setdefault((row.seed_variety, ""), [0, 0])
+			total[0] += flt(row.qty)
+			total[1] += flt(row.amount)
+
+		if plan:
+			done = start + len(chunk)
+			frappe.publish_progress(
+				done * 100 / len(forecast_names),
+				title=_("Consolidating Forecasts"),
+				doctype="Sales Target Plan",
+				docname=plan,
+				description=_("Read {0} of {1} forecasts").format(done, len(forecast_names))
+			)
+
+	return totals
+
+
+def consolidate_plan_forecasts(plan, forecast_names):
+	"""Background job for consolidating large forecast selections."""
+	doc = frappe.get_doc("Sales Target Plan", plan)
+	doc.merge_forecasts(forecast_names, show_progress=True)
@@ -0,0 +1,24 @@
+frappe.listview_settings["Sales Target Plan"] = {
+    onload: function (listview) {
+        // Recompute actuals of the selected plans in one go
+        listview.page.add_actions_menu_item(__("Calculate Actuals"), function () {
+            const checked_items = listview.get_checked_items();
+            if (checked_items.length === 0) {
+                frappe.msgprint(__("Please select plans to update."));
+                return;
+            }
+
+            frappe.call({
+                method: "seed_core.seed_core.doctype.sales_target_plan.sales_target_plan.calculate_actuals_for_plans",
+                args: { plan_names: checked_items.map(item => item.name) },
+                freeze: true,
+                callback: function (r) {
+                    if (!r.exc) {
+                        listview.clear_checked_items();
+                        listview.refresh();
+                    }
+                }
+            });
+        });
+    }
+};
@@ -0,0 +1,164 @@
+# Copyright (c) 2026, aremtech and Contributors
+# See license.txt
+
+import datetime
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from seed_core.seed_core.doctype.sales_target_plan.sales_target_plan import apply_sales_deltas
+from seed_core.seed_core.doctype.seed_variety.seed_variety import get_variety_identifier
+from seed_core.seed_core.doctype.variety_sales_delta.variety_sales_delta import record_sales_deltas
+from seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact import update_variety_sales_fact
+
+EXTRA_TEST_RECORD_DEPENDENCIES = ["Company", "Customer", "Territory"]
+
+COMPANY = "_Test Company"
+CUSTOMER = "_Test Customer"
+TERRITORY = "_Test Territory"
+POSTING_DATE = datetime.date(2026, 3, 10)
+
+
+class IntegrationTestSalesTargetPlan(IntegrationTestCase):
+	"""
+	Integration tests for the actuals refresh from queued sales deltas. Invoices
+	are written through the Variety Sales Fact and Variety Sales Delta hooks.
+	"""
+
+	def setUp(self):
+		# The job commits per chunk; keep everything in the test transaction
+		patcher = patch.object(frappe.db, "commit")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+		frappe.db.delete("Variety Sales Delta")
+		self.variety = make_variety()
+		self.plan = frappe.get_doc(
+			{
+				"doctype": "Sales Target Plan",
+				"fiscal_year": get_fiscal_year(POSTING_DATE),
+				"target_for": "Customer",
+				"target_entity": CUSTOMER,
+				"currency": frappe.get_cached_value("Company", COMPANY, "default_currency"),
+				"target_items": [{"seed_variety": self.variety.name, "month": "March", "target_qty": 10}],
+			}
+		).insert()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def commit_invoice(self, qty, customer=CUSTOMER, delta_name=None):
+		"""
+		Write the sales fact and the delta of an invoice, as its submit does in one
+		transaction. `delta_name` inserts the delta with a given id instead.
+		"""
+		invoice = frappe._dict(
+			name=frappe.generate_hash(length=10),
+			posting_date=POSTING_DATE,
+			company=COMPANY,
+			territory=TERRITORY,
+			customer=customer,
+			items=[frappe._dict(item_code=self.variety.linked_item, qty=qty, amount=qty * 10)],
+		)
+		update_variety_sales_fact(invoice, "on_submit")
+
+		if not delta_name:
+			record_sales_deltas(invoice, "on_submit")
+			return frappe.db.get_value("Variety Sales Delta", {"sales_invoice": invoice.name})
+
+		frappe.get_doc(
+			{
+				"doctype": "Variety Sales Delta",
+				"name": delta_name,
+				"sales_invoice": invoice.name,
+				"seed_variety": self.variety.name,
+				"posting_date": POSTING_DATE,
+				"company": COMPANY,
+				"territory": TERRITORY,
+				"customer": customer,
+				"qty": qty,
+				"amount": qty * 10,
+			}
+		).db_insert()
+
+	def get_actuals(self):
+		return frappe.db.get_value(
+			"Target Item", {"parent": self.plan.name}, ["actual_qty", "actual_amount"], as_dict=True
+		)
+
+	def test_delta_committed_out_of_order_is_applied_later(self):
+		# The delta with the lower id is still uncommitted when the higher one commits and the job runs
+		delta = self.commit_invoice(5)
+		apply_sales_deltas()
+		self.assertEqual(self.get_actuals().actual_qty, 5)
+		self.assertFalse(frappe.db.count("Variety Sales Delta"))
+
+		self.commit_invoice(3, delta_name=delta - 1)
+		apply_sales_deltas()
+		actuals = self.get_actuals()
+		self.assertEqual(actuals.actual_qty, 8)
+		self.assertEqual(actuals.actual_amount, 80)
+		self.assertEqual(frappe.db.get_value("Sales Target Plan", self.plan.name, "total_actual_qty"), 8)
+		self.assertFalse(frappe.db.count("Variety Sales Delta"))
+
+	def test_rerun_does_not_count_twice(self):
+		self.commit_invoice(5)
+		apply_sales_deltas()
+		apply_sales_deltas()
+		self.assertEqual(self.get_actuals().actual_qty, 5)
+
+	def test_other_customers_are_skipped(self):
+		self.commit_invoice(5, customer="_Test Customer 1")
+		apply_sales_deltas()
+		self.assertEqual(self.get_actuals().actual_qty, 0)
+		self.assertFalse(frappe.db.count("Variety Sales Delta"))
+
+
+def make_variety():
+	"""Return a Seed Variety (with its linked Item) below a test crop and segment."""
+	if not frappe.db.exists("Seed Crop", "99"):
+		frappe.get_doc({"doctype": "Seed Crop", "crop_code": "99", "crop_name": "_Test Crop"}).insert()
+	if not frappe.db.exists("Seed Segment", "999"):
+		frappe.get_doc(
+			{
+				"doctype": "Seed Segment",
+				"segment_code": "999",
+				"segment_name": "_Test Segment",
+				"seed_crop": "99",
+			}
+		).insert()
+
+	identifier = get_variety_identifier("99", "999", None, "9999")
+	if frappe.db.exists("Seed Variety", identifier):
+		return frappe.get_doc("Seed Variety", identifier)
+
+	return frappe.get_doc(
+		{
+			"doctype": "Seed Variety",
+			"variety_identifier": identifier,
+			"variety_code": "9999",
+			"variety_name": "_Test Variety",
+			"seed_crop": "99",
+			"seed_segment": "999",
+		}
+	).insert()
+
+
+def get_fiscal_year(date):
+	"""Return a Fiscal Year covering the date, creating a calendar year if there is none."""
+	fiscal_year = frappe.db.get_value(
+		"Fiscal Year", {"year_start_date": ["<=", date], "year_end_date": [">=", date]}
+	)
+	if fiscal_year:
+		return fiscal_year
+
+	fiscal_year = frappe.get_doc(
+		{
+			"doctype": "Fiscal Year",
+			"year": f"_Test Seed Fiscal Year {date.year}",
+			"year_start_date": datetime.date(date.year, 1, 1),
+			"year_end_date": datetime.date(date.year, 12, 31),
+		}
+	).insert()
+	return fiscal_year.name
@@ -4,6 +4,9 @@
 import frappe
 from frappe.model.document import Document
 
+from seed_core.seed_core.cache import clear_settings_cache
+
 
 class SeedCoreSettings(Document):
-	pass
+	def on_update(self):
+		clear_settings_cache()
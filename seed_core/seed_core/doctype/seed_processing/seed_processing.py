@@ -5,6 +5,10 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 
+from seed_core.seed_core import cache
+from seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary import set_batch_flags
+from seed_core.seed_core.doctype.batch_name_counter.batch_name_counter import get_next_batch_name
+
 
 class SeedProcessing(Document):
 	def validate(self):
@@ -89,15 +93,8 @@ class SeedProcessing(Document):
 		}
 		suffix = suffix_map.get(self.operation_type, "P")
 
-		# Generate batch name
-		batch_name = f"{self.input_batch}-{suffix}"
-
-		# Check if batch exists
-		if frappe.db.exists("Batch", batch_name):
-			count = 1
-			while frappe.db.exists("Batch", f"{batch_name}{count}"):
-				count += 1
-			batch_name = f"{batch_name}{count}"
+		# Generate batch name from the counter of this input batch and operation
+		batch_name = get_next_batch_name(f"{self.input_batch}-{suffix}")
 
 		batch = frappe.new_doc("Batch")
 		batch.batch_id = batch_name
@@ -111,7 +108,7 @@ class SeedProcessing(Document):
 		if not self.output_batch:
 			return
 
-		input_batch = frappe.get_doc("Batch", self.input_batch)
+		input_batch = cache.get_batch(self.input_batch) or {}
 
 		# Copy biological data (Germination/Purity) from input to output
 		fields_to_copy = [
@@ -120,31 +117,36 @@ class SeedProcessing(Document):
 			"is_organic", "is_gspp"
 		]
 
-		for field in fields_to_copy:
-			if hasattr(input_batch, field):
-				frappe.db.set_value("Batch", self.output_batch, field,
-					getattr(input_batch, field), update_modified=False)
+		values = {field: input_batch.get(field) for field in fields_to_copy if field in input_batch}
 
 		# Apply treatment-specific attributes
 		if self.operation_type == "Cleaning":
 			# Cleaning resets treatment attributes
 			pass
 		elif self.operation_type == "Pelleting":
-			frappe.db.set_value("Batch", self.output_batch, "is_pelleted", 1, update_modified=False)
+			values["is_pelleted"] = 1
 		elif self.operation_type == "Priming":
-			frappe.db.set_value("Batch", self.output_batch, "is_primed", 1, update_modified=False)
+			values["is_primed"] = 1
 		elif self.operation_type == "Chemical Treatment":
-			frappe.db.set_value("Batch", self.output_batch, "is_chemically_treated", 1, update_modified=False)
+			values["is_chemically_treated"] = 1
 
 		# Copy existing treatment flags from input
 		treatment_fields = ["is_pelleted", "is_primed", "is_coated", "is_chemically_treated", "treatment_name"]
+		current_values = frappe.db.get_value("Batch", self.output_batch, treatment_fields, as_dict=True) or {}
 		for field in treatment_fields:
-			if hasattr(input_batch, field) and getattr(input_batch, field):
+			if input_batch.get(field):
 				# Don't overwrite if we just set it above
-				current_value = frappe.db.get_value("Batch", self.output_batch, field)
-				if not current_value:
-					frappe.db.set_value("Batch", self.output_batch, field,
-						getattr(input_batch, field), update_modified=False)
+				if not values.get(field) and not current_values.get(field):
+					values[field] = input_batch.get(field)
+
+		if not values:
+			return
+
+		frappe.db.set_value("Batch", self.output_batch, values, update_modified=False)
+
+		# set_value bypasses Batch hooks, so refresh what they would have refreshed
+		cache.invalidate_batch(self.output_batch)
+		set_batch_flags(self.output_batch, {**current_values, **values})
 
 
 @frappe.whitelist()
@@ -0,0 +1,222 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Seed Stock Checkpoint stores month-end batch balances per bin. A balance as
+of any date is the nearest checkpoint plus the ledger entries posted since,
+so historical stock does not require summing the whole Stock Ledger.
+
+Checkpoints up to Seed Core Settings.stock_checkpoint_date are complete;
+backdated ledger entries move that date back and the checkpoints after it
+are rebuilt in the background.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, add_months, get_last_day, getdate, now, today
+
+from seed_core.seed_core import cache
+
+
+class SeedStockCheckpoint(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Seed Stock Checkpoint",
+		["checkpoint_date", "item_code", "warehouse", "batch_no"],
+		constraint_name="unique_checkpoint_bin_batch",
+	)
+
+
+def get_valid_until():
+	"""Return the last month end up to which checkpoints are complete."""
+	settings = cache.get_settings()
+	if settings and settings.stock_checkpoint_date:
+		return getdate(settings.stock_checkpoint_date)
+
+
+def read_valid_until(for_update=False):
+	"""Read the valid date from the database instead of the cache, optionally locking it."""
+	value = frappe.db.sql(
+		"""
+		SELECT value
+		FROM `tabSingles`
+		WHERE doctype = 'Seed Core Settings'
+		AND field = 'stock_checkpoint_date'
+		{for_update}
+	""".format(for_update="FOR UPDATE" if for_update else "")
+	)
+
+	if value and value[0][0]:
+		return getdate(value[0][0])
+
+
+def advance_valid_until(previous_date, checkpoint_date):
+	"""
+	Move the valid date forward to checkpoint_date if it is still previous_date
+	(compare-and-set); returns False when a backdated entry lowered it meanwhile.
+	"""
+	if read_valid_until(for_update=True) != previous_date:
+		return False
+
+	frappe.db.set_single_value(
+		"Seed Core Settings", "stock_checkpoint_date", checkpoint_date, update_modified=False
+	)
+	cache.clear_settings_cache()
+	return True
+
+
+def lower_valid_until(date):
+	"""Move the valid date back to `date`, never forward past a lower date set concurrently."""
+	frappe.db.sql(
+		"""
+		UPDATE `tabSingles`
+		SET value = LEAST(value, %(date)s)
+		WHERE doctype = 'Seed Core Settings'
+		AND field = 'stock_checkpoint_date'
+	""",
+		{"date": str(getdate(date))},
+	)
+	cache.clear_settings_cache()
+
+
+def get_checkpoint_date(as_of_date):
+	"""Return the nearest complete checkpoint on or before a date, if any."""
+	as_of_date = getdate(as_of_date)
+	month_end = (
+		as_of_date if as_of_date == get_last_day(as_of_date) else get_last_day(add_months(as_of_date, -1))
+	)
+	valid_until = get_valid_until()
+
+	if valid_until:
+		return min(month_end, valid_until)
+
+
+def get_balance_query(checkpoint_date, conditions=""):
+	"""
+	Return SQL selecting (item_code, warehouse, batch_no, company, qty) as of
+	%(as_of_date)s: the checkpoint rows plus the ledger entries posted after it.
+	`conditions` may filter on unqualified company / warehouse columns and is
+	applied to both parts.
+	"""
+	checkpoint_rows = ""
+	ledger_conditions = "AND posting_date <= %(as_of_date)s"
+
+	if checkpoint_date:
+		checkpoint_rows = """
+			SELECT item_code, warehouse, batch_no, company, qty
+			FROM `tabSeed Stock Checkpoint`
+			WHERE checkpoint_date = %(checkpoint_date)s
+			{conditions}
+			UNION ALL
+		""".format(conditions=conditions)
+		ledger_conditions = "AND posting_date > %(checkpoint_date)s " + ledger_conditions
+
+	return """
+		SELECT item_code, warehouse, batch_no, MAX(company) as company, SUM(qty) as qty
+		FROM (
+			{checkpoint_rows}
+			SELECT item_code, warehouse, batch_no, company, actual_qty as qty
+			FROM `tabStock Ledger Entry`
+			WHERE is_cancelled = 0
+			AND IFNULL(batch_no, '') != ''
+			{ledger_conditions}
+			{conditions}
+		) balances
+		GROUP BY item_code, warehouse, batch_no
+	""".format(checkpoint_rows=checkpoint_rows, ledger_conditions=ledger_conditions, conditions=conditions)
+
+
+def build_checkpoint(checkpoint_date, previous_date=None):
+	"""Write the checkpoint for a month end from the previous checkpoint and the ledger since."""
+	frappe.db.delete("Seed Stock Checkpoint", {"checkpoint_date": checkpoint_date})
+
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabSeed Stock Checkpoint`
+			(name, creation, modified, modified_by, owner, docstatus, idx,
+			checkpoint_date, item_code, warehouse, batch_no, company, qty)
+		SELECT
+			MD5(CONCAT_WS('::', %(as_of_date)s, item_code, warehouse, batch_no)),
+			%(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+			%(as_of_date)s, item_code, warehouse, batch_no, company, qty
+		FROM ({balances}) checkpoint
+		WHERE qty <> 0
+	""".format(balances=get_balance_query(previous_date)),
+		{
+			"as_of_date": checkpoint_date,
+			"checkpoint_date": previous_date,
+			"timestamp": now(),
+			"user": frappe.session.user,
+		},
+	)
+
+
+def build_stock_checkpoints():
+	"""
+	Scheduler job: write month-end checkpoints up to the last completed month.
+	Starts over from the lower date when a backdated entry invalidated
+	checkpoints while the job was running, since its own re-enqueue is
+	deduplicated against this job.
+	"""
+	last_month_end = get_last_day(add_months(today(), -1))
+
+	while not build_checkpoints_until(last_month_end):
+		pass
+
+
+def build_checkpoints_until(last_month_end):
+	"""
+	Write the checkpoints after the valid date up to a month end, one committed
+	month at a time. Returns False if the valid date was lowered meanwhile.
+	"""
+	valid_until = read_valid_until()
+
+	if valid_until:
+		# Checkpoints after the valid date were made stale by backdated entries
+		frappe.db.delete("Seed Stock Checkpoint", {"checkpoint_date": (">", valid_until)})
+		checkpoint_date = get_last_day(add_days(valid_until, 1))
+	else:
+		first_posting_date = frappe.db.sql("""
+			SELECT MIN(posting_date)
+			FROM `tabStock Ledger Entry`
+			WHERE is_cancelled = 0
+		""")[0][0]
+		if not first_posting_date:
+			return True
+
+		frappe.db.delete("Seed Stock Checkpoint")
+		checkpoint_date = get_last_day(first_posting_date)
+
+	previous_date = valid_until
+	while checkpoint_date <= last_month_end:
+		build_checkpoint(checkpoint_date, previous_date)
+		if not advance_valid_until(previous_date, checkpoint_date):
+			# The checkpoint may miss the backdated entry
+			frappe.db.rollback()
+			return False
+		frappe.db.commit()
+
+		previous_date = checkpoint_date
+		checkpoint_date = get_last_day(add_days(checkpoint_date, 1))
+
+	return read_valid_until() == previous_date
+
+
+def invalidate_checkpoints(doc, method=None):
+	"""Stock Ledger Entry hook: a backdated entry invalidates the checkpoints from its month on."""
+	valid_until = get_valid_until()
+	if not valid_until or not doc.get("batch_no") or getdate(doc.posting_date) > valid_until:
+		return
+
+	lower_valid_until(get_last_day(add_months(doc.posting_date, -1)))
+	frappe.enqueue(
+		"seed_core.seed_core.doctype.seed_stock_checkpoint.seed_stock_checkpoint.build_stock_checkpoints",
+		queue="long",
+		timeout=3600,
+		job_id="build_seed_stock_checkpoints",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
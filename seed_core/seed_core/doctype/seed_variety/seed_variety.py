@@ -1,9 +1,57 @@
 # Copyright (c) 2026, aremtech and contributors
 # For license information, please see license.txt
 
+import hashlib
+import json
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from frappe.utils import cint
+
+from seed_core.seed_core import cache
+from seed_core.seed_core.doctype.batch_bin_summary.batch_bin_summary import update_variety_hierarchy
+from seed_core.seed_core.doctype.seed_variety_search_token.seed_variety_search_token import (
+	delete_search_index,
+	rebuild_search_index,
+	update_search_index,
+)
+
+# Varieties per chunk (and commit) of a bulk Item sync
+ITEM_SYNC_CHUNK_SIZE = 200
+# Seed Variety field linking each hierarchy doctype
+HIERARCHY_VARIETY_FIELDS = {
+	"Seed Crop": "seed_crop",
+	"Seed Segment": "seed_segment",
+	"Seed SubSegment": "seed_subsegment",
+}
+# Database lock (GET_LOCK) held by a hierarchy refresh, and how long a refresh waits for it (seconds)
+HIERARCHY_REFRESH_LOCK = "seed_core_hierarchy_refresh"
+HIERARCHY_REFRESH_TIMEOUT = 3600
+# Varieties per batched UPDATE of update_condensed_names, and rows shown by its dry run
+CONDENSED_NAME_CHUNK_SIZE = 1000
+CONDENSED_NAME_PREVIEW_SIZE = 500
+# Default Variety Commercial Name row of each variety; more than one is a conflict
+DEFAULT_COMMERCIAL_NAMES_SQL = """
+	SELECT parent, MAX(commercial_name) as commercial_name, COUNT(*) as defaults
+	FROM `tabVariety Commercial Name`
+	WHERE parenttype = 'Seed Variety'
+	AND parentfield = 'commercial_names'
+	AND is_default = 1
+	GROUP BY parent
+"""
+# Seed Variety fields read by create_or_update_linked_item
+ITEM_SYNC_FIELDS = [
+	"variety_identifier",
+	"variety_name",
+	"lifecycle_stage",
+	"linked_item",
+	"item_sync_hash",
+	"seed_crop",
+	"seed_segment",
+	"seed_subsegment",
+	"resistances",
+]
 
 
 class SeedVariety(Document):
@@ -21,10 +69,16 @@ class SeedVariety(Document):
 		self.set_default_commercial_name()
 
 	def on_update(self):
-		"""Sync changes to linked ERPNext Item."""
+		"""Sync changes to linked ERPNext Item, the search index and the bin summary."""
 		if self.linked_item:
 			self.create_or_update_linked_item()
 
+		update_search_index(self)
+		update_variety_hierarchy(self)
+
+	def on_trash(self):
+		delete_search_index(self)
+
 	def set_default_commercial_name(self):
 		"""Set default commercial name and update variety name if applicable."""
 		default_name = None
@@ -50,80 +104,105 @@ class SeedVariety(Document):
 	@frappe.whitelist()
 	def sync_to_item(self):
 		"""Manual trigger to sync variety to Item."""
-		self.create_or_update_linked_item()
+		self.create_or_update_linked_item(force=True)
 		frappe.msgprint(_("Synced to Item {0}").format(self.linked_item))
 
 
 
 	def generate_variety_identifier(self):
 		"""Generate unique variety identifier from hierarchy."""
-		crop_code = frappe.db.get_value("Seed Crop", self.seed_crop, "crop_code") or "00"
-		segment_code = frappe.db.get_value("Seed Segment", self.seed_segment, "segment_code") or "000"
-		subsegment_code = "000"
-		if self.seed_subsegment:
-			subsegment_code = frappe.db.get_value("Seed SubSegment", self.seed_subsegment, "subsegment_code") or "000"
-			# Extract just the subsegment part (last 2 digits)
-			if "-" in subsegment_code:
-				subsegment_code = subsegment_code.split("-")[-1]
-
-		return f"{crop_code}-{segment_code}-{subsegment_code}-{self.variety_code}"
-
-	def create_or_update_linked_item(self):
-		"""Create or update the linked ERPNext Item."""
+		return get_variety_identifier(self.seed_crop, self.seed_segment, self.seed_subsegment, self.variety_code)
+
+	def create_or_update_linked_item(self, force=False, items=None, item_groups=None):
+		"""
+		Create or update the linked ERPNext Item. An existing Item is only written
+		when the values feeding it changed since the last sync, and then only the
+		changed columns are updated. `items` optionally holds the prefetched
+		{item_code: current values} of a bulk sync and `item_groups` its
+		{crop name: Item Group} memo.
+		"""
 		# Get default settings
-		settings = frappe.get_single("Seed Core Settings") if frappe.db.exists("DocType", "Seed Core Settings") else None
+		settings = cache.get_settings()
 		default_item_group = settings.default_item_group if settings and settings.default_item_group else "Seeds"
 
 		# Get crop name for item group (use crop as item group)
-		crop_name = frappe.db.get_value("Seed Crop", self.seed_crop, "crop_name") or default_item_group
+		crop_name = cache.get_hierarchy_node("Seed Crop", self.seed_crop).get("name") or default_item_group
 
-		# Ensure item group exists
-		if not frappe.db.exists("Item Group", crop_name):
-			# Use default if crop item group doesn't exist
-			crop_name = default_item_group
-			if not frappe.db.exists("Item Group", crop_name):
-				# Create default Seeds item group if it doesn't exist
-				item_group = frappe.new_doc("Item Group")
-				item_group.item_group_name = crop_name
-				item_group.parent_item_group = "All Item Groups"
-				item_group.insert(ignore_permissions=True)
-
-		if self.linked_item and frappe.db.exists("Item", self.linked_item):
+		values = {"item_name": self.variety_name, "description": self.get_item_description()}
+		sync_hash = get_item_sync_hash(self.linked_item, crop_name, values)
+		if items is None:
+			item_exists = self.linked_item and frappe.db.exists("Item", self.linked_item)
+		else:
+			item_exists = self.linked_item in items
+
+		if item_exists and sync_hash == self.item_sync_hash and not force:
+			return
+
+		if item_groups is None:
+			values["item_group"] = self.get_item_group(crop_name, default_item_group)
+		else:
+			if crop_name not in item_groups:
+				item_groups[crop_name] = self.get_item_group(crop_name, default_item_group)
+			values["item_group"] = item_groups[crop_name]
+
+		if item_exists:
 			# Update existing item
-			item = frappe.get_doc("Item", self.linked_item)
-			item.item_name = self.variety_name
-			item.description = self.get_item_description()
-			item.item_group = crop_name
-			item.save(ignore_permissions=True)
+			if items is None:
+				current = frappe.db.get_value("Item", self.linked_item, list(values), as_dict=True)
+			else:
+				current = items[self.linked_item]
+			changed = {field: value for field, value in values.items() if current.get(field) != value}
+			if changed:
+				frappe.db.set_value("Item", self.linked_item, changed)
 		else:
 			# Create new item
 			item = frappe.new_doc("Item")
 			item.item_code = self.variety_identifier
-			item.item_name = self.variety_name
-			item.item_group = crop_name
+			item.update(values)
 
 			item.stock_uom = settings.default_stock_uom if settings and settings.default_stock_uom else "Kg"
 			item.is_stock_item = 1
 			item.has_batch_no = 1
 			item.create_new_batch = 1
-			item.description = self.get_item_description()
 			item.insert(ignore_permissions=True)
 
 			# Update linked_item field
-			frappe.db.set_value("Seed Variety", self.name, "linked_item", item.name, update_modified=False)
 			self.linked_item = item.name
+			sync_hash = get_item_sync_hash(self.linked_item, crop_name, values)
+
+		frappe.db.set_value(
+			"Seed Variety", self.name, {"linked_item": self.linked_item, "item_sync_hash": sync_hash},
+			update_modified=False
+		)
+		self.item_sync_hash = sync_hash
+
+	def get_item_group(self, crop_name, default_item_group):
+		"""Return the crop's Item Group, falling back to (and creating) the default one."""
+		# Ensure item group exists
+		if frappe.db.exists("Item Group", crop_name):
+			return crop_name
+
+		# Use default if crop item group doesn't exist
+		if not frappe.db.exists("Item Group", default_item_group):
+			# Create default Seeds item group if it doesn't exist
+			item_group = frappe.new_doc("Item Group")
+			item_group.item_group_name = default_item_group
+			item_group.parent_item_group = "All Item Groups"
+			item_group.insert(ignore_permissions=True)
+
+		return default_item_group
 
 	def get_item_description(self):
 		"""Generate item description from variety details."""
 		parts = [f"Variety: {self.variety_name}"]
 
 		if self.seed_crop:
-			crop_name = frappe.db.get_value("Seed Crop", self.seed_crop, "crop_name")
+			crop_name = cache.get_hierarchy_node("Seed Crop", self.seed_crop).get("name")
 			if crop_name:
 				parts.append(f"Crop: {crop_name}")
 
 		if self.seed_segment:
-			segment_name = frappe.db.get_value("Seed Segment", self.seed_segment, "segment_name")
+			segment_name = cache.get_hierarchy_node("Seed Segment", self.seed_segment).get("name")
 			if segment_name:
 				parts.append(f"Segment: {segment_name}")
 
@@ -138,32 +217,374 @@ class SeedVariety(Document):
 	@frappe.whitelist()
 	def sync_to_item(self):
 		"""Manual trigger to sync variety to Item."""
-		self.create_or_update_linked_item()
+		self.create_or_update_linked_item(force=True)
 		frappe.msgprint(_("Synced to Item {0}").format(self.linked_item))
 
+def get_variety_identifier(seed_crop, seed_segment, seed_subsegment, variety_code):
+	"""Return {Crop}-{Segment}-{SubSegment}-{Code} from the cached hierarchy codes."""
+	crop_code = cache.get_hierarchy_node("Seed Crop", seed_crop).get("code") or "00"
+	segment_code = cache.get_hierarchy_node("Seed Segment", seed_segment).get("code") or "000"
+	subsegment_code = "000"
+	if seed_subsegment:
+		subsegment_code = cache.get_hierarchy_node("Seed SubSegment", seed_subsegment).get("code") or "000"
+		# Extract just the subsegment part (last 2 digits)
+		if "-" in subsegment_code:
+			subsegment_code = subsegment_code.split("-")[-1]
+
+	return f"{crop_code}-{segment_code}-{subsegment_code}-{variety_code}"
+
+
+def get_item_sync_hash(linked_item, item_group, values):
+	"""Fingerprint of the values a variety writes to its Item."""
+	return hashlib.md5(json.dumps([linked_item, item_group, values], sort_keys=True).encode()).hexdigest()
+
+
 @frappe.whitelist()
 def sync_selected_to_items(names):
-	"Sync selected varieties to Items."
+	"Queue syncing the selected varieties to Items."
 	if isinstance(names, str):
-		import json
 		names = json.loads(names)
-	
-	for name in names:
-		doc = frappe.get_doc('Seed Variety', name)
-		doc.create_or_update_linked_item()
-	
-	frappe.msgprint(_('Synced {0} varieties to Items').format(len(names)))
+
+	frappe.has_permission("Seed Variety", "write", throw=True)
+
+	frappe.enqueue(
+		"seed_core.seed_core.doctype.seed_variety.seed_variety.sync_varieties_to_items",
+		queue="long",
+		timeout=3600,
+		names=names
+	)
+	frappe.msgprint(_("Syncing {0} varieties to Items in the background").format(len(names)))
+
+
+def sync_varieties_to_items(names):
+	"""
+	Background job: sync varieties to their Items in chunks. Each chunk loads
+	its varieties and linked Items with one query each and is committed on its
+	own; varieties whose Item values did not change are skipped, a failing
+	variety is rolled back alone and reported in the summary.
+	"""
+	succeeded, failed = 0, []
+	item_groups = {}
+
+	for start in range(0, len(names), ITEM_SYNC_CHUNK_SIZE):
+		chunk = names[start:start + ITEM_SYNC_CHUNK_SIZE]
+		chunk_failed = sync_items_chunk(chunk, item_groups)
+		succeeded += len(chunk) - len(chunk_failed)
+		failed += chunk_failed
+
+		frappe.db.commit()
+		done = start + len(chunk)
+		frappe.publish_progress(
+			done * 100 / len(names),
+			title=_("Syncing Varieties to Items"),
+			description=_("Synced {0} of {1} varieties").format(done, len(names))
+		)
+
+	summary = {"succeeded": succeeded, "failed": failed}
+	frappe.publish_realtime("seed_variety_item_sync", summary, user=frappe.session.user)
+	return summary
+
+
+def sync_items_chunk(names, item_groups):
+	"""
+	Sync a chunk of varieties to their Items, loading the varieties and linked
+	Items with one query each. `item_groups` is the {crop name: Item Group}
+	memo of the whole run. Returns the failed varieties; each is rolled back alone.
+	"""
+	varieties = frappe.get_all(
+		"Seed Variety",
+		filters={"name": ["in", names]},
+		fields=["name", *ITEM_SYNC_FIELDS]
+	)
+	linked_items = [variety.linked_item for variety in varieties if variety.linked_item]
+	items = {
+		item.name: item
+		for item in frappe.get_all(
+			"Item",
+			filters={"name": ["in", linked_items]},
+			fields=["name", "item_name", "description", "item_group"]
+		)
+	} if linked_items else {}
+
+	failed = []
+	for variety in varieties:
+		doc = frappe.get_doc({"doctype": "Seed Variety", **variety})
+		try:
+			frappe.db.savepoint("seed_variety_item_sync")
+			doc.create_or_update_linked_item(items=items, item_groups=item_groups)
+		except Exception as e:
+			frappe.db.rollback(save_point="seed_variety_item_sync")
+			# The rollback may have undone an Item Group created for the memo
+			item_groups.clear()
+			failed.append({"name": variety.name, "error": str(e)})
+
+	return failed
+
 
 @frappe.whitelist()
-def update_condensed_names():
-	"""Update all variety names based on default commercial name."""
-	varieties = frappe.get_all("Seed Variety", pluck="name")
-	count = 0
+def update_condensed_names(dry_run=1):
+	"""
+	Update variety names from their default commercial name. A dry run returns
+	the differences (up to CONDENSED_NAME_PREVIEW_SIZE rows) and the varieties
+	skipped for having several defaults; otherwise the update is queued.
+	"""
+	frappe.has_permission("Seed Variety", "write", throw=True)
+
+	if cint(dry_run):
+		changes = get_condensed_name_changes()
+		return {
+			"total": len(changes),
+			"changes": changes[:CONDENSED_NAME_PREVIEW_SIZE],
+			"conflicts": get_condensed_name_conflicts()[:CONDENSED_NAME_PREVIEW_SIZE]
+		}
+
+	frappe.enqueue(
+		"seed_core.seed_core.doctype.seed_variety.seed_variety.apply_condensed_names",
+		queue="long",
+		timeout=3600,
+		job_id="seed_variety_condensed_names",
+		deduplicate=True
+	)
+	frappe.msgprint(_("Variety names will be updated in the background"))
+
+
+def get_condensed_name_changes():
+	"""
+	Return the varieties whose variety_name or default_commercial_name differ from
+	their default Variety Commercial Name row, as Seed Variety.set_default_commercial_name
+	would set them: without a default row the default is cleared and the name kept.
+	Varieties with several default rows are left out (see get_condensed_name_conflicts).
+	"""
+	return frappe.db.sql("""
+		SELECT
+			sv.name,
+			sv.variety_name as old_name,
+			IF(IFNULL(d.commercial_name, '') != '', d.commercial_name, sv.variety_name) as new_name,
+			NULLIF(d.commercial_name, '') as new_default,
+			sv.linked_item
+		FROM `tabSeed Variety` sv
+		LEFT JOIN ({defaults}) d ON d.parent = sv.name
+		WHERE IFNULL(d.defaults, 0) <= 1
+		AND (
+			IFNULL(sv.default_commercial_name, '') != IFNULL(d.commercial_name, '')
+			OR (IFNULL(d.commercial_name, '') != '' AND IFNULL(sv.variety_name, '') != d.commercial_name)
+		)
+		ORDER BY sv.name
+	""".format(defaults=DEFAULT_COMMERCIAL_NAMES_SQL), as_dict=True)
+
+
+def get_condensed_name_conflicts():
+	"""Return the varieties with more than one default Variety Commercial Name row."""
+	return frappe.db.sql("""
+		SELECT parent as name, defaults
+		FROM ({defaults}) d
+		WHERE defaults > 1
+		ORDER BY parent
+	""".format(defaults=DEFAULT_COMMERCIAL_NAMES_SQL), as_dict=True)
+
+
+def apply_condensed_names():
+	"""
+	Background job: write the condensed names to varieties in batches, then sync
+	the renamed varieties to their Items (name, description and sync hash) as a
+	save would.
+	"""
+	changes = get_condensed_name_changes()
+	item_groups, failed = {}, []
+
+	for start in range(0, len(changes), CONDENSED_NAME_CHUNK_SIZE):
+		chunk = changes[start:start + CONDENSED_NAME_CHUNK_SIZE]
+		frappe.db.bulk_update("Seed Variety", {
+			row.name: {"variety_name": row.new_name, "default_commercial_name": row.new_default}
+			for row in chunk
+		})
+		renamed = [row.name for row in chunk if row.linked_item and row.new_name != row.old_name]
+		if renamed:
+			failed += sync_items_chunk(renamed, item_groups)
+
+		frappe.db.commit()
+		done = start + len(chunk)
+		frappe.publish_progress(
+			done * 100 / len(changes),
+			title=_("Updating Variety Names"),
+			description=_("Updated {0} of {1} varieties").format(done, len(changes))
+		)
+
+	if changes:
+		# Cached documents are cleared once for the whole run
+		frappe.enqueue(
+			"seed_core.seed_core.doctype.seed_variety.seed_variety.clear_renamed_variety_caches",
+			varieties=[row.name for row in changes],
+			items=[row.linked_item for row in changes if row.linked_item and row.new_name != row.old_name]
+		)
+
+	message = _("Updated names for {0} varieties").format(len(changes))
+	if failed:
+		message += "<br>" + _("Items of {0} varieties could not be updated: {1}").format(
+			len(failed), ", ".join(row["name"] for row in failed[:CONDENSED_NAME_PREVIEW_SIZE])
+		)
+	conflicts = get_condensed_name_conflicts()
+	if conflicts:
+		message += "<br>" + _("Skipped {0} varieties with more than one default Commercial Name: {1}").format(
+			len(conflicts), ", ".join(row.name for row in conflicts[:CONDENSED_NAME_PREVIEW_SIZE])
+		)
+
+	frappe.publish_realtime("msgprint", message, user=frappe.session.user)
+
+
+def clear_renamed_variety_caches(varieties, items):
+	rebuild_search_index(varieties)
+
 	for name in varieties:
-		doc = frappe.get_doc("Seed Variety", name)
-		doc.set_default_commercial_name()
-		if doc.has_changed(): # Optimistic check if supported, or just save
-			doc.save()
-			count += 1
-	
-	frappe.msgprint(_("Updated names for {0} varieties").format(count))
+		frappe.clear_document_cache("Seed Variety", name)
+
+	for name in items:
+		frappe.clear_document_cache("Item", name)
+
+
+def enqueue_hierarchy_refresh(doc, method=None):
+	"""Seed Crop / Seed Segment / Seed SubSegment on_update hook: queue a refresh when code or name changed."""
+	if not doc.get_doc_before_save():
+		return
+
+	if not any(doc.has_value_changed(field) for field in cache.HIERARCHY_FIELDS[doc.doctype]):
+		return
+
+	frappe.enqueue(
+		"seed_core.seed_core.doctype.seed_variety.seed_variety.refresh_hierarchy_varieties",
+		queue="long",
+		# Waiting for a running refresh counts against the timeout
+		timeout=2 * HIERARCHY_REFRESH_TIMEOUT,
+		# One job per edit: an edit made while an earlier job runs must still be applied
+		job_id=f"refresh_hierarchy_varieties::{doc.doctype}::{doc.name}::{doc.modified}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		doctype=doc.doctype,
+		name=doc.name
+	)
+
+
+def refresh_hierarchy_varieties(doctype, name):
+	"""
+	Background job: bring the varieties below a crop, segment or subsegment in
+	line with its current code and name. Refreshes run one at a time, so a
+	later edit is applied after an earlier one, and read the hierarchy from the
+	database rather than the cache.
+	"""
+	if not frappe.db.sql("SELECT GET_LOCK(%s, %s)", (HIERARCHY_REFRESH_LOCK, HIERARCHY_REFRESH_TIMEOUT))[0][0]:
+		frappe.throw(_("Another hierarchy refresh is still running"))
+
+	try:
+		cache.get_local_cache()["hierarchy"] = cache.load_hierarchy()
+		return update_hierarchy_varieties(doctype, name)
+	finally:
+		cache.get_local_cache().pop("hierarchy", None)
+		frappe.db.sql("SELECT RELEASE_LOCK(%s)", HIERARCHY_REFRESH_LOCK)
+
+
+def update_hierarchy_varieties(doctype, name):
+	"""
+	Recompute identifiers, Item names, descriptions and groups of the varieties
+	below a hierarchy record. Items are compared with the prefetched rows and
+	only changed columns are written, in one batched update per chunk.
+	Varieties whose identifier changed are renamed, together with their Item
+	when its code is the old identifier; Items linked by hand keep their code.
+	"""
+	names = frappe.get_all(
+		"Seed Variety", filters={HIERARCHY_VARIETY_FIELDS[doctype]: name}, pluck="name", order_by="name"
+	)
+
+	settings = cache.get_settings()
+	default_item_group = settings.default_item_group if settings and settings.default_item_group else "Seeds"
+	item_groups = {}
+	renamed, failed = 0, []
+
+	for start in range(0, len(names), ITEM_SYNC_CHUNK_SIZE):
+		chunk = names[start:start + ITEM_SYNC_CHUNK_SIZE]
+		varieties = frappe.get_all(
+			"Seed Variety",
+			filters={"name": ["in", chunk]},
+			fields=["name", "variety_code", *ITEM_SYNC_FIELDS]
+		)
+		linked_items = [variety.linked_item for variety in varieties if variety.linked_item]
+		items = {
+			item.name: item
+			for item in frappe.get_all(
+				"Item",
+				filters={"name": ["in", linked_items]},
+				fields=["name", "item_name", "description", "item_group"]
+			)
+		} if linked_items else {}
+
+		item_updates, hash_updates, renames = {}, {}, []
+		for variety in varieties:
+			doc = frappe.get_doc({"doctype": "Seed Variety", **variety})
+
+			identifier = get_variety_identifier(doc.seed_crop, doc.seed_segment, doc.seed_subsegment, doc.variety_code)
+			rename = None
+			if identifier != doc.name:
+				rename = frappe._dict(old_name=doc.name, new_name=identifier)
+				renames.append(rename)
+
+			if doc.linked_item not in items:
+				continue
+
+			crop_name = cache.get_hierarchy_node("Seed Crop", doc.seed_crop).get("name") or default_item_group
+			values = {"item_name": doc.variety_name, "description": doc.get_item_description()}
+			sync_hash = get_item_sync_hash(doc.linked_item, crop_name, values)
+			if rename and doc.linked_item == doc.name:
+				# Items created for the variety are coded by its identifier and follow the rename
+				rename.update(item_code=doc.linked_item, item_sync_hash=get_item_sync_hash(identifier, crop_name, values))
+			if sync_hash == doc.item_sync_hash:
+				continue
+
+			if crop_name not in item_groups:
+				item_groups[crop_name] = doc.get_item_group(crop_name, default_item_group)
+			values["item_group"] = item_groups[crop_name]
+
+			current = items[doc.linked_item]
+			changed = {field: value for field, value in values.items() if current.get(field) != value}
+			if changed:
+				item_updates[doc.linked_item] = changed
+			hash_updates[doc.name] = {"item_sync_hash": sync_hash}
+
+		if item_updates:
+			frappe.db.bulk_update("Item", item_updates)
+		if hash_updates:
+			frappe.db.bulk_update("Seed Variety", hash_updates, update_modified=False)
+
+		# Renaming updates every link to the variety and its Item, so it cannot be batched
+		for rename in renames:
+			try:
+				frappe.db.savepoint("seed_variety_rename")
+				frappe.rename_doc("Seed Variety", rename.old_name, rename.new_name, force=True, show_alert=False)
+				if rename.item_code and not frappe.db.exists("Item", rename.new_name):
+					frappe.rename_doc("Item", rename.item_code, rename.new_name, force=True, show_alert=False)
+					frappe.db.set_value(
+						"Seed Variety", rename.new_name, "item_sync_hash", rename.item_sync_hash, update_modified=False
+					)
+				chunk[chunk.index(rename.old_name)] = rename.new_name
+				renamed += 1
+			except Exception as e:
+				frappe.db.rollback(save_point="seed_variety_rename")
+				failed.append({"name": rename.old_name, "error": str(e)})
+
+		rebuild_search_index(chunk)
+		frappe.db.commit()
+
+		done = start + len(chunk)
+		frappe.publish_progress(
+			done * 100 / len(names),
+			title=_("Refreshing Varieties of {0} {1}").format(_(doctype), name),
+			description=_("Refreshed {0} of {1} varieties").format(done, len(names))
+		)
+
+	for variety in failed:
+		frappe.log_error(
+			_("Seed Variety {0} could not be renamed").format(variety["name"]),
+			variety["error"],
+			reference_doctype="Seed Variety",
+			reference_name=variety["name"]
+		)
+
+	return {"varieties": len(names), "renamed": renamed, "failed": failed}
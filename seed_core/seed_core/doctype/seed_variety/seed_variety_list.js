@@ -1,19 +1,58 @@
 frappe.listview_settings["Seed Variety"] = {
     hide_name_column: true,
     onload: function (listview) {
-        // Add "Refresh Names" button
+        // Add "Refresh Names" button: preview the changes, then update in the background
         listview.page.add_inner_button(__("Refresh Names"), function () {
-            frappe.confirm(__("This will update all variety names based on their default commercial name. Continue?"), function () {
-                frappe.call({
-                    method: "seed_core.seed_core.doctype.seed_variety.seed_variety.update_condensed_names",
-                    freeze: true,
-                    callback: function (r) {
-                        if (!r.exc) {
-                            frappe.msgprint(__("Variety names updated."));
-                            listview.refresh();
-                        }
+            frappe.call({
+                method: "seed_core.seed_core.doctype.seed_variety.seed_variety.update_condensed_names",
+                args: { dry_run: 1 },
+                freeze: true,
+                callback: function (r) {
+                    if (r.exc) {
+                        return;
                     }
-                });
+
+                    const preview = r.message;
+                    const conflicts = preview.conflicts.length
+                        ? `<p class="text-warning">${__("Skipped, more than one default Commercial Name:")}
+                            ${preview.conflicts.map(row => frappe.utils.escape_html(row.name)).join(", ")}</p>`
+                        : "";
+                    if (!preview.total) {
+                        frappe.msgprint(__("All variety names match their default commercial name.") + conflicts);
+                        return;
+                    }
+
+                    const rows = preview.changes.map(row => `<tr>
+                        <td>${frappe.utils.escape_html(row.name)}</td>
+                        <td>${frappe.utils.escape_html(row.old_name || "")}</td>
+                        <td>${frappe.utils.escape_html(row.new_name || "")}</td>
+                        <td>${frappe.utils.escape_html(row.new_default || "")}</td>
+                    </tr>`).join("");
+
+                    const dialog = new frappe.ui.Dialog({
+                        title: __("Refresh Names"),
+                        size: "large",
+                        fields: [{
+                            fieldtype: "HTML",
+                            fieldname: "preview",
+                            options: `<p>${__("{0} varieties will be updated.", [preview.total])}
+                                ${preview.total > preview.changes.length ? __("Showing the first {0}.", [preview.changes.length]) : ""}</p>
+                                <table class="table table-bordered table-condensed">
+                                    <thead><tr><th>${__("Variety")}</th><th>${__("Current Name")}</th><th>${__("New Name")}</th><th>${__("Default Commercial Name")}</th></tr></thead>
+                                    <tbody>${rows}</tbody>
+                                </table>${conflicts}`
+                        }],
+                        primary_action_label: __("Update Names"),
+                        primary_action: function () {
+                            dialog.hide();
+                            frappe.call({
+                                method: "seed_core.seed_core.doctype.seed_variety.seed_variety.update_condensed_names",
+                                args: { dry_run: 0 }
+                            });
+                        }
+                    });
+                    dialog.show();
+                }
             });
         });
 
@@ -29,14 +68,31 @@ frappe.listview_settings["Seed Variety"] = {
             frappe.call({
                 method: "seed_core.seed_core.doctype.seed_variety.seed_variety.sync_selected_to_items",
                 args: { names: names },
-                freeze: true,
                 callback: function (r) {
                     if (!r.exc) {
                         listview.clear_checked_items();
-                        listview.refresh();
                     }
                 }
             });
         });
+
+        // Summary of a background sync; drop the handler of a previous list
+        // load first so the summary is shown once
+        frappe.realtime.off("seed_variety_item_sync");
+        frappe.realtime.on("seed_variety_item_sync", function (summary) {
+            let message = __("Synced {0} varieties to Items.", [summary.succeeded]);
+            if (summary.failed.length) {
+                message += "<br><br>" + __("Failed:") + "<ul>" + summary.failed.map(
+                    row => `<li><b>${frappe.utils.escape_html(row.name)}</b>: ${frappe.utils.escape_html(row.error)}</li>`
+                ).join("") + "</ul>";
+            }
+
+            frappe.msgprint({
+                title: __("Sync to Items"),
+                message: message,
+                indicator: summary.failed.length ? "orange" : "green"
+            });
+            listview.refresh();
+        });
     }
 };
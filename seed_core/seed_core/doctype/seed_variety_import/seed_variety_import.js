@@ -0,0 +1,13 @@
+frappe.ui.form.on("Seed Variety Import", {
+    refresh: function (frm) {
+        if (["Queued", "In Progress"].includes(frm.doc.status)) {
+            frm.dashboard.set_headline(__("Import is running in the background. Progress is shown here as rows are imported."));
+        }
+
+        if (frm.doc.status === "Completed") {
+            frm.add_custom_button(__("View Varieties"), function () {
+                frappe.set_route("List", "Seed Variety", { creation: [">=", frm.doc.started_at] });
+            });
+        }
+    }
+});
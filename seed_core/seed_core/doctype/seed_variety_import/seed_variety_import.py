@@ -0,0 +1,353 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Bulk import of Seed Varieties. The file is read row by row, so memory does
+not grow with its size. Crop, segment and subsegment are resolved from the
+hierarchy cache, and every chunk of valid rows is written with one
+multi-row insert each for varieties, commercial names and search tokens,
+then committed. Linked Items are created afterwards by the chunked Item
+sync. Rows that fail are written to an error file attached to the import.
+"""
+
+import csv
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import cstr, now, now_datetime
+
+from seed_core.seed_core import cache
+from seed_core.seed_core.doctype.seed_variety.seed_variety import (
+	get_variety_identifier,
+	sync_varieties_to_items,
+)
+from seed_core.seed_core.doctype.seed_variety_search_token.seed_variety_search_token import (
+	get_search_tokens,
+	get_variety_texts,
+	write_tokens,
+)
+
+IMPORT_CHUNK_SIZE = 1000
+# Seed Variety fields copied from the columns of the same name
+VARIETY_FIELDS = (
+	"variety_code",
+	"variety_name",
+	"lifecycle_stage",
+	"vigor",
+	"resistances",
+	"plant_habit",
+	"cultivation_environment",
+	"plant_characteristics",
+	"fruit_characteristics",
+)
+# Hierarchy columns of the file and their Seed Variety field and doctype
+HIERARCHY_COLUMNS = (
+	("crop", "seed_crop", "Seed Crop"),
+	("segment", "seed_segment", "Seed Segment"),
+	("subsegment", "seed_subsegment", "Seed SubSegment"),
+)
+COMMERCIAL_NAME_SEPARATOR = ";"
+
+
+class SeedVarietyImport(Document):
+	def validate(self):
+		if not self.import_file.lower().endswith((".csv", ".xlsx")):
+			frappe.throw(_("Import File must be a CSV or XLSX file"))
+
+	def after_insert(self):
+		"""Queue the import as soon as it is created."""
+		frappe.enqueue(
+			"seed_core.seed_core.doctype.seed_variety_import.seed_variety_import.run_seed_variety_import",
+			queue="long",
+			timeout=6 * 3600,
+			job_id=f"seed_variety_import::{self.name}",
+			deduplicate=True,
+			enqueue_after_commit=True,
+			import_name=self.name,
+		)
+
+	def run(self):
+		"""Import the file chunk by chunk, then create the linked Items."""
+		self.db_set(
+			{
+				"status": "In Progress",
+				"started_at": now_datetime(),
+				"rows_read": 0,
+				"rows_failed": 0,
+				"varieties_imported": 0,
+			}
+		)
+		frappe.db.commit()
+
+		lookups = get_hierarchy_lookups()
+		options = get_select_options()
+		existing = set(frappe.get_all("Seed Variety", pluck="name"))
+		row_numbers = {}
+		errors = []
+		chunk = []
+
+		rows = iter_file_rows(frappe.get_doc("File", {"file_url": self.import_file}).get_full_path())
+		headers = [cstr(header).strip().lower().replace(" ", "_") for header in next(rows, [])]
+		rows_read = 0
+
+		for row_no, values in enumerate(rows, start=2):
+			rows_read += 1
+			row = dict(zip(headers, values, strict=False))
+			try:
+				variety = parse_row(row, lookups, options)
+				if variety.name in existing:
+					raise frappe.ValidationError(_("Seed Variety {0} already exists").format(variety.name))
+			except frappe.ValidationError as e:
+				errors.append((row_no, cstr(e), values))
+				continue
+
+			existing.add(variety.name)
+			row_numbers[variety.name] = row_no
+			chunk.append(variety)
+
+			if len(chunk) >= IMPORT_CHUNK_SIZE:
+				self.insert_chunk(chunk, rows_read, len(errors))
+				chunk = []
+
+		self.insert_chunk(chunk, rows_read, len(errors))
+
+		# Items are created with their regular validation once all varieties are in
+		summary = sync_varieties_to_items(list(row_numbers))
+		for failure in summary["failed"]:
+			errors.append(
+				(row_numbers.get(failure["name"]), _("Item not created: {0}").format(failure["error"]), [])
+			)
+
+		self.db_set(
+			{
+				"status": "Completed",
+				"varieties_imported": len(row_numbers),
+				"rows_failed": len(errors),
+				"error_file": self.write_error_file(headers, errors) if errors else None,
+				"finished_at": now_datetime(),
+			},
+			notify=True,
+		)
+		frappe.db.commit()
+
+	def insert_chunk(self, chunk, rows_read, rows_failed):
+		insert_varieties(chunk)
+		self.db_set(
+			{
+				"rows_read": rows_read,
+				"rows_failed": rows_failed,
+				"varieties_imported": (self.varieties_imported or 0) + len(chunk),
+			},
+			notify=True,
+		)
+		frappe.db.commit()
+
+	def write_error_file(self, headers, errors):
+		"""Write the failed rows to a private CSV attached to the import and return its URL."""
+		file_name = f"{self.name}_errors.csv"
+		path = frappe.get_site_path("private", "files", file_name)
+
+		with open(path, "w", newline="", encoding="utf-8") as f:
+			writer = csv.writer(f)
+			writer.writerow([_("Row"), _("Error"), *headers])
+			writer.writerows(
+				[row_no, error, *values]
+				for row_no, error, values in sorted(errors, key=lambda error: error[0] or 0)
+			)
+
+		return (
+			frappe.get_doc(
+				{
+					"doctype": "File",
+					"file_name": file_name,
+					"file_url": f"/private/files/{file_name}",
+					"is_private": 1,
+					"attached_to_doctype": self.doctype,
+					"attached_to_name": self.name,
+					"attached_to_field": "error_file",
+				}
+			)
+			.insert(ignore_permissions=True)
+			.file_url
+		)
+
+
+def iter_file_rows(path):
+	"""Yield the rows of a CSV or XLSX file as lists, header first, without loading the whole file."""
+	if path.lower().endswith(".xlsx"):
+		from openpyxl import load_workbook
+
+		workbook = load_workbook(path, read_only=True, data_only=True)
+		try:
+			for row in workbook.active.iter_rows(values_only=True):
+				if any(value not in (None, "") for value in row):
+					yield list(row)
+		finally:
+			workbook.close()
+	else:
+		with open(path, newline="", encoding="utf-8-sig") as f:
+			for row in csv.reader(f):
+				if any(row):
+					yield row
+
+
+def get_hierarchy_lookups():
+	"""
+	Return {doctype: {(parent, lower-case code or name): {names}}} from the
+	hierarchy cache. Segments and subsegments are keyed by their parent, so the
+	same name under two crops does not collide; crops have no parent.
+	"""
+	lookups = {}
+	for doctype, nodes in cache.get_hierarchy().items():
+		lookup = lookups[doctype] = {}
+		for name, node in nodes.items():
+			for key in {node["name"], node["code"], name}:
+				if key:
+					lookup.setdefault((node.get("parent"), cstr(key).strip().lower()), set()).add(name)
+
+	return lookups
+
+
+def resolve_hierarchy(lookups, doctype, value, parent=None):
+	"""Return the record of a code or name below `parent`, or raise if it is unknown, elsewhere or ambiguous."""
+	names = lookups[doctype].get((parent, value.lower()), set())
+	if len(names) > 1:
+		raise frappe.ValidationError(
+			_("{0} {1} is ambiguous, use its code: {2}").format(_(doctype), value, ", ".join(sorted(names)))
+		)
+
+	if not names:
+		if any(key == value.lower() for _parent, key in lookups[doctype]):
+			raise frappe.ValidationError(
+				_("{0} {1} does not belong to {2}").format(_(doctype), value, parent)
+			)
+		raise frappe.ValidationError(_("{0} {1} not found").format(_(doctype), value))
+
+	return next(iter(names))
+
+
+def get_select_options():
+	meta = frappe.get_meta("Seed Variety")
+	return {
+		fieldname: set((meta.get_field(fieldname).options or "").split("\n"))
+		for fieldname in ("lifecycle_stage", "vigor")
+	}
+
+
+def parse_row(row, lookups, options):
+	"""Return the variety of a file row, or raise ValidationError with the reason it cannot be imported."""
+	variety = frappe._dict({field: cstr(row.get(field)).strip() for field in VARIETY_FIELDS})
+	variety.lifecycle_stage = variety.lifecycle_stage or "R&D"
+
+	for field in ("variety_code", "variety_name"):
+		if not variety[field]:
+			raise frappe.ValidationError(_("Column {0} is required").format(field))
+
+	# Each level is resolved below the level resolved before it
+	parent = None
+	for column, field, doctype in HIERARCHY_COLUMNS:
+		value = cstr(row.get(column)).strip()
+		if not value and column != "subsegment":
+			raise frappe.ValidationError(_("Column {0} is required").format(column))
+
+		variety[field] = resolve_hierarchy(lookups, doctype, value, parent) if value else None
+		parent = variety[field]
+
+	for field, allowed in options.items():
+		if variety[field] not in allowed:
+			raise frappe.ValidationError(_("Invalid {0}: {1}").format(field, variety[field]))
+
+	variety.commercial_names = [
+		name.strip()
+		for name in cstr(row.get("commercial_names")).split(COMMERCIAL_NAME_SEPARATOR)
+		if name.strip()
+	]
+	# Same as Seed Variety.set_default_commercial_name: the first name is the default
+	variety.default_commercial_name = variety.commercial_names[0] if variety.commercial_names else None
+	variety.variety_name = variety.default_commercial_name or variety.variety_name
+	variety.name = variety.variety_identifier = get_variety_identifier(
+		variety.seed_crop, variety.seed_segment, variety.seed_subsegment, variety.variety_code
+	)
+
+	return variety
+
+
+def insert_varieties(varieties):
+	"""Insert varieties, their commercial names and search tokens with one multi-row insert each."""
+	if not varieties:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = [
+		"variety_identifier",
+		"seed_crop",
+		"seed_segment",
+		"seed_subsegment",
+		"default_commercial_name",
+		*VARIETY_FIELDS,
+	]
+
+	frappe.db.bulk_insert(
+		"Seed Variety",
+		fields=["name", "creation", "modified", "owner", "modified_by", *fields],
+		values=[
+			(variety.name, timestamp, timestamp, user, user, *(variety[field] for field in fields))
+			for variety in varieties
+		],
+	)
+
+	frappe.db.bulk_insert(
+		"Variety Commercial Name",
+		fields=[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"parent",
+			"parenttype",
+			"parentfield",
+			"idx",
+			"commercial_name",
+			"is_default",
+		],
+		values=[
+			(
+				frappe.generate_hash(length=10),
+				timestamp,
+				timestamp,
+				user,
+				user,
+				variety.name,
+				"Seed Variety",
+				"commercial_names",
+				idx,
+				commercial_name,
+				1 if idx == 1 else 0,
+			)
+			for variety in varieties
+			for idx, commercial_name in enumerate(variety.commercial_names, start=1)
+		],
+	)
+
+	write_tokens(
+		{
+			variety.name: get_search_tokens(get_variety_texts(variety, variety.commercial_names))
+			for variety in varieties
+		}
+	)
+
+
+def run_seed_variety_import(import_name):
+	"""Background job entry point."""
+	doc = frappe.get_doc("Seed Variety Import", import_name)
+
+	try:
+		doc.run()
+	except Exception:
+		frappe.db.rollback()
+		doc.db_set({"status": "Failed", "error": frappe.get_traceback(), "finished_at": now_datetime()})
+		frappe.db.commit()
+		doc.log_error(_("Seed Variety Import failed"))
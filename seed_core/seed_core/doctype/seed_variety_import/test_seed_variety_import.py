@@ -0,0 +1,72 @@
+# Copyright (c) 2026, aremtech and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from seed_core.seed_core.doctype.seed_variety_import.seed_variety_import import (
+	get_hierarchy_lookups,
+	parse_row,
+)
+
+HIERARCHY = {
+	"Seed Crop": {
+		"01": {"code": "01", "name": "Tomato", "parent": None},
+		"02": {"code": "02", "name": "Pepper", "parent": None},
+	},
+	"Seed Segment": {
+		"003": {"code": "003", "name": "Cherry", "parent": "01"},
+		"004": {"code": "004", "name": "Cherry", "parent": "02"},
+		"005": {"code": "005", "name": "Blocky", "parent": "02"},
+	},
+	"Seed SubSegment": {
+		"003-02": {"code": "003-02", "name": "Red", "parent": "003"},
+		"003-03": {"code": "003-03", "name": "Red", "parent": "003"},
+	},
+}
+OPTIONS = {"lifecycle_stage": {"R&D", "Trial"}, "vigor": {"", "High"}}
+
+
+class UnitTestSeedVarietyImport(UnitTestCase):
+	"""
+	Unit tests for parsing import rows against the hierarchy.
+	"""
+
+	def setUp(self):
+		patcher = patch("seed_core.seed_core.cache.get_hierarchy", return_value=HIERARCHY)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.lookups = get_hierarchy_lookups()
+
+	def parse(self, **row):
+		return parse_row({"variety_code": "117", "variety_name": "RD 117", **row}, self.lookups, OPTIONS)
+
+	def test_segment_name_is_resolved_below_its_crop(self):
+		self.assertEqual(self.parse(crop="Tomato", segment="Cherry").seed_segment, "003")
+		self.assertEqual(self.parse(crop="Pepper", segment="cherry").seed_segment, "004")
+
+	def test_identifier_and_default_commercial_name(self):
+		variety = self.parse(crop="01", segment="003", subsegment="003-02", commercial_names="Big Red; Red 2")
+		self.assertEqual(variety.name, "01-003-02-117")
+		self.assertEqual(variety.variety_name, "Big Red")
+		self.assertEqual(variety.commercial_names, ["Big Red", "Red 2"])
+
+	def test_parent_mismatch_is_rejected(self):
+		with self.assertRaises(frappe.ValidationError):
+			self.parse(crop="Tomato", segment="005")
+
+		with self.assertRaises(frappe.ValidationError):
+			self.parse(crop="Pepper", segment="Blocky", subsegment="003-02")
+
+	def test_ambiguous_name_is_rejected(self):
+		with self.assertRaises(frappe.ValidationError):
+			self.parse(crop="Tomato", segment="Cherry", subsegment="Red")
+
+	def test_unknown_values_are_rejected(self):
+		with self.assertRaises(frappe.ValidationError):
+			self.parse(crop="Melon", segment="Cherry")
+
+		with self.assertRaises(frappe.ValidationError):
+			self.parse(crop="Tomato", segment="Cherry", lifecycle_stage="Retired")
@@ -0,0 +1,229 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Search index of Seed Varieties. The variety name, commercial names,
+identifier and code are normalized (lower case, accents and punctuation
+removed) and stored as tokens:
+
+- "p:<prefix>" for every prefix of two or more characters of each word and
+  of the whole text, so "01-003" finds "01-003-02-117" and "red" finds
+  "Big Red";
+- "t:<trigram>" for every three characters of the whole text, for matches
+  inside a word.
+
+Each query is answered from the (token, seed_variety) index.
+"""
+
+import re
+import unicodedata
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint
+
+# Longer prefixes are not indexed; longer queries are matched on their first characters and trigrams
+MAX_PREFIX_LENGTH = 20
+# A one-character prefix is shared by a large part of the varieties, so matching
+# it groups most of the index; shorter words are only found within longer texts
+MIN_PREFIX_LENGTH = 2
+# Varieties read from the index per query, filters are applied on each chunk
+CANDIDATE_LIMIT = 500
+INDEX_CHUNK_SIZE = 1000
+
+
+class SeedVarietySearchToken(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Seed Variety Search Token", ["token", "seed_variety"])
+	frappe.db.add_index("Seed Variety Search Token", ["seed_variety"])
+
+
+def normalize(text):
+	"""Return the lower-case alphanumeric words of a text, without accents."""
+	text = unicodedata.normalize("NFKD", text or "")
+	text = "".join(char for char in text if not unicodedata.combining(char))
+	return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def get_trigrams(text):
+	return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def get_search_tokens(texts):
+	"""Return the set of prefix and trigram tokens of the given texts."""
+	tokens = set()
+	for text in texts:
+		words = normalize(text)
+		compact = "".join(words)
+
+		for word in {*words, compact}:
+			tokens.update(
+				"p:" + word[:length]
+				for length in range(MIN_PREFIX_LENGTH, min(len(word), MAX_PREFIX_LENGTH) + 1)
+			)
+
+		tokens.update("t:" + trigram for trigram in get_trigrams(compact))
+
+	return tokens
+
+
+def get_variety_texts(variety, commercial_names):
+	return [variety.variety_name, variety.variety_identifier, variety.variety_code, *commercial_names]
+
+
+def update_search_index(doc, method=None):
+	"""Seed Variety on_update hook: replace the tokens of the variety when its searchable texts changed."""
+	texts = get_variety_texts(doc, [row.commercial_name for row in doc.commercial_names])
+
+	before = doc.get_doc_before_save()
+	if (
+		before
+		and get_variety_texts(before, [row.commercial_name for row in before.commercial_names]) == texts
+	):
+		return
+
+	write_tokens({doc.name: get_search_tokens(texts)})
+
+
+def delete_search_index(doc, method=None):
+	"""Seed Variety on_trash hook."""
+	frappe.db.delete("Seed Variety Search Token", {"seed_variety": doc.name})
+
+
+def write_tokens(variety_tokens):
+	"""Replace the tokens of the given varieties: {seed_variety: tokens}."""
+	frappe.db.delete("Seed Variety Search Token", {"seed_variety": ["in", list(variety_tokens)]})
+	frappe.db.bulk_insert(
+		"Seed Variety Search Token",
+		fields=["seed_variety", "token"],
+		values=[(seed_variety, token) for seed_variety, tokens in variety_tokens.items() for token in tokens],
+	)
+
+
+def rebuild_search_index(varieties=None):
+	"""Rebuild the tokens of the given varieties, or of all varieties, in chunks."""
+	if varieties is None:
+		frappe.db.delete("Seed Variety Search Token")
+		varieties = frappe.get_all("Seed Variety", pluck="name", order_by="name")
+
+	for start in range(0, len(varieties), INDEX_CHUNK_SIZE):
+		chunk = varieties[start : start + INDEX_CHUNK_SIZE]
+		commercial_names = {}
+		for row in frappe.get_all(
+			"Variety Commercial Name",
+			filters={"parenttype": "Seed Variety", "parent": ["in", chunk]},
+			fields=["parent", "commercial_name"],
+		):
+			commercial_names.setdefault(row.parent, []).append(row.commercial_name)
+
+		write_tokens(
+			{
+				variety.name: get_search_tokens(
+					get_variety_texts(variety, commercial_names.get(variety.name, []))
+				)
+				for variety in frappe.get_all(
+					"Seed Variety",
+					filters={"name": ["in", chunk]},
+					fields=["name", "variety_name", "variety_identifier", "variety_code"],
+				)
+			}
+		)
+
+
+def match_tokens(tokens, start=0):
+	"""Return up to CANDIDATE_LIMIT varieties that have all of the given tokens, from `start`, by name."""
+	if not tokens:
+		return []
+
+	return frappe.db.sql_list(
+		"""
+		SELECT seed_variety
+		FROM `tabSeed Variety Search Token`
+		WHERE token IN %(tokens)s
+		GROUP BY seed_variety
+		HAVING COUNT(*) = %(count)s
+		ORDER BY seed_variety
+		LIMIT %(start)s, %(limit)s
+	""",
+		{"tokens": tuple(tokens), "count": len(tokens), "start": start, "limit": CANDIDATE_LIMIT},
+	)
+
+
+def iter_variety_names(txt):
+	"""
+	Yield the names of varieties matching a search text in chunks, best matches first:
+	start of a whole text, then start of every word, then anywhere (trigrams).
+	One-character words are left to the whole-text prefix and the trigrams.
+	"""
+	words = normalize(txt)
+	compact = "".join(words)
+	if len(compact) < MIN_PREFIX_LENGTH:
+		return
+
+	seen = set()
+	for tokens in (
+		{"p:" + compact[:MAX_PREFIX_LENGTH]},
+		{"p:" + word[:MAX_PREFIX_LENGTH] for word in words if len(word) >= MIN_PREFIX_LENGTH},
+		{"t:" + trigram for trigram in get_trigrams(compact)},
+	):
+		start = 0
+		while True:
+			names = match_tokens(tokens, start)
+			chunk = [name for name in names if name not in seen]
+			seen.update(chunk)
+			if chunk:
+				yield chunk
+			if len(names) < CANDIDATE_LIMIT:
+				break
+			start += CANDIDATE_LIMIT
+
+
+def search_varieties(txt, filters=None, start=0, page_len=20):
+	"""Return matching varieties as dicts (name, variety_name, variety_identifier), best matches first."""
+	fields = ["name", "variety_name", "variety_identifier"]
+	start, page_len = cint(start), cint(page_len)
+	if len("".join(normalize(txt))) < MIN_PREFIX_LENGTH:
+		return frappe.get_list(
+			"Seed Variety",
+			filters=filters,
+			fields=fields,
+			order_by="modified desc",
+			limit_start=start,
+			limit_page_length=page_len,
+		)
+
+	# Filters are applied per chunk of matches, reading further chunks until the page is full
+	varieties = []
+	for names in iter_variety_names(txt):
+		if isinstance(filters, dict):
+			chunk_filters = {**filters, "name": ["in", names]}
+		else:
+			chunk_filters = [*(filters or []), ["name", "in", names]]
+
+		rank = {name: i for i, name in enumerate(names)}
+		chunk = frappe.get_list("Seed Variety", filters=chunk_filters, fields=fields, limit_page_length=0)
+		varieties.extend(sorted(chunk, key=lambda variety: rank[variety.name]))
+
+		if len(varieties) >= start + page_len:
+			break
+
+	return varieties[start : start + page_len]
+
+
+@frappe.whitelist()
+def search(txt, filters=None, start=0, page_len=20):
+	"""Autocomplete endpoint for varieties by commercial name, identifier or code."""
+	return search_varieties(txt, frappe.parse_json(filters) if filters else None, start, page_len)
+
+
+@frappe.whitelist()
+@frappe.validate_and_sanitize_search_inputs
+def variety_query(doctype, txt, searchfield, start, page_len, filters):
+	"""Link field query of Seed Variety (standard_queries hook)."""
+	return [
+		(variety.name, variety.variety_name, variety.variety_identifier)
+		for variety in search_varieties(txt, filters, start, page_len)
+	]
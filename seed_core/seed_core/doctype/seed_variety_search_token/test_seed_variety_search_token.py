@@ -0,0 +1,93 @@
+# Copyright (c) 2026, aremtech and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from seed_core.seed_core.doctype.seed_variety_search_token import seed_variety_search_token as search_token
+from seed_core.seed_core.doctype.seed_variety_search_token.seed_variety_search_token import (
+	get_search_tokens,
+	normalize,
+	search_varieties,
+)
+
+MODULE = "seed_core.seed_core.doctype.seed_variety_search_token.seed_variety_search_token"
+VARIETIES = {
+	"SV-1": {"variety_name": "Big Red", "lifecycle_stage": "Trial"},
+	"SV-2": {"variety_name": "Redwood", "lifecycle_stage": "R&D"},
+	"SV-3": {"variety_name": "Sunred", "lifecycle_stage": "Trial"},
+}
+
+
+def get_list(doctype, filters=None, fields=None, limit_page_length=None):
+	"""Apply the dict filters of search_varieties to VARIETIES."""
+	filters = dict(filters)
+	names = filters.pop("name")[1]
+	return [
+		frappe._dict(name=name, variety_name=VARIETIES[name]["variety_name"], variety_identifier=None)
+		for name in names
+		if all(VARIETIES[name][field] == value for field, value in filters.items())
+	]
+
+
+def match_tokens(tokens, start=0):
+	"""Match tokens against an index of VARIETIES built with get_search_tokens."""
+	index = {name: get_search_tokens([variety["variety_name"]]) for name, variety in VARIETIES.items()}
+	names = sorted(name for name, variety_tokens in index.items() if tokens <= variety_tokens)
+	return names[start : start + search_token.CANDIDATE_LIMIT]
+
+
+class UnitTestSeedVarietySearchToken(UnitTestCase):
+	"""
+	Unit tests for the variety search index.
+	"""
+
+	def setUp(self):
+		for target, new in (("match_tokens", match_tokens), ("frappe.get_list", get_list)):
+			patcher = patch(f"{MODULE}.{target}", side_effect=new)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def test_normalize(self):
+		self.assertEqual(normalize("Émeraude F1 / 01-003"), ["emeraude", "f1", "01", "003"])
+		self.assertEqual(normalize(None), [])
+
+	def test_search_tokens(self):
+		tokens = get_search_tokens(["Big Red"])
+		self.assertTrue({"p:bi", "p:big", "p:re", "p:red", "p:bigr", "p:bigred"} <= tokens)
+		self.assertTrue({"t:big", "t:igr", "t:gre", "t:red"} <= tokens)
+		self.assertNotIn("p:ig", tokens)
+		self.assertFalse({"p:b", "p:r"} & tokens)
+
+	def test_long_prefixes_are_truncated(self):
+		tokens = get_search_tokens(["a" * 30])
+		self.assertIn("p:" + "a" * search_token.MAX_PREFIX_LENGTH, tokens)
+		self.assertNotIn("p:" + "a" * (search_token.MAX_PREFIX_LENGTH + 1), tokens)
+
+	def test_ranking(self):
+		# Start of a word before inside a word
+		names = [variety.name for variety in search_varieties("red", {})]
+		self.assertEqual(names, ["SV-1", "SV-2", "SV-3"])
+
+		names = [variety.name for variety in search_varieties("sun red", {})]
+		self.assertEqual(names, ["SV-3"])
+
+	def test_one_character_words_are_not_matched(self):
+		names = [variety.name for variety in search_varieties("big r", {})]
+		self.assertEqual(names, ["SV-1"])
+		for call in search_token.match_tokens.call_args_list:
+			self.assertTrue(all(len(token) > 3 for token in call.args[0]))
+
+	def test_filters_and_paging(self):
+		names = [variety.name for variety in search_varieties("red", {"lifecycle_stage": "Trial"})]
+		self.assertEqual(names, ["SV-1", "SV-3"])
+
+		names = [variety.name for variety in search_varieties("red", {}, start=1, page_len=1)]
+		self.assertEqual(names, ["SV-2"])
+
+	def test_filters_read_further_chunks(self):
+		with patch.object(search_token, "CANDIDATE_LIMIT", 1):
+			names = [variety.name for variety in search_varieties("red", {"lifecycle_stage": "Trial"})]
+		self.assertEqual(names, ["SV-1", "SV-3"])
@@ -0,0 +1,17 @@
+frappe.ui.form.on("Stock Mixing Audit", {
+    refresh: function (frm) {
+        if (!frm.is_new()) {
+            frm.add_custom_button(__("View Conflicts"), function () {
+                frappe.set_route("query-report", "Stock Mixing Conflicts", {
+                    company: frm.doc.company,
+                    warehouse: frm.doc.warehouse,
+                    status: "Open"
+                });
+            });
+        }
+
+        if (["Queued", "In Progress"].includes(frm.doc.status)) {
+            frm.dashboard.set_headline(__("Audit is running in the background. Progress is shown here as bins are scanned."));
+        }
+    }
+});
@@ -0,0 +1,310 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_to_date, now_datetime
+
+from seed_core.seed_core import cache
+from seed_core.seed_core.batch_compatibility import get_compiled_rules
+from seed_core.seed_core.stock_mixing_validation import (
+	check_attribute_conflicts,
+	get_existing_batches_in_bins,
+)
+
+BIN_CHUNK_SIZE = 500
+# Temporary table holding the bins of the running audit
+AUDIT_BINS_TABLE = "tmp_stock_mixing_audit_bins"
+# Incremental audits start this much before the last watermark, so ledger entries
+# and batch edits created earlier but committed after the last audit started are scanned
+AUDIT_SETTLE_MINUTES = 30
+
+
+class StockMixingAudit(Document):
+	def after_insert(self):
+		"""Queue the audit as soon as it is created."""
+		frappe.enqueue(
+			"seed_core.seed_core.doctype.stock_mixing_audit.stock_mixing_audit.run_stock_mixing_audit",
+			queue="long",
+			timeout=6 * 3600,
+			job_id=f"stock_mixing_audit::{self.name}",
+			deduplicate=True,
+			enqueue_after_commit=True,
+			audit=self.name,
+		)
+
+	def get_from_watermark(self):
+		"""
+		Return where an incremental audit starts: the settle window before the
+		watermark of the last completed audit with the same scope. None (full
+		scan) without one, or when the mixing rules changed since.
+		"""
+		last_audit = frappe.db.get_value(
+			"Stock Mixing Audit",
+			{
+				"company": self.company,
+				"warehouse": self.warehouse or ("is", "not set"),
+				"status": "Completed",
+				"name": ("!=", self.name),
+			},
+			["watermark", "rules_hash"],
+			as_dict=True,
+			order_by="watermark desc",
+		)
+
+		if last_audit and last_audit.watermark and last_audit.rules_hash == self.rules_hash:
+			return add_to_date(last_audit.watermark, minutes=-AUDIT_SETTLE_MINUTES)
+
+	def run(self):
+		"""Scan the bins in scope chunk by chunk and log every conflicting batch pair."""
+		settings = cache.get_settings()
+		self.rules_hash = get_rules_hash(settings)
+		self.from_watermark = None if self.full_scan else self.get_from_watermark()
+		self.watermark = now_datetime()
+		self.db_set(
+			{
+				"status": "In Progress",
+				"started_at": self.watermark,
+				"from_watermark": self.from_watermark,
+				"watermark": self.watermark,
+				"rules_hash": self.rules_hash,
+				"bins_scanned": 0,
+				"conflicts_found": 0,
+			}
+		)
+
+		if not self.from_watermark:
+			# Every bin is revisited, so earlier findings are superseded
+			self.resolve_logs()
+
+		# Creating the temporary table must not commit the writes above implicitly
+		frappe.db.commit()
+
+		rules = get_compiled_rules(settings)
+		total = self.materialize_bins()
+		bins_scanned = conflicts_found = 0
+
+		for bins in self.iter_bin_chunks():
+			if self.from_watermark:
+				self.resolve_logs(bins)
+
+			conflicts_found += self.audit_bins(bins, rules)
+			bins_scanned += len(bins)
+
+			self.db_set({"bins_scanned": bins_scanned, "conflicts_found": conflicts_found})
+			frappe.db.commit()
+			frappe.publish_progress(
+				bins_scanned * 100 / (total or 1),
+				title=_("Stock Mixing Audit"),
+				doctype=self.doctype,
+				docname=self.name,
+				description=_("Scanned {0} of {1} bins").format(bins_scanned, total),
+			)
+
+		frappe.db.sql(f"DROP TEMPORARY TABLE IF EXISTS `{AUDIT_BINS_TABLE}`")
+		self.db_set({"status": "Completed", "finished_at": now_datetime()})
+		frappe.db.commit()
+
+	def get_scope_conditions(self, alias):
+		conditions = f"{alias}.company = %(company)s"
+		if self.warehouse:
+			conditions += f" AND {alias}.warehouse = %(warehouse)s"
+
+		return conditions
+
+	def get_bins_query(self):
+		"""
+		Return a query of the (item_code, warehouse) bins to audit: every stocked
+		bin for a full scan, otherwise the bins with ledger activity or with an
+		edited batch (attribute flags) since the watermark.
+		"""
+		if not self.from_watermark:
+			return """
+				SELECT bbs.item_code, bbs.warehouse
+				FROM `tabBatch Bin Summary` bbs
+				WHERE {conditions}
+				AND bbs.qty > 0
+			""".format(conditions=self.get_scope_conditions("bbs"))
+
+		return """
+			SELECT sle.item_code, sle.warehouse
+			FROM `tabStock Ledger Entry` sle
+			WHERE {sle_conditions}
+			AND sle.creation > %(from_watermark)s AND sle.creation <= %(watermark)s
+			AND IFNULL(sle.batch_no, '') != ''
+			UNION
+			SELECT bbs.item_code, bbs.warehouse
+			FROM `tabBatch Bin Summary` bbs
+			JOIN `tabBatch` b ON b.name = bbs.batch_no
+			WHERE {bbs_conditions}
+			AND bbs.qty > 0
+			AND b.modified > %(from_watermark)s AND b.modified <= %(watermark)s
+		""".format(
+			sle_conditions=self.get_scope_conditions("sle"), bbs_conditions=self.get_scope_conditions("bbs")
+		)
+
+	def get_scope_values(self, **kwargs):
+		return {
+			"company": self.company,
+			"warehouse": self.warehouse,
+			"from_watermark": self.from_watermark,
+			"watermark": self.watermark,
+			**kwargs,
+		}
+
+	def materialize_bins(self):
+		"""
+		Collect the distinct bins to audit once into a temporary table keyed by
+		(item_code, warehouse), so every chunk reads an index range instead of
+		running the bins query again. Returns the number of bins.
+		"""
+		frappe.db.sql(f"DROP TEMPORARY TABLE IF EXISTS `{AUDIT_BINS_TABLE}`")
+		frappe.db.sql(
+			"""
+			CREATE TEMPORARY TABLE `{table}` (PRIMARY KEY (item_code, warehouse))
+			SELECT DISTINCT src.item_code, src.warehouse
+			FROM ({bins}) src
+		""".format(table=AUDIT_BINS_TABLE, bins=self.get_bins_query()),
+			self.get_scope_values(),
+		)
+
+		return frappe.db.sql(f"SELECT COUNT(*) FROM `{AUDIT_BINS_TABLE}`")[0][0]
+
+	def iter_bin_chunks(self):
+		"""Yield the materialized bins in keyset-paginated chunks, so memory stays bounded."""
+		last_item, last_warehouse = "", ""
+
+		while True:
+			bins = frappe.db.sql(
+				"""
+				SELECT item_code, warehouse
+				FROM `{table}`
+				WHERE (item_code > %(last_item)s
+					OR (item_code = %(last_item)s AND warehouse > %(last_warehouse)s))
+				ORDER BY item_code, warehouse
+				LIMIT %(limit)s
+			""".format(table=AUDIT_BINS_TABLE),
+				{"last_item": last_item, "last_warehouse": last_warehouse, "limit": BIN_CHUNK_SIZE},
+			)
+
+			if not bins:
+				break
+
+			yield [tuple(bin_key) for bin_key in bins]
+
+			if len(bins) < BIN_CHUNK_SIZE:
+				break
+
+			last_item, last_warehouse = bins[-1]
+
+	def audit_bins(self, bins, rules):
+		"""Check the batches of each bin against each other and insert the audit logs."""
+		detected_on = now_datetime()
+		logs = []
+
+		for (item_code, warehouse), batches in get_existing_batches_in_bins(bins).items():
+			batches = list(batches.values())
+			pairs = {}
+
+			for i, j in rules.get_bin_conflicts([batch.attribute_mask for batch in batches]):
+				messages = pairs.setdefault(tuple(sorted((i, j))), [])
+				for message in check_attribute_conflicts(batches[i], batches[j], rules):
+					if message not in messages:
+						messages.append(message)
+
+			for (i, j), messages in pairs.items():
+				logs.append(
+					(
+						frappe.generate_hash(length=12),
+						detected_on,
+						detected_on,
+						frappe.session.user,
+						frappe.session.user,
+						self.name,
+						"Open",
+						detected_on,
+						self.company,
+						warehouse,
+						item_code,
+						batches[i].batch_no,
+						batches[j].batch_no,
+						"\n".join(messages),
+					)
+				)
+
+		if logs:
+			frappe.db.bulk_insert(
+				"Stock Mixing Audit Log",
+				fields=[
+					"name",
+					"creation",
+					"modified",
+					"owner",
+					"modified_by",
+					"stock_mixing_audit",
+					"status",
+					"detected_on",
+					"company",
+					"warehouse",
+					"item_code",
+					"batch_no",
+					"conflicting_batch",
+					"conflicts",
+				],
+				values=logs,
+			)
+
+		return len(logs)
+
+	def resolve_logs(self, bins=None):
+		"""Mark open findings of the given bins (or of the whole scope) as resolved."""
+		conditions = "company = %(company)s"
+		values = self.get_scope_values()
+
+		if bins:
+			conditions += " AND ({0})".format(
+				" OR ".join(
+					f"(item_code = %(item_{i})s AND warehouse = %(warehouse_{i})s)" for i in range(len(bins))
+				)
+			)
+			for i, (item_code, warehouse) in enumerate(bins):
+				values[f"item_{i}"] = item_code
+				values[f"warehouse_{i}"] = warehouse
+		elif self.warehouse:
+			conditions += " AND warehouse = %(warehouse)s"
+
+		frappe.db.sql(
+			"""
+			UPDATE `tabStock Mixing Audit Log`
+			SET status = 'Resolved'
+			WHERE status = 'Open'
+			AND {conditions}
+		""".format(conditions=conditions),
+			values,
+		)
+
+
+def get_rules_hash(settings):
+	"""Fingerprint of the mixing rules in effect; an incremental audit needs the same rules as the last one."""
+	rows = settings.get("mixing_rules") if settings else None
+	rules = (
+		[(row.incoming_attribute, row.existing_attribute, row.message) for row in rows] if rows else "default"
+	)
+	return hashlib.md5(json.dumps(rules).encode()).hexdigest()
+
+
+def run_stock_mixing_audit(audit):
+	"""Background job entry point."""
+	doc = frappe.get_doc("Stock Mixing Audit", audit)
+
+	try:
+		doc.run()
+	except Exception:
+		frappe.db.rollback()
+		doc.db_set({"status": "Failed", "error": frappe.get_traceback(), "finished_at": now_datetime()})
+		frappe.db.commit()
+		doc.log_error(_("Stock Mixing Audit failed"))
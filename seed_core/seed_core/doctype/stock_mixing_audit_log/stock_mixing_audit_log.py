@@ -0,0 +1,13 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class StockMixingAuditLog(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Mixing Audit Log", ["item_code", "warehouse"])
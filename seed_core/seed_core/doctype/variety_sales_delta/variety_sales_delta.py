@@ -0,0 +1,61 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Variety Sales Delta queues the varieties each Sales Invoice adds on submit
+or removes on cancel. The Sales Target Plan actuals refresh recomputes those
+varieties in the matching plans and deletes the deltas it has read.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now
+
+from seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact import get_invoice_totals
+
+
+class VarietySalesDelta(Document):
+	pass
+
+
+def record_sales_deltas(doc, method=None):
+	"""Sales Invoice hook: queue the invoice's variety totals for the actuals refresh."""
+	totals = get_invoice_totals(doc, method)
+	if not totals:
+		return
+
+	timestamp = now()
+	frappe.db.bulk_insert(
+		"Variety Sales Delta",
+		fields=[
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"sales_invoice",
+			"seed_variety",
+			"posting_date",
+			"company",
+			"territory",
+			"customer",
+			"qty",
+			"amount",
+		],
+		values=[
+			(
+				timestamp,
+				timestamp,
+				frappe.session.user,
+				frappe.session.user,
+				doc.name,
+				seed_variety,
+				doc.posting_date,
+				doc.company,
+				doc.territory,
+				doc.customer,
+				qty,
+				amount,
+			)
+			for seed_variety, (qty, amount) in totals.items()
+		],
+	)
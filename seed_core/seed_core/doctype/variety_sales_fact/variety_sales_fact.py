@@ -0,0 +1,210 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Variety Sales Fact holds submitted Sales Invoice qty and amount per
+(variety, territory, customer, company, month). It is kept current from the
+Sales Invoice submit / cancel hooks, so sales reports and plans can group a
+few thousand fact rows instead of every invoice line.
+"""
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, get_first_day, getdate, now
+
+# Grain of the fact table besides the month
+FACT_DIMENSIONS = ("seed_variety", "territory", "customer", "company")
+
+
+class VarietySalesFact(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Variety Sales Fact",
+		["seed_variety", "posting_month", "territory", "customer", "company"],
+		constraint_name="unique_variety_sales_grain",
+	)
+	frappe.db.add_index("Variety Sales Fact", ["company", "posting_month"])
+
+
+def get_fact_name(seed_variety, territory, customer, company, posting_month):
+	"""Return the deterministic row name for a fact (matches MD5(CONCAT_WS(...)) in SQL)."""
+	return hashlib.md5(
+		f"{seed_variety}::{territory}::{customer}::{company}::{posting_month}".encode()
+	).hexdigest()
+
+
+def get_item_varieties(item_codes):
+	"""Return {item_code: seed_variety} for the Seed Varieties linked to the given items."""
+	if not item_codes:
+		return {}
+
+	return dict(
+		frappe.get_all(
+			"Seed Variety",
+			filters={"linked_item": ["in", list(set(item_codes))]},
+			fields=["linked_item", "name"],
+			as_list=True,
+		)
+	)
+
+
+def get_invoice_totals(doc, method=None):
+	"""Return {seed_variety: (qty, amount)} of a Sales Invoice, negated on cancel."""
+	varieties = get_item_varieties([item.item_code for item in doc.items])
+	sign = -1 if method == "on_cancel" else 1
+	totals = {}
+
+	for item in doc.items:
+		seed_variety = varieties.get(item.item_code)
+		if not seed_variety:
+			continue
+
+		qty, amount = totals.get(seed_variety, (0, 0))
+		totals[seed_variety] = (qty + sign * flt(item.qty), amount + sign * flt(item.amount))
+
+	return totals
+
+
+def update_variety_sales_fact(doc, method=None):
+	"""Sales Invoice hook: add the invoice lines on submit and subtract them on cancel."""
+	totals = get_invoice_totals(doc, method)
+	if not totals:
+		return
+
+	posting_month = get_first_day(doc.posting_date)
+	territory = doc.territory or ""
+	timestamp = now()
+	values = [
+		(
+			get_fact_name(seed_variety, territory, doc.customer, doc.company, posting_month),
+			timestamp,
+			timestamp,
+			frappe.session.user,
+			frappe.session.user,
+			seed_variety,
+			posting_month,
+			territory,
+			doc.customer,
+			doc.company,
+			qty,
+			amount,
+		)
+		for seed_variety, (qty, amount) in totals.items()
+	]
+
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabVariety Sales Fact`
+			(name, creation, modified, modified_by, owner,
+			seed_variety, posting_month, territory, customer, company, qty, amount)
+		VALUES {placeholders}
+		ON DUPLICATE KEY UPDATE
+			qty = qty + VALUES(qty),
+			amount = amount + VALUES(amount),
+			modified = VALUES(modified)
+	""".format(placeholders=", ".join(["(" + ", ".join(["%s"] * 12) + ")"] * len(values))),
+		[value for row in values for value in row],
+	)
+
+
+def rebuild_variety_sales_fact(company=None):
+	"""Rebuild the fact table from submitted Sales Invoices, optionally for one company."""
+	conditions = "AND si.company = %(company)s" if company else ""
+	timestamp = now()
+
+	frappe.db.sql(
+		"DELETE FROM `tabVariety Sales Fact` {0}".format("WHERE company = %(company)s" if company else ""),
+		{"company": company},
+	)
+
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabVariety Sales Fact`
+			(name, creation, modified, modified_by, owner,
+			seed_variety, posting_month, territory, customer, company, qty, amount)
+		SELECT
+			MD5(CONCAT_WS('::', sales.seed_variety, sales.territory, sales.customer, sales.company, sales.posting_month)),
+			%(timestamp)s, %(timestamp)s, %(user)s, %(user)s,
+			sales.seed_variety, sales.posting_month, sales.territory, sales.customer, sales.company,
+			SUM(sales.qty), SUM(sales.amount)
+		FROM (
+			SELECT
+				sv.name as seed_variety,
+				DATE_FORMAT(si.posting_date, '%%Y-%%m-01') as posting_month,
+				IFNULL(si.territory, '') as territory,
+				si.customer,
+				si.company,
+				sii.qty,
+				sii.amount
+			FROM `tabSales Invoice Item` sii
+			JOIN `tabSales Invoice` si ON sii.parent = si.name
+			JOIN `tabSeed Variety` sv ON sv.linked_item = sii.item_code
+			WHERE si.docstatus = 1
+			{conditions}
+		) sales
+		GROUP BY sales.seed_variety, sales.posting_month, sales.territory, sales.customer, sales.company
+	""".format(conditions=conditions),
+		{"company": company, "timestamp": timestamp, "user": frappe.session.user},
+	)
+
+
+def get_variety_sales(start_date, end_date, group_by=("seed_variety",), **filters):
+	"""
+	Return qty and amount between two dates, grouped by the given fact columns.
+	Keyword filters match fact dimensions; a list matches any of its values.
+	The fact table is monthly, so start_date counts from the first of its month.
+	"""
+	for field in (*group_by, *filters):
+		if field not in (*FACT_DIMENSIONS, "posting_month"):
+			frappe.throw(_("Invalid Variety Sales Fact column {0}").format(field))
+
+	conditions = ""
+	values = {"start_date": get_first_day(start_date), "end_date": getdate(end_date)}
+
+	for field, value in filters.items():
+		if value is None:
+			continue
+
+		if isinstance(value, (list, tuple, set)):
+			if not value:
+				return []
+			conditions += f" AND {field} IN %({field})s"
+			value = tuple(value)
+		else:
+			conditions += f" AND {field} = %({field})s"
+
+		values[field] = value
+
+	return frappe.db.sql(
+		"""
+		SELECT {group_by}, SUM(qty) as qty, SUM(amount) as amount
+		FROM `tabVariety Sales Fact`
+		WHERE posting_month BETWEEN %(start_date)s AND %(end_date)s
+		{conditions}
+		GROUP BY {group_by}
+	""".format(group_by=", ".join(group_by), conditions=conditions),
+		values,
+		as_dict=True,
+	)
+
+
+@frappe.whitelist()
+def enqueue_rebuild_variety_sales_fact(company=None):
+	"""Queue a rebuild of the fact table."""
+	frappe.only_for("System Manager")
+
+	frappe.enqueue(
+		"seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact.rebuild_variety_sales_fact",
+		queue="long",
+		timeout=3600,
+		job_id=f"rebuild_variety_sales_fact::{company or 'all'}",
+		deduplicate=True,
+		company=company,
+	)
+	frappe.msgprint(_("Variety Sales Fact rebuild has been queued"))
@@ -0,0 +1,472 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Sales Forecast Engine
+
+Fits Holt's linear trend with additive calendar-month seasonality to every
+customer x variety monthly sales series at once: the series are the rows of
+one NumPy matrix, and the smoothing parameters of each row are picked from a
+small grid by one-step-ahead error.
+
+Parameters and the final state of each series are kept in Forecast Model.
+Later runs roll the cached state over the months observed since, and only
+refit series whose parameters are older than REFIT_AFTER_MONTHS.
+"""
+
+import datetime
+import hashlib
+import json
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import cint, flt, getdate, now, today
+
+HISTORY_MONTHS = 36
+REFIT_AFTER_MONTHS = 12
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.0, 0.05, 0.15)
+
+# Series with fewer non-zero months than this get Low confidence
+MIN_OBSERVATIONS = 6
+WRITE_CHUNK_SIZE = 1000
+# Stored level, trend and error are clamped to the range of Float columns (decimal(21,9))
+FLOAT_LIMIT = 1e11
+
+
+def month_index(date):
+	date = getdate(date)
+	return date.year * 12 + date.month - 1
+
+
+def month_start(index):
+	return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def get_model_name(customer, seed_variety):
+	return hashlib.md5(f"{customer}::{seed_variety}".encode()).hexdigest()
+
+
+def load_history(first_month, last_month, customers=None):
+	"""
+	Return (keys, qty, amount): the (customer, seed_variety) of each series and
+	(series x month) matrices of monthly sales between two month indexes.
+	"""
+	conditions = "AND customer IN %(customers)s" if customers else ""
+	rows = frappe.db.sql(
+		"""
+		SELECT customer, seed_variety, posting_month, SUM(qty), SUM(amount)
+		FROM `tabVariety Sales Fact`
+		WHERE posting_month BETWEEN %(from_month)s AND %(to_month)s
+		{conditions}
+		GROUP BY customer, seed_variety, posting_month
+	""".format(conditions=conditions),
+		{
+			"from_month": month_start(first_month),
+			"to_month": month_start(last_month),
+			"customers": tuple(customers or ()),
+		},
+	)
+
+	if not rows:
+		return [], None, None
+
+	keys, index = [], {}
+	series, months = [], []
+	for customer, seed_variety, posting_month, _qty, _amount in rows:
+		key = (customer, seed_variety)
+		if key not in index:
+			index[key] = len(keys)
+			keys.append(key)
+		series.append(index[key])
+		months.append(month_index(posting_month) - first_month)
+
+	shape = (len(keys), last_month - first_month + 1)
+	qty, amount = np.zeros(shape), np.zeros(shape)
+	np.add.at(qty, (series, months), [flt(row[3]) for row in rows])
+	np.add.at(amount, (series, months), [flt(row[4]) for row in rows])
+
+	return keys, qty, amount
+
+
+def load_models(keys):
+	"""Return the cached Forecast Model of each key, or None."""
+	models = {}
+	names = [get_model_name(*key) for key in keys]
+
+	for start in range(0, len(names), WRITE_CHUNK_SIZE):
+		for model in frappe.get_all(
+			"Forecast Model",
+			filters={"name": ["in", names[start : start + WRITE_CHUNK_SIZE]]},
+			fields=[
+				"customer",
+				"seed_variety",
+				"alpha",
+				"beta",
+				"level",
+				"trend",
+				"seasonal",
+				"rmse",
+				"observations",
+				"last_month",
+				"fitted_on",
+			],
+		):
+			models[(model.customer, model.seed_variety)] = model
+
+	return [models.get(key) for key in keys]
+
+
+def get_seasonal(qty, first_month):
+	"""Return the additive calendar-month components of each series (rows sum to zero)."""
+	calendar = (np.arange(qty.shape[1]) + first_month) % 12
+	deviations = qty - qty.mean(axis=1, keepdims=True)
+	seasonal = np.zeros((len(qty), 12))
+
+	for month in range(12):
+		columns = calendar == month
+		if columns.any():
+			seasonal[:, month] = deviations[:, columns].mean(axis=1)
+
+	return seasonal - seasonal.mean(axis=1, keepdims=True)
+
+
+def run_holt(series, alpha, beta, level, trend):
+	"""Roll Holt's recursion over the columns of series; returns level, trend and the squared errors."""
+	sse = np.zeros(len(series))
+
+	for t in range(series.shape[1]):
+		error = series[:, t] - (level + trend)
+		sse += error**2
+		level = level + trend + alpha * error
+		trend = trend + alpha * beta * error
+
+	return level, trend, sse
+
+
+def fit(series):
+	"""Pick alpha / beta per row from the grid by one-step-ahead squared error."""
+	rows = len(series)
+	level0 = series[:, :12].mean(axis=1)
+	trend0 = np.zeros(rows)
+	best_sse = np.full(rows, np.inf)
+	best = {name: np.zeros(rows) for name in ("alpha", "beta", "level", "trend")}
+
+	for alpha in ALPHAS:
+		for beta in BETAS:
+			level, trend, sse = run_holt(series, alpha, beta, level0, trend0)
+			better = sse < best_sse
+			best_sse[better] = sse[better]
+			best["alpha"][better] = alpha
+			best["beta"][better] = beta
+			best["level"][better] = level[better]
+			best["trend"][better] = trend[better]
+
+	return best["alpha"], best["beta"], best["level"], best["trend"], best_sse
+
+
+def forecast_series(fiscal_year, customers=None):
+	"""
+	Fit or update the model of every series and forecast the fiscal year.
+	Returns {(customer, seed_variety): {qty, price, confidence_level}}.
+	"""
+	year_start = month_index(frappe.db.get_value("Fiscal Year", fiscal_year, "year_start_date"))
+	last_month = min(year_start, month_index(today())) - 1
+	first_month = last_month - HISTORY_MONTHS + 1
+
+	keys, qty, amount = load_history(first_month, last_month, customers)
+	if not keys:
+		return {}
+
+	rows = len(keys)
+	models = load_models(keys)
+	calendar = (np.arange(qty.shape[1]) + first_month) % 12
+
+	alpha, beta = np.zeros(rows), np.zeros(rows)
+	level, trend, sse = np.zeros(rows), np.zeros(rows), np.zeros(rows)
+	seasonal = np.zeros((rows, 12))
+	observations = np.full(rows, qty.shape[1])
+	fitted_on = np.full(rows, last_month)
+
+	# Cached models whose state can be rolled forward, grouped by their last month
+	cached = {}
+	for i, model in enumerate(models):
+		if (
+			model
+			and first_month <= month_index(model.last_month) <= last_month
+			and last_month - month_index(model.fitted_on) < REFIT_AFTER_MONTHS
+		):
+			cached.setdefault(month_index(model.last_month), []).append(i)
+
+	for model_month, indexes in cached.items():
+		indexes = np.array(indexes)
+		alpha[indexes] = [flt(models[i].alpha) for i in indexes]
+		beta[indexes] = [flt(models[i].beta) for i in indexes]
+		seasonal[indexes] = [json.loads(models[i].seasonal) for i in indexes]
+		fitted_on[indexes] = [month_index(models[i].fitted_on) for i in indexes]
+
+		columns = slice(model_month - first_month + 1, None)
+		new = qty[indexes, columns] - seasonal[indexes][:, calendar[columns]]
+		level[indexes], trend[indexes], new_sse = run_holt(
+			new,
+			alpha[indexes],
+			beta[indexes],
+			np.array([flt(models[i].level) for i in indexes]),
+			np.array([flt(models[i].trend) for i in indexes]),
+		)
+		# The stored error is an RMSE, turned back into a sum of squares to add the new months
+		sse[indexes] = new_sse + np.array(
+			[flt(models[i].rmse) ** 2 * cint(models[i].observations) for i in indexes]
+		)
+		observations[indexes] = [cint(models[i].observations) + new.shape[1] for i in indexes]
+
+	refit = np.ones(rows, dtype=bool)
+	for indexes in cached.values():
+		refit[indexes] = False
+
+	if refit.any():
+		seasonal[refit] = get_seasonal(qty[refit], first_month)
+		alpha[refit], beta[refit], level[refit], trend[refit], sse[refit] = fit(
+			qty[refit] - seasonal[refit][:, calendar]
+		)
+
+	# Seasonal components cancel out over a full year, so the annual total only
+	# depends on level and trend over the months ahead
+	gap = year_start - 1 - last_month
+	horizon = np.arange(gap + 1, gap + 13).sum()
+	annual_qty = np.clip(12 * level + horizon * trend, 0, None)
+
+	recent_qty, recent_amount = qty[:, -12:].sum(axis=1), amount[:, -12:].sum(axis=1)
+	total_qty, total_amount = qty.sum(axis=1), amount.sum(axis=1)
+	price = np.where(
+		recent_qty > 0,
+		recent_amount / np.where(recent_qty > 0, recent_qty, 1),
+		np.where(total_qty > 0, total_amount / np.where(total_qty > 0, total_qty, 1), 0),
+	)
+
+	# Relative one-step error against the average monthly volume of the series
+	rmse = np.sqrt(sse / np.maximum(observations, 1))
+	error = rmse / np.maximum(np.abs(qty).mean(axis=1), 1e-9)
+	active_months = (qty != 0).sum(axis=1)
+	confidence = np.where(
+		(error < 0.5) & (active_months >= 12),
+		"High",
+		np.where((error < 1) & (active_months >= MIN_OBSERVATIONS), "Medium", "Low"),
+	)
+
+	save_models(keys, alpha, beta, level, trend, seasonal, rmse, observations, last_month, fitted_on, price)
+
+	return {
+		key: frappe._dict(
+			qty=float(annual_qty[i]), price=float(price[i]), confidence_level=str(confidence[i])
+		)
+		for i, key in enumerate(keys)
+	}
+
+
+def save_models(keys, alpha, beta, level, trend, seasonal, rmse, observations, last_month, fitted_on, price):
+	"""Upsert the Forecast Model of every series in chunks."""
+	timestamp = now()
+	user = frappe.session.user
+	last_month = month_start(last_month)
+	level, trend, rmse = (np.clip(values, -FLOAT_LIMIT, FLOAT_LIMIT) for values in (level, trend, rmse))
+
+	for start in range(0, len(keys), WRITE_CHUNK_SIZE):
+		values = []
+		for i in range(start, min(start + WRITE_CHUNK_SIZE, len(keys))):
+			customer, seed_variety = keys[i]
+			values.extend(
+				[
+					get_model_name(customer, seed_variety),
+					timestamp,
+					timestamp,
+					user,
+					user,
+					customer,
+					seed_variety,
+					float(alpha[i]),
+					float(beta[i]),
+					float(level[i]),
+					float(trend[i]),
+					json.dumps([round(float(value), 6) for value in seasonal[i]]),
+					float(rmse[i]),
+					int(observations[i]),
+					last_month,
+					month_start(int(fitted_on[i])),
+					float(price[i]),
+				]
+			)
+
+		frappe.db.sql(
+			"""
+			INSERT INTO `tabForecast Model`
+				(name, creation, modified, modified_by, owner,
+				customer, seed_variety, alpha, beta, level, trend,
+				seasonal, rmse, observations, last_month, fitted_on, price)
+			VALUES {placeholders}
+			ON DUPLICATE KEY UPDATE
+				alpha = VALUES(alpha), beta = VALUES(beta), level = VALUES(level), trend = VALUES(trend),
+				seasonal = VALUES(seasonal), rmse = VALUES(rmse), observations = VALUES(observations),
+				last_month = VALUES(last_month), fitted_on = VALUES(fitted_on), price = VALUES(price),
+				modified = VALUES(modified)
+		""".format(placeholders=", ".join(["(" + ", ".join(["%s"] * 17) + ")"] * (len(values) // 17))),
+			values,
+		)
+
+
+def apply_to_forecasts(fiscal_year, results, customers=None, commit=False):
+	"""
+	Write suggestions into the draft Sales Forecasts of the fiscal year: update
+	the rows of forecast varieties and add rows for varieties the customer buys.
+	"""
+	by_customer = {}
+	for (customer, seed_variety), result in results.items():
+		by_customer.setdefault(customer, {})[seed_variety] = result
+
+	if not by_customer:
+		return 0
+
+	filters = {"fiscal_year": fiscal_year, "docstatus": 0, "customer": ["in", list(customers or by_customer)]}
+	forecasts = frappe.get_all("Sales Forecast", filters=filters, fields=["name", "customer"])
+
+	for start in range(0, len(forecasts), WRITE_CHUNK_SIZE):
+		chunk = {forecast.name: forecast.customer for forecast in forecasts[start : start + WRITE_CHUNK_SIZE]}
+		existing = {}
+		updates = {}
+
+		for row in frappe.get_all(
+			"Forecast Item",
+			filters={"parenttype": "Sales Forecast", "parent": ["in", list(chunk)]},
+			fields=["name", "parent", "seed_variety", "idx"],
+		):
+			existing.setdefault(row.parent, {"varieties": set(), "idx": 0})
+			existing[row.parent]["varieties"].add(row.seed_variety)
+			existing[row.parent]["idx"] = max(existing[row.parent]["idx"], cint(row.idx))
+
+			result = by_customer.get(chunk[row.parent], {}).get(row.seed_variety)
+			if result:
+				updates[row.name] = get_item_values(result)
+
+		timestamp = now()
+		new_rows = []
+		for forecast, customer in chunk.items():
+			known = existing.get(forecast, {"varieties": set(), "idx": 0})
+			idx = known["idx"]
+			for seed_variety, result in sorted(by_customer.get(customer, {}).items()):
+				if seed_variety in known["varieties"] or not result.qty:
+					continue
+
+				idx += 1
+				values = get_item_values(result)
+				new_rows.append(
+					(
+						frappe.generate_hash(length=10),
+						timestamp,
+						timestamp,
+						frappe.session.user,
+						frappe.session.user,
+						forecast,
+						"Sales Forecast",
+						"forecast_items",
+						idx,
+						seed_variety,
+						values["suggested_qty"],
+						values["suggested_price"],
+						values["expected_amount"],
+						values["confidence_level"],
+					)
+				)
+
+		if updates:
+			frappe.db.bulk_update("Forecast Item", updates)
+
+		if new_rows:
+			frappe.db.bulk_insert(
+				"Forecast Item",
+				fields=[
+					"name",
+					"creation",
+					"modified",
+					"owner",
+					"modified_by",
+					"parent",
+					"parenttype",
+					"parentfield",
+					"idx",
+					"seed_variety",
+					"suggested_qty",
+					"suggested_price",
+					"expected_amount",
+					"confidence_level",
+				],
+				values=new_rows,
+			)
+
+		update_forecast_totals(list(chunk))
+		if commit:
+			frappe.db.commit()
+
+	return len(forecasts)
+
+
+def get_item_values(result):
+	qty = round(result.qty, 3)
+	price = round(result.price, 2)
+	return {
+		"suggested_qty": qty,
+		"suggested_price": price,
+		"expected_amount": qty * price,
+		"confidence_level": result.confidence_level,
+	}
+
+
+def update_forecast_totals(forecast_names):
+	if not forecast_names:
+		return
+
+	frappe.db.sql(
+		"""
+		UPDATE `tabSales Forecast` sf
+		JOIN (
+			SELECT parent, SUM(suggested_qty) as qty, SUM(expected_amount) as amount
+			FROM `tabForecast Item`
+			WHERE parenttype = 'Sales Forecast'
+			AND parent IN %(forecasts)s
+			GROUP BY parent
+		) fi ON fi.parent = sf.name
+		SET sf.total_suggested_qty = fi.qty, sf.total_expected_amount = fi.amount, sf.modified = %(modified)s
+	""",
+		{"forecasts": tuple(forecast_names), "modified": now()},
+	)
+
+
+def run_forecast_engine(fiscal_year, customers=None):
+	"""Background job: forecast every series and pre-fill the draft forecasts of the year."""
+	results = forecast_series(fiscal_year, customers)
+	frappe.db.commit()
+
+	updated = apply_to_forecasts(fiscal_year, results, customers, commit=True)
+	frappe.publish_realtime(
+		"msgprint",
+		_("Forecast suggestions for {0}: {1} series forecast, {2} Sales Forecasts updated").format(
+			fiscal_year, len(results), updated
+		),
+		user=frappe.session.user,
+	)
+
+
+@frappe.whitelist()
+def enqueue_forecast_engine(fiscal_year):
+	"""Queue forecasting of all customer x variety series for a fiscal year."""
+	frappe.only_for(("System Manager", "Sales Manager"))
+
+	frappe.enqueue(
+		"seed_core.seed_core.forecast_engine.run_forecast_engine",
+		queue="long",
+		timeout=3600,
+		job_id=f"forecast_engine::{fiscal_year}",
+		deduplicate=True,
+		fiscal_year=fiscal_year,
+	)
+	frappe.msgprint(_("Forecast suggestions for {0} have been queued").format(fiscal_year))
@@ -0,0 +1,20 @@
+frappe.query_reports["Forecast Accuracy"] = {
+    "filters": [
+        {
+            "fieldname": "fiscal_year",
+            "label": __("Fiscal Year"),
+            "fieldtype": "Link",
+            "options": "Fiscal Year",
+            "default": frappe.defaults.get_user_default("fiscal_year"),
+            "reqd": 1
+        },
+        {
+            "fieldname": "dimension",
+            "label": __("Group By"),
+            "fieldtype": "Select",
+            "options": "Customer\nSales Person\nSeed Variety\nSeed Segment",
+            "default": "Customer",
+            "reqd": 1
+        }
+    ]
+};
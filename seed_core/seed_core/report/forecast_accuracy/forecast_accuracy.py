@@ -0,0 +1,67 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from seed_core.seed_core.doctype.forecast_accuracy_metric.forecast_accuracy_metric import (
+	DIMENSIONS,
+	get_accuracy_metrics,
+)
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	if filters.get("dimension") not in DIMENSIONS:
+		filters.dimension = "Customer"
+
+	columns = get_columns(filters)
+	data = get_data(filters)
+	chart = get_chart_data(data)
+
+	return columns, data, None, chart
+
+
+def get_columns(filters):
+	return [
+		{
+			"label": _(filters.dimension),
+			"fieldname": "dimension_value",
+			"fieldtype": "Link",
+			"options": filters.dimension,
+			"width": 200,
+		},
+		{"label": _("Series"), "fieldname": "series", "fieldtype": "Int", "width": 80},
+		{"label": _("Forecast Qty"), "fieldname": "forecast_qty", "fieldtype": "Float", "width": 120},
+		{"label": _("Actual Qty"), "fieldname": "actual_qty", "fieldtype": "Float", "width": 120},
+		{"label": _("MAPE"), "fieldname": "mape", "fieldtype": "Percent", "width": 100},
+		{"label": _("Bias"), "fieldname": "bias", "fieldtype": "Percent", "width": 100},
+		{"label": _("Hit Rate"), "fieldname": "hit_rate", "fieldtype": "Percent", "width": 100},
+	]
+
+
+def get_data(filters):
+	if not filters.get("fiscal_year"):
+		return []
+
+	return get_accuracy_metrics(filters.fiscal_year, filters.dimension)
+
+
+def get_chart_data(data):
+	if not data:
+		return None
+
+	# Top 10 rows by actual qty
+	top_data = sorted(data, key=lambda x: flt(x.actual_qty), reverse=True)[:10]
+
+	return {
+		"data": {
+			"labels": [d.dimension_value or _("Not Set") for d in top_data],
+			"datasets": [
+				{"name": _("MAPE"), "values": [flt(d.mape, 2) for d in top_data]},
+				{"name": _("Hit Rate"), "values": [flt(d.hit_rate, 2) for d in top_data]},
+			],
+		},
+		"type": "bar",
+	}
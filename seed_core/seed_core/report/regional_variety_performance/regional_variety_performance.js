@@ -47,6 +47,71 @@ frappe.query_reports["Regional Variety Performance"] = {
             "label": __("Lifecycle Stage"),
             "fieldtype": "Select",
             "options": "\nR&D\nTrial\nCommercial\nPhase Out\nDropped"
+        },
+        {
+            "fieldname": "view",
+            "label": __("View"),
+            "fieldtype": "Select",
+            "options": "Flat\nTree",
+            "default": "Flat",
+            "on_change": function (report) {
+                // Only the rollup rows have parents; the flat view is a plain table
+                set_tree_view(report);
+                report.refresh();
+            }
+        },
+        {
+            "fieldname": "tree_depth",
+            "label": __("Load Levels"),
+            "fieldtype": "Select",
+            "options": "Crop\nSegment\nSubSegment\nVariety",
+            "default": "Segment",
+            "depends_on": "eval:doc.view == 'Tree'"
+        }
+    ],
+    "tree": false,
+    "name_field": "node",
+    "parent_field": "parent_node",
+    "initial_depth": 4,
+    "onload": function (report) {
+        set_tree_view(report);
+
+        // Nodes beyond the loaded levels fetch their children on demand
+        $(report.page.wrapper).on("click", ".rollup-expand", function (e) {
+            e.preventDefault();
+            var node = decodeURIComponent($(this).attr("data-node"));
+            var data = frappe.query_report.data;
+            var index = data.findIndex(function (row) { return row.node === node; });
+            if (index < 0 || !data[index].lazy) {
+                return;
+            }
+
+            frappe.call({
+                method: "seed_core.seed_core.report.regional_variety_performance.regional_variety_performance.get_rollup_children",
+                args: {
+                    filters: frappe.query_report.get_filter_values(),
+                    parent_node: node
+                },
+                callback: function (r) {
+                    data[index].lazy = 0;
+                    data.splice.apply(data, [index + 1, 0].concat(r.message || []));
+                    frappe.query_report.datatable.refresh(data);
+                }
+            });
+        });
+    },
+    "formatter": function (value, row, column, data, default_formatter) {
+        value = default_formatter(value, row, column, data);
+
+        if (column.fieldname === "label" && data && data.lazy) {
+            value += ` <a class="rollup-expand" href="#" data-node="${encodeURIComponent(data.node)}">[+]</a>`;
         }
-    ]
+
+        return value;
+    }
 };
+
+function set_tree_view(report) {
+    report.report_settings.tree = report.get_filter_value("view") === "Tree";
+    report.tree_report = report.report_settings.tree;
+}
@@ -3,16 +3,51 @@
 
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import flt, get_first_day
+
+# Hierarchy levels of the tree view: (row field, Seed Variety column, doctype)
+LEVELS = (
+	("crop", "seed_crop", "Seed Crop"),
+	("segment", "seed_segment", "Seed Segment"),
+	("subsegment", "seed_subsegment", "Seed SubSegment"),
+	("variety", "name", "Seed Variety"),
+)
+LEVEL_NAMES = {"Crop": 1, "Segment": 2, "SubSegment": 3, "Variety": 4}
+NODE_SEPARATOR = "::"
 
 
 def execute(filters=None):
-	columns = get_columns(filters)
-	data = get_data(filters)
-	chart = get_chart_data(data)
+	if filters.get("view") == "Tree":
+		columns = get_tree_columns()
+		data = get_tree_data(filters)
+		chart = get_chart_data([row for row in data if not row.indent], label_field="label")
+	else:
+		columns = get_columns(filters)
+		data = get_data(filters)
+		chart = get_chart_data(data)
+
 	return columns, data, None, chart
 
 
+def get_tree_columns():
+	return [
+		{
+			"label": _("Hierarchy"),
+			"fieldname": "label",
+			"fieldtype": "Dynamic Link",
+			"options": "level_doctype",
+			"width": 260
+		},
+		{
+			"label": _("Level"),
+			"fieldname": "level",
+			"fieldtype": "Data",
+			"width": 100
+		},
+		*get_columns(frappe._dict())[3:]
+	]
+
+
 def get_columns(filters):
 	columns = [
 		{
@@ -82,8 +117,10 @@ def get_data(filters):
 
 	group_by = "sv.seed_segment, sv.seed_subsegment, sv.name"
 	if filters.get("territory"):
-		group_by = "si.territory, " + group_by
+		group_by = "vsf.territory, " + group_by
 
+	# Sales come from Variety Sales Fact, which is maintained from submitted
+	# Sales Invoices, instead of grouping every invoice line on every run
 	data = frappe.db.sql("""
 		SELECT
 			sv.seed_segment as segment,
@@ -91,22 +128,19 @@ def get_data(filters):
 			sv.name as variety,
 			sv.lifecycle_stage,
 			{territory_field}
-			SUM(sii.qty) as qty_sold,
-			SUM(sii.amount) as total_amount,
-			CASE WHEN SUM(sii.qty) > 0 THEN SUM(sii.amount) / SUM(sii.qty) ELSE 0 END as avg_price
-		FROM `tabSales Invoice Item` sii
-		JOIN `tabSales Invoice` si ON sii.parent = si.name
-		JOIN `tabItem` i ON sii.item_code = i.name
-		LEFT JOIN `tabSeed Variety` sv ON sv.linked_item = i.name
-		WHERE si.docstatus = 1
-		AND sv.name IS NOT NULL
+			SUM(vsf.qty) as qty_sold,
+			SUM(vsf.amount) as total_amount,
+			CASE WHEN SUM(vsf.qty) > 0 THEN SUM(vsf.amount) / SUM(vsf.qty) ELSE 0 END as avg_price
+		FROM `tabVariety Sales Fact` vsf
+		JOIN `tabSeed Variety` sv ON sv.name = vsf.seed_variety
+		WHERE 1 = 1
 		{conditions}
 		GROUP BY {group_by}
 		ORDER BY total_amount DESC
 	""".format(
 		conditions=conditions,
 		group_by=group_by,
-		territory_field="si.territory as territory," if filters.get("territory") else ""
+		territory_field="vsf.territory as territory," if filters.get("territory") else ""
 	), filters, as_dict=True)
 
 	return data
@@ -116,14 +150,17 @@ def get_conditions(filters):
 	conditions = ""
 
 	if filters.get("company"):
-		conditions += " AND si.company = %(company)s"
+		conditions += " AND vsf.company = %(company)s"
 
 	if filters.get("fiscal_year"):
-		fy = frappe.get_doc("Fiscal Year", filters.get("fiscal_year"))
-		conditions += f" AND si.posting_date BETWEEN '{fy.year_start_date}' AND '{fy.year_end_date}'"
+		filters.year_start_date, filters.year_end_date = frappe.db.get_value(
+			"Fiscal Year", filters.get("fiscal_year"), ["year_start_date", "year_end_date"]
+		)
+		filters.year_start_date = get_first_day(filters.year_start_date)
+		conditions += " AND vsf.posting_month BETWEEN %(year_start_date)s AND %(year_end_date)s"
 
 	if filters.get("territory"):
-		conditions += " AND si.territory = %(territory)s"
+		conditions += " AND vsf.territory = %(territory)s"
 
 	if filters.get("crop"):
 		conditions += " AND sv.seed_crop = %(crop)s"
@@ -137,14 +174,112 @@ def get_conditions(filters):
 	return conditions
 
 
-def get_chart_data(data):
+def get_tree_data(filters):
+	"""
+	Return the hierarchy rows down to the "Load Levels" filter. Every level is
+	computed in one grouped pass (WITH ROLLUP); deeper levels are fetched on
+	expansion with get_rollup_children.
+	"""
+	depth = LEVEL_NAMES.get(filters.get("tree_depth")) or 2
+	rows = get_rollup_rows(filters, depth, rollup=True)
+
+	# Order the rollup output as a tree: each node followed by its children, by amount
+	children = {}
+	for row in rows:
+		children.setdefault(row.parent_node, []).append(row)
+
+	data = []
+
+	def add_children(parent_node):
+		for row in sorted(children.get(parent_node, []), key=lambda r: flt(r.total_amount), reverse=True):
+			data.append(row)
+			add_children(row.node)
+
+	add_children("")
+	return data
+
+
+def get_rollup_rows(filters, depth, rollup=False, parent_path=None):
+	"""
+	Group the sales facts by the first `depth` hierarchy levels. With rollup,
+	the subtotal rows of every shallower level are returned as well.
+	"""
+	conditions = get_conditions(filters)
+	values = dict(filters)
+	levels = LEVELS[:depth]
+
+	for i, value in enumerate(parent_path or []):
+		conditions += f" AND IFNULL(sv.{LEVELS[i][1]}, '') = %(path_{i})s"
+		values[f"path_{i}"] = value
+
+	result = frappe.db.sql("""
+		SELECT
+			{level_columns},
+			MAX(sv.lifecycle_stage) as lifecycle_stage,
+			SUM(vsf.qty) as qty_sold,
+			SUM(vsf.amount) as total_amount
+		FROM `tabVariety Sales Fact` vsf
+		JOIN `tabSeed Variety` sv ON sv.name = vsf.seed_variety
+		WHERE 1 = 1
+		{conditions}
+		GROUP BY {group_by}
+		{with_rollup}
+	""".format(
+		level_columns=", ".join(f"IFNULL(sv.{column}, '') as {field}" for field, column, doctype in levels),
+		conditions=conditions,
+		group_by=", ".join(field for field, column, doctype in levels),
+		with_rollup="WITH ROLLUP" if rollup else ""
+	), values, as_dict=True)
+
+	rows = []
+	for row in result:
+		# Rollup subtotals have NULL in the levels they aggregate over
+		path = [row[field] for field, column, doctype in levels if row[field] is not None]
+		if not path:
+			continue
+
+		field, _column, doctype = LEVELS[len(path) - 1]
+		rows.append(frappe._dict(
+			node=NODE_SEPARATOR.join(path),
+			parent_node=NODE_SEPARATOR.join(path[:-1]),
+			indent=len(path) - 1,
+			label=path[-1] or _("Not Set"),
+			level=_(list(LEVEL_NAMES)[len(path) - 1]),
+			level_doctype=doctype,
+			lifecycle_stage=row.lifecycle_stage if field == "variety" else None,
+			qty_sold=row.qty_sold,
+			total_amount=row.total_amount,
+			avg_price=flt(row.total_amount) / flt(row.qty_sold) if flt(row.qty_sold) > 0 else 0,
+			# Children beyond the loaded depth are fetched when the node is expanded
+			lazy=1 if len(path) == depth and depth < len(LEVELS) else 0
+		))
+
+	return rows
+
+
+@frappe.whitelist()
+def get_rollup_children(filters, parent_node):
+	"""Return the child rows of one tree node, for lazy expansion on the client."""
+	if not frappe.get_doc("Report", "Regional Variety Performance").is_permitted():
+		frappe.throw(_("Not permitted to view Regional Variety Performance"), frappe.PermissionError)
+
+	filters = frappe._dict(frappe.parse_json(filters) or {})
+	parent_path = parent_node.split(NODE_SEPARATOR)
+	if len(parent_path) >= len(LEVELS):
+		return []
+
+	rows = get_rollup_rows(filters, len(parent_path) + 1, parent_path=parent_path)
+	return sorted(rows, key=lambda row: flt(row.total_amount), reverse=True)
+
+
+def get_chart_data(data, label_field="variety"):
 	if not data:
 		return None
 
-	# Get top 10 varieties by amount
+	# Get top 10 rows by amount
 	top_data = sorted(data, key=lambda x: flt(x.get("total_amount", 0)), reverse=True)[:10]
 
-	labels = [d.get("variety", "Unknown") for d in top_data]
+	labels = [d.get(label_field, "Unknown") for d in top_data]
 	values = [flt(d.get("total_amount", 0)) for d in top_data]
 
 	return {
@@ -7,6 +7,12 @@ frappe.query_reports["Seed Stock Balance"] = {
             "options": "Company",
             "default": frappe.defaults.get_user_default("Company")
         },
+        {
+            "fieldname": "as_of_date",
+            "label": __("As Of Date"),
+            "fieldtype": "Date",
+            "default": frappe.datetime.get_today()
+        },
         {
             "fieldname": "warehouse",
             "label": __("Warehouse"),
@@ -39,6 +45,11 @@ frappe.query_reports["Seed Stock Balance"] = {
             "fieldtype": "Link",
             "options": "Seed Variety"
         },
+        {
+            "fieldname": "min_germination",
+            "label": __("Min Germination %"),
+            "fieldtype": "Percent"
+        },
         {
             "fieldname": "show_organic_only",
             "label": __("Organic Only"),
@@ -55,6 +66,30 @@ frappe.query_reports["Seed Stock Balance"] = {
             "fieldtype": "Check"
         }
     ],
+    "onload": function (report) {
+        ["CSV", "XLSX"].forEach(function (file_format) {
+            report.page.add_inner_button(__(file_format), function () {
+                frappe.call({
+                    method: "seed_core.seed_core.report.seed_stock_balance.seed_stock_balance.export_report",
+                    args: {
+                        filters: report.get_values(),
+                        file_format: file_format
+                    }
+                });
+            }, __("Background Export"));
+        });
+
+        frappe.realtime.off("seed_stock_balance_export");
+        frappe.realtime.on("seed_stock_balance_export", function (data) {
+            frappe.msgprint({
+                title: __("Export Ready"),
+                indicator: "green",
+                message: __("Seed Stock Balance export is ready: {0}", [
+                    `<a href="${data.file_url}" target="_blank">${__("Download")}</a>`
+                ])
+            });
+        });
+    },
     "formatter": function (value, row, column, data, default_formatter) {
         value = default_formatter(value, row, column, data);
 
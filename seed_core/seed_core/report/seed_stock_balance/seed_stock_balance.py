@@ -1,9 +1,25 @@
 # Copyright (c) 2026, aremtech and contributors
 # For license information, please see license.txt
 
+import csv
+
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, today
+from frappe.utils import cint, flt, getdate, today
+
+from seed_core.seed_core.doctype.seed_stock_checkpoint.seed_stock_checkpoint import (
+	get_balance_query,
+	get_checkpoint_date,
+)
+
+# Unique sort key of a report row (the hierarchy index of Batch Bin Summary, a
+# batch belongs to one item); pages are fetched with keyset cursors over it
+SORT_KEY = ("crop", "segment", "variety", "batch", "warehouse")
+SORT_COLUMNS = ("bbs.seed_crop", "bbs.seed_segment", "bbs.seed_variety", "bbs.batch_no", "bbs.warehouse")
+# Temporary table holding the historical balances of an export
+BALANCE_TABLE = "tmp_seed_stock_balance"
+PAGE_LENGTH = 500
+MAX_PAGE_LENGTH = 5000
 
 
 def execute(filters=None):
@@ -101,75 +117,281 @@ def get_columns():
 
 
 def get_data(filters):
-	conditions = get_conditions(filters)
+	filters = get_filters(filters)
+	return frappe.db.sql(get_query(filters), filters, as_dict=True)
+
+
+def get_filters(filters):
+	filters = frappe._dict(frappe.parse_json(filters) or {})
+	filters.as_of_date = getdate(filters.get("as_of_date") or today())
+	return filters
+
+
+def is_historical(filters):
+	return filters.as_of_date < getdate(today())
+
 
-	# Get stock ledger entries grouped by batch and warehouse
-	data = frappe.db.sql("""
+def get_query(filters, cursor=None, page_length=None, source=None):
+	"""
+	Return the report query. Rows are ordered by a unique indexed key so that
+	pages can be fetched with a keyset cursor (the SORT_KEY values of the last
+	row). `source` replaces the historical balance query, see materialize_balances.
+	"""
+	if cursor:
+		for i, value in enumerate(cursor):
+			filters[f"cursor_{i}"] = value or ""
+
+	if is_historical(filters):
+		# Historical balances: nearest month-end checkpoint plus the ledger since
+		if not source:
+			filters.checkpoint_date = get_checkpoint_date(filters.as_of_date)
+			source = "({0})".format(get_hierarchy_balance_query(filters))
+		flags = "b"
+	else:
+		# Current balances come from Batch Bin Summary, which is maintained from
+		# the Stock Ledger, instead of summing the whole ledger on every run
+		source = "`tabBatch Bin Summary`"
+		flags = "bbs"
+
+	conditions = get_conditions(filters, flags)
+	limit = ""
+
+	if cursor:
+		conditions += " AND " + get_cursor_condition(SORT_COLUMNS)
+
+	if page_length:
+		limit = "LIMIT {0}".format(cint(page_length))
+
+	return """
 		SELECT
-			sv.seed_crop as crop,
-			sv.seed_segment as segment,
-			sv.name as variety,
+			bbs.seed_crop as crop,
+			bbs.seed_segment as segment,
+			bbs.seed_variety as variety,
 			b.name as batch,
-			sle.warehouse,
-			SUM(sle.actual_qty) as qty,
+			bbs.warehouse,
+			bbs.qty,
 			b.germination_percent,
 			b.purity_percent,
 			b.lab_test_date,
 			b.next_retest_date,
-			b.is_organic,
-			CASE WHEN b.is_chemically_treated = 1 OR b.is_pelleted = 1 OR b.is_primed = 1 OR b.is_coated = 1 THEN 1 ELSE 0 END as is_treated
-		FROM `tabStock Ledger Entry` sle
-		JOIN `tabBatch` b ON sle.batch_no = b.name
-		JOIN `tabItem` i ON sle.item_code = i.name
-		LEFT JOIN `tabSeed Variety` sv ON sv.linked_item = i.name
-		WHERE sle.is_cancelled = 0
+			{flags}.is_organic,
+			CASE WHEN {flags}.is_chemically_treated = 1 OR {flags}.is_pelleted = 1 OR {flags}.is_primed = 1 OR {flags}.is_coated = 1 THEN 1 ELSE 0 END as is_treated,
+			CASE
+				WHEN b.next_retest_date IS NULL THEN 'No Test'
+				WHEN b.next_retest_date < %(as_of_date)s THEN 'Retest Due'
+				WHEN DATEDIFF(b.next_retest_date, %(as_of_date)s) <= 30 THEN 'Retest Soon'
+				ELSE 'OK'
+			END as status
+		FROM {source} bbs
+		JOIN `tabBatch` b ON bbs.batch_no = b.name
+		WHERE bbs.qty > 0
 		{conditions}
-		GROUP BY sle.batch_no, sle.warehouse
-		HAVING SUM(sle.actual_qty) > 0
-		ORDER BY sv.seed_crop, sv.seed_segment, sv.name, b.name, sle.warehouse
-	""".format(conditions=conditions), filters, as_dict=True)
-
-	# Add status based on retest date
-	today_date = getdate(today())
-	for row in data:
-		if row.next_retest_date:
-			if getdate(row.next_retest_date) < today_date:
-				row["status"] = "Retest Due"
-			elif (getdate(row.next_retest_date) - today_date).days <= 30:
-				row["status"] = "Retest Soon"
-			else:
-				row["status"] = "OK"
-		else:
-			row["status"] = "No Test"
-
-	return data
-
-
-def get_conditions(filters):
+		ORDER BY {sort_sql}
+		{limit}
+	""".format(
+		source=source, flags=flags, conditions=conditions, sort_sql=", ".join(SORT_COLUMNS), limit=limit
+	)
+
+
+def get_cursor_condition(columns, i=0):
+	"""
+	Return `(columns) > (cursor)` written out column by column, so the index on
+	the columns is used for a range scan.
+	"""
+	column, *rest = columns
+	if not rest:
+		return f"{column} > %(cursor_{i})s"
+
+	return "({column} > %(cursor_{i})s OR ({column} = %(cursor_{i})s AND {rest}))".format(
+		column=column, i=i, rest=get_cursor_condition(rest, i + 1)
+	)
+
+
+def get_cursor(row):
+	return [row.get(fieldname) or "" for fieldname in SORT_KEY]
+
+
+def materialize_balances(filters):
+	"""
+	Compute the historical balances once into a temporary table keyed by the
+	sort key, so that every page reads an index range instead of running the
+	aggregation again. Returns the table to pass as `source`.
+	"""
+	filters.checkpoint_date = get_checkpoint_date(filters.as_of_date)
+	frappe.db.sql(f"DROP TEMPORARY TABLE IF EXISTS `{BALANCE_TABLE}`")
+	frappe.db.sql("""
+		CREATE TEMPORARY TABLE `{table}` (PRIMARY KEY ({sort_sql}))
+		{balances}
+	""".format(
+		table=BALANCE_TABLE,
+		sort_sql=", ".join(column.split(".")[1] for column in SORT_COLUMNS),
+		balances=get_hierarchy_balance_query(filters)
+	), filters)
+
+	return f"`{BALANCE_TABLE}`"
+
+
+def iter_pages(filters, page_length=PAGE_LENGTH):
+	"""Yield the report rows page by page, so memory stays bounded for any result size."""
+	filters = get_filters(filters)
+	source = materialize_balances(filters) if is_historical(filters) else None
+	cursor = None
+
+	try:
+		while True:
+			rows = frappe.db.sql(get_query(filters, cursor, page_length, source), filters, as_dict=True)
+			if rows:
+				yield rows
+
+			if len(rows) < page_length:
+				break
+
+			cursor = get_cursor(rows[-1])
+	finally:
+		if source:
+			frappe.db.sql(f"DROP TEMPORARY TABLE IF EXISTS `{BALANCE_TABLE}`")
+
+
+def check_report_permission():
+	if not frappe.get_doc("Report", "Seed Stock Balance").is_permitted():
+		frappe.throw(_("Not permitted to view Seed Stock Balance"), frappe.PermissionError)
+
+
+@frappe.whitelist()
+def get_page(filters=None, cursor=None, page_length=PAGE_LENGTH):
+	"""
+	Return one page of the report and the cursor of the next page (None on the
+	last page). Pass the returned cursor back to continue.
+	"""
+	check_report_permission()
+
+	page_length = min(cint(page_length) or PAGE_LENGTH, MAX_PAGE_LENGTH)
+	filters = get_filters(filters)
+	cursor = frappe.parse_json(cursor) if cursor else None
+	rows = frappe.db.sql(get_query(filters, cursor, page_length), filters, as_dict=True)
+
+	return {
+		"rows": rows,
+		"next_cursor": get_cursor(rows[-1]) if len(rows) == page_length else None
+	}
+
+
+@frappe.whitelist()
+def export_report(filters=None, file_format="CSV"):
+	"""Queue a CSV / XLSX export; the user is notified with the file link when it is ready."""
+	check_report_permission()
+
+	if file_format not in ("CSV", "XLSX"):
+		frappe.throw(_("Unsupported export format {0}").format(file_format))
+
+	frappe.enqueue(
+		"seed_core.seed_core.report.seed_stock_balance.seed_stock_balance.build_export",
+		queue="long",
+		timeout=3600,
+		filters=frappe.parse_json(filters) or {},
+		file_format=file_format
+	)
+	frappe.msgprint(_("Export queued. You will be notified when the file is ready."), alert=True)
+
+
+def build_export(filters, file_format="CSV"):
+	"""Background job: write the report to a private file one page at a time."""
+	columns = get_columns()
+	fieldnames = [column["fieldname"] for column in columns]
+	header = [column["label"] for column in columns]
+
+	file_name = "seed_stock_balance_{0}.{1}".format(frappe.generate_hash(length=10), file_format.lower())
+	path = frappe.get_site_path("private", "files", file_name)
+
+	if file_format == "XLSX":
+		from openpyxl import Workbook
+
+		workbook = Workbook(write_only=True)
+		sheet = workbook.create_sheet("Seed Stock Balance")
+		sheet.append(header)
+		for rows in iter_pages(filters):
+			for row in rows:
+				sheet.append([row.get(fieldname) for fieldname in fieldnames])
+		workbook.save(path)
+	else:
+		with open(path, "w", newline="", encoding="utf-8") as f:
+			writer = csv.writer(f)
+			writer.writerow(header)
+			for rows in iter_pages(filters):
+				writer.writerows([row.get(fieldname) for fieldname in fieldnames] for row in rows)
+
+	file_doc = frappe.get_doc({
+		"doctype": "File",
+		"file_name": file_name,
+		"file_url": f"/private/files/{file_name}",
+		"is_private": 1
+	}).insert(ignore_permissions=True)
+
+	frappe.publish_realtime(
+		"seed_stock_balance_export",
+		{"file_url": file_doc.file_url},
+		user=frappe.session.user,
+		after_commit=True
+	)
+
+
+def get_hierarchy_balance_query(filters):
+	"""
+	Return the historical balance query with the crop, segment and variety
+	columns of Batch Bin Summary, so both sources share the sort key.
+	"""
+	return """
+		SELECT
+			balances.*,
+			IFNULL(sv.seed_crop, '') as seed_crop,
+			IFNULL(sv.seed_segment, '') as seed_segment,
+			IFNULL(sv.name, '') as seed_variety
+		FROM ({balances}) balances
+		LEFT JOIN `tabSeed Variety` sv ON sv.linked_item = balances.item_code
+	""".format(balances=get_balance_query(filters.checkpoint_date, get_bin_conditions(filters)))
+
+
+def get_bin_conditions(filters):
+	"""Company / warehouse filters pushed down into the historical balance query."""
+	conditions = ""
+
+	if filters.get("company"):
+		conditions += " AND company = %(company)s"
+
+	if filters.get("warehouse"):
+		conditions += " AND warehouse = %(warehouse)s"
+
+	return conditions
+
+
+def get_conditions(filters, flags="bbs"):
 	conditions = ""
 
 	if filters.get("company"):
-		conditions += " AND sle.company = %(company)s"
+		conditions += " AND bbs.company = %(company)s"
 
 	if filters.get("warehouse"):
-		conditions += " AND sle.warehouse = %(warehouse)s"
+		conditions += " AND bbs.warehouse = %(warehouse)s"
 
 	if filters.get("crop"):
-		conditions += " AND sv.seed_crop = %(crop)s"
+		conditions += " AND bbs.seed_crop = %(crop)s"
 
 	if filters.get("segment"):
-		conditions += " AND sv.seed_segment = %(segment)s"
+		conditions += " AND bbs.seed_segment = %(segment)s"
 
 	if filters.get("variety"):
-		conditions += " AND sv.name = %(variety)s"
+		conditions += " AND bbs.seed_variety = %(variety)s"
+
+	if filters.get("min_germination"):
+		conditions += " AND b.germination_percent >= %(min_germination)s"
 
 	if filters.get("show_organic_only"):
-		conditions += " AND b.is_organic = 1"
+		conditions += f" AND {flags}.is_organic = 1"
 
 	if filters.get("show_untreated_only"):
-		conditions += " AND b.is_chemically_treated = 0 AND b.is_pelleted = 0 AND b.is_primed = 0 AND b.is_coated = 0"
+		conditions += f" AND {flags}.is_chemically_treated = 0 AND {flags}.is_pelleted = 0 AND {flags}.is_primed = 0 AND {flags}.is_coated = 0"
 
 	if filters.get("show_retest_due"):
-		conditions += f" AND b.next_retest_date < '{today()}'"
+		conditions += " AND b.next_retest_date < %(as_of_date)s"
 
 	return conditions
@@ -0,0 +1,31 @@
+frappe.query_reports["Stock Mixing Conflicts"] = {
+    "filters": [
+        {
+            "fieldname": "company",
+            "label": __("Company"),
+            "fieldtype": "Link",
+            "options": "Company",
+            "default": frappe.defaults.get_user_default("Company"),
+            "reqd": 1
+        },
+        {
+            "fieldname": "warehouse",
+            "label": __("Warehouse"),
+            "fieldtype": "Link",
+            "options": "Warehouse"
+        },
+        {
+            "fieldname": "item_code",
+            "label": __("Item"),
+            "fieldtype": "Link",
+            "options": "Item"
+        },
+        {
+            "fieldname": "status",
+            "label": __("Status"),
+            "fieldtype": "Select",
+            "options": "\nOpen\nResolved",
+            "default": "Open"
+        }
+    ]
+};
@@ -0,0 +1,81 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+
+def execute(filters=None):
+	columns = get_columns()
+	data = get_data(filters)
+	return columns, data
+
+
+def get_columns():
+	return [
+		{
+			"label": _("Warehouse"),
+			"fieldname": "warehouse",
+			"fieldtype": "Link",
+			"options": "Warehouse",
+			"width": 150,
+		},
+		{"label": _("Item"), "fieldname": "item_code", "fieldtype": "Link", "options": "Item", "width": 150},
+		{"label": _("Batch"), "fieldname": "batch_no", "fieldtype": "Link", "options": "Batch", "width": 130},
+		{
+			"label": _("Conflicting Batch"),
+			"fieldname": "conflicting_batch",
+			"fieldtype": "Link",
+			"options": "Batch",
+			"width": 130,
+		},
+		{"label": _("Conflicts"), "fieldname": "conflicts", "fieldtype": "Data", "width": 350},
+		{"label": _("Status"), "fieldname": "status", "fieldtype": "Data", "width": 90},
+		{"label": _("Detected On"), "fieldname": "detected_on", "fieldtype": "Datetime", "width": 150},
+		{
+			"label": _("Audit"),
+			"fieldname": "stock_mixing_audit",
+			"fieldtype": "Link",
+			"options": "Stock Mixing Audit",
+			"width": 130,
+		},
+	]
+
+
+def get_data(filters):
+	conditions = get_conditions(filters)
+
+	return frappe.db.sql(
+		"""
+		SELECT
+			log.warehouse,
+			log.item_code,
+			log.batch_no,
+			log.conflicting_batch,
+			REPLACE(log.conflicts, '\\n', '; ') as conflicts,
+			log.status,
+			log.detected_on,
+			log.stock_mixing_audit
+		FROM `tabStock Mixing Audit Log` log
+		WHERE log.company = %(company)s
+		{conditions}
+		ORDER BY log.warehouse, log.item_code, log.batch_no
+	""".format(conditions=conditions),
+		filters,
+		as_dict=True,
+	)
+
+
+def get_conditions(filters):
+	conditions = ""
+
+	if filters.get("warehouse"):
+		conditions += " AND log.warehouse = %(warehouse)s"
+
+	if filters.get("item_code"):
+		conditions += " AND log.item_code = %(item_code)s"
+
+	if filters.get("status"):
+		conditions += " AND log.status = %(status)s"
+
+	return conditions
@@ -11,104 +11,128 @@ in the same warehouse bin (e.g., Organic with Chemically Treated).
 import frappe
 from frappe import _
 
+from seed_core.seed_core import cache
+from seed_core.seed_core.batch_compatibility import encode_batch, get_compiled_rules
+
+BATCH_ATTRIBUTE_FIELDS = ["is_organic", "is_chemically_treated", "is_pelleted", "is_primed", "is_coated"]
+
 
 def validate_stock_mixing(doc, method=None):
 	"""
 	Validate that stock movements don't mix incompatible batch attributes.
 	Called on Stock Entry and Stock Reconciliation validation.
+
+	All incoming batches and all touched bins are loaded up front with one
+	query each, so the number of queries does not grow with the row count.
 	"""
 	if doc.doctype not in ["Stock Entry", "Stock Reconciliation"]:
 		return
 
-	# Get settings
-	settings = None
-	if frappe.db.exists("DocType", "Seed Core Settings"):
-		settings = frappe.get_single("Seed Core Settings")
-
+	rows = []
 	for item in doc.items:
-		if not item.get("batch_no") or not item.get("t_warehouse"):
-			continue
+		warehouse = get_target_warehouse(doc, item)
+		if item.get("batch_no") and warehouse:
+			rows.append((item, warehouse))
 
-		# Get the incoming batch attributes
-		incoming_batch = frappe.db.get_value(
-			"Batch",
-			item.batch_no,
-			["is_organic", "is_chemically_treated", "is_pelleted", "is_primed", "is_coated"],
-			as_dict=True
-		)
+	if not rows:
+		return
+
+	settings = cache.get_settings()
+	rules = get_compiled_rules(settings)
+	incoming_batches = get_batch_attributes({item.batch_no for item, warehouse in rows})
+	bins = get_existing_batches_in_bins({(item.item_code, warehouse) for item, warehouse in rows})
 
+	for item, warehouse in rows:
+		# Get the incoming batch attributes
+		incoming_batch = incoming_batches.get(item.batch_no)
 		if not incoming_batch:
 			continue
 
-		# Check existing batches in target warehouse
-		existing_batches = get_existing_batches_in_bin(item.item_code, item.t_warehouse, item.batch_no)
+		# Check existing batches in target warehouse, including the ones
+		# moved in by earlier rows of this document
+		bin_batches = bins.setdefault((item.item_code, warehouse), {})
+		existing_batches = [batch for batch in bin_batches.values() if batch.batch_no != item.batch_no]
+		existing_masks = [batch.attribute_mask for batch in existing_batches]
 
-		for existing_batch in existing_batches:
-			conflicts = check_attribute_conflicts(incoming_batch, existing_batch)
-			if conflicts:
-				handle_conflict(conflicts, item, existing_batch, settings)
+		for i in rules.get_conflicting(incoming_batch.attribute_mask, existing_masks):
+			conflicts = check_attribute_conflicts(incoming_batch, existing_batches[i], rules)
+			handle_conflict(conflicts, item, existing_batches[i], settings, warehouse)
 
+		bin_batches.setdefault(item.batch_no, incoming_batch)
 
-def get_existing_batches_in_bin(item_code, warehouse, exclude_batch=None):
-	"""Get batches with positive stock in the specified bin."""
-	conditions = ""
-	if exclude_batch:
-		conditions = f"AND sle.batch_no != '{exclude_batch}'"
 
-	batches = frappe.db.sql("""
-		SELECT
-			b.name as batch_no,
-			b.is_organic,
-			b.is_chemically_treated,
-			b.is_pelleted,
-			b.is_primed,
-			b.is_coated,
-			SUM(sle.actual_qty) as qty
-		FROM `tabStock Ledger Entry` sle
-		JOIN `tabBatch` b ON sle.batch_no = b.name
-		WHERE sle.item_code = %(item_code)s
-		AND sle.warehouse = %(warehouse)s
-		AND sle.is_cancelled = 0
-		{conditions}
-		GROUP BY sle.batch_no
-		HAVING SUM(sle.actual_qty) > 0
-	""".format(conditions=conditions), {
-		"item_code": item_code,
-		"warehouse": warehouse
-	}, as_dict=True)
-
-	return batches
-
-
-def check_attribute_conflicts(incoming, existing):
+def get_target_warehouse(doc, item):
+	"""Return the warehouse a row moves stock into, if any."""
+	if doc.doctype == "Stock Reconciliation":
+		return item.get("warehouse")
+
+	return item.get("t_warehouse")
+
+
+def get_batch_attributes(batch_nos):
+	"""Return seed attributes and attribute mask of the given batches, keyed by batch name."""
+	return {
+		batch_no: frappe._dict(batch, attribute_mask=encode_batch(batch))
+		for batch_no, batch in cache.get_batch_attributes(batch_nos).items()
+	}
+
+
+def get_existing_batches_in_bins(bins):
 	"""
-	Check for conflicts between incoming and existing batch attributes.
-	Returns list of conflict descriptions.
+	Get batches with positive stock for several (item_code, warehouse) bins
+	in one query.
+
+	Returns a dict of bin -> {batch_no: batch attributes and qty}.
 	"""
-	conflicts = []
+	result = {bin_key: {} for bin_key in bins}
+	if not bins:
+		return result
+
+	bin_conditions = " OR ".join(["(item_code = %s AND warehouse = %s)"] * len(bins))
+	values = [value for bin_key in bins for value in bin_key]
+
+	# Batch Bin Summary is maintained from the Stock Ledger, so bin contents
+	# are an indexed lookup rather than a SUM over the ledger
+	batches = frappe.db.sql("""
+		SELECT
+			item_code,
+			warehouse,
+			batch_no,
+			{fields},
+			attribute_mask,
+			qty
+		FROM `tabBatch Bin Summary`
+		WHERE qty > 0
+		AND ({bin_conditions})
+	""".format(fields=", ".join(BATCH_ATTRIBUTE_FIELDS), bin_conditions=bin_conditions), values, as_dict=True)
 
-	# Organic vs Chemically Treated conflict
-	if incoming.get("is_organic") and existing.get("is_chemically_treated"):
-		conflicts.append(_("Organic batch cannot be mixed with Chemically Treated batch"))
+	for batch in batches:
+		result[(batch.pop("item_code"), batch.pop("warehouse"))][batch.batch_no] = batch
 
-	if incoming.get("is_chemically_treated") and existing.get("is_organic"):
-		conflicts.append(_("Chemically Treated batch cannot be mixed with Organic batch"))
+	return result
 
-	# Organic vs any treatment conflict
-	if incoming.get("is_organic"):
-		if existing.get("is_pelleted") or existing.get("is_primed") or existing.get("is_coated"):
-			conflicts.append(_("Organic batch cannot be mixed with treated (Pelleted/Primed/Coated) batch"))
 
-	if existing.get("is_organic"):
-		if incoming.get("is_pelleted") or incoming.get("is_primed") or incoming.get("is_coated"):
-			conflicts.append(_("Treated batch cannot be mixed with Organic batch"))
+def get_existing_batches_in_bin(item_code, warehouse, exclude_batch=None):
+	"""Get batches with positive stock in the specified bin."""
+	batches = get_existing_batches_in_bins([(item_code, warehouse)])[(item_code, warehouse)]
+
+	return [batch for batch in batches.values() if batch.batch_no != exclude_batch]
+
+
+def check_attribute_conflicts(incoming, existing, rules=None):
+	"""
+	Check for conflicts between incoming and existing batch attributes.
+	Returns list of conflict descriptions.
+	"""
+	if rules is None:
+		rules = get_compiled_rules(cache.get_settings())
 
-	return conflicts
+	return rules.get_messages(encode_batch(incoming), encode_batch(existing))
 
 
-def handle_conflict(conflicts, item, existing_batch, settings):
+def handle_conflict(conflicts, item, existing_batch, settings, warehouse=None):
 	"""Handle detected conflicts based on settings."""
-	conflict_msg = _("Stock Mixing Conflict in {0}").format(item.t_warehouse)
+	conflict_msg = _("Stock Mixing Conflict in {0}").format(warehouse or item.t_warehouse)
 	conflict_details = "\n".join([
 		_("• Batch {0}: {1}").format(item.batch_no, c) for c in conflicts
 	])
@@ -0,0 +1,75 @@
+# Copyright (c) 2026, aremtech and contributors
+# For license information, please see license.txt
+
+"""
+Seasonal Phasing of Sales Targets
+
+Monthly seasonality profiles are taken from past Variety Sales Fact rows:
+per variety, falling back to the profile of its crop and then to an even
+split. Annual targets are split across months for all varieties at once
+as one matrix operation.
+"""
+
+import frappe
+import numpy as np
+from frappe.utils import add_years, flt, getdate
+
+from seed_core.seed_core.doctype.variety_sales_fact.variety_sales_fact import get_variety_sales
+
+
+def get_seasonality_profiles(varieties, crops, end_date, years=3):
+	"""
+	Return a (len(varieties), 12) array of monthly sales shares, calendar months
+	in columns, from the sales of the `years` before end_date. crops[i] is the
+	crop of varieties[i] and is used when the variety has no sales history.
+	"""
+	start_date = add_years(end_date, -years)
+	variety_index = {variety: i for i, variety in enumerate(varieties)}
+	crop_list = sorted({crop for crop in crops if crop})
+	crop_index = {crop: i for i, crop in enumerate(crop_list)}
+
+	profiles = np.zeros((len(varieties), 12))
+	for row in get_variety_sales(
+		start_date, end_date, group_by=("seed_variety", "posting_month"), seed_variety=list(varieties)
+	):
+		profiles[variety_index[row.seed_variety], getdate(row.posting_month).month - 1] += flt(row.qty)
+
+	# The last row stays zero for varieties without a crop
+	crop_profiles = np.zeros((len(crop_list) + 1, 12))
+	if crop_list:
+		for row in frappe.db.sql(
+			"""
+			SELECT sv.seed_crop, MONTH(vsf.posting_month) as month, SUM(vsf.qty) as qty
+			FROM `tabVariety Sales Fact` vsf
+			JOIN `tabSeed Variety` sv ON sv.name = vsf.seed_variety
+			WHERE vsf.posting_month BETWEEN %(start_date)s AND %(end_date)s
+			AND sv.seed_crop IN %(crops)s
+			GROUP BY sv.seed_crop, MONTH(vsf.posting_month)
+		""",
+			{"start_date": start_date, "end_date": end_date, "crops": tuple(crop_list)},
+			as_dict=True,
+		):
+			crop_profiles[crop_index[row.seed_crop], row.month - 1] = flt(row.qty)
+
+	# Returns can make a month negative; they do not make it less seasonal than zero
+	profiles = np.clip(profiles, 0, None)
+	crop_profiles = np.clip(crop_profiles, 0, None)
+
+	no_history = profiles.sum(axis=1) == 0
+	fallback = crop_profiles[[crop_index.get(crop, len(crop_list)) for crop in crops]]
+	profiles[no_history] = fallback[no_history]
+	profiles[profiles.sum(axis=1) == 0] = 1
+
+	return profiles / profiles.sum(axis=1, keepdims=True)
+
+
+def split_annual(annual, profiles, precision):
+	"""
+	Split annual values (shape (n,)) by monthly profiles (shape (n, 12)).
+	Values are rounded to `precision` and the rounding difference is added to
+	the largest month, so every row still sums to its annual value.
+	"""
+	monthly = np.round(annual[:, None] * profiles, precision)
+	residual = np.round(annual - monthly.sum(axis=1), precision)
+	monthly[np.arange(len(annual)), monthly.argmax(axis=1)] += residual
+	return monthly
@@ -0,0 +1,57 @@
+# Copyright (c) 2026, aremtech and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from seed_core.seed_core.batch_compatibility import (
+	DEFAULT_RULES,
+	CompiledRules,
+	encode_batch,
+)
+
+
+class UnitTestBatchCompatibility(UnitTestCase):
+	"""
+	Unit tests for the batch compatibility rule engine.
+	"""
+
+	def setUp(self):
+		self.rules = CompiledRules(DEFAULT_RULES)
+		self.organic = encode_batch(frappe._dict(is_organic=1))
+		self.treated = encode_batch(frappe._dict(is_chemically_treated=1))
+		self.pelleted = encode_batch(frappe._dict(is_pelleted=1))
+		self.plain = encode_batch(frappe._dict())
+
+	def test_default_rules_match_legacy_checks(self):
+		self.assertTrue(self.rules.conflicts(self.organic, self.treated))
+		self.assertTrue(self.rules.conflicts(self.treated, self.organic))
+		self.assertTrue(self.rules.conflicts(self.organic, self.pelleted))
+		self.assertTrue(self.rules.conflicts(self.pelleted, self.organic))
+		self.assertFalse(self.rules.conflicts(self.organic, self.plain))
+		self.assertFalse(self.rules.conflicts(self.treated, self.pelleted))
+
+	def test_messages_are_deduplicated(self):
+		organic_pelleted_primed = encode_batch(frappe._dict(is_pelleted=1, is_primed=1))
+		messages = self.rules.get_messages(self.organic, organic_pelleted_primed)
+		self.assertEqual(len(messages), 1)
+
+	def test_negated_attribute_rule(self):
+		rules = CompiledRules([("GSPP", "Not GSPP", "GSPP batch cannot be mixed with non-GSPP batch")])
+		gspp = encode_batch(frappe._dict(is_gspp=1))
+		self.assertTrue(rules.conflicts(gspp, self.plain))
+		self.assertFalse(rules.conflicts(gspp, gspp))
+		self.assertFalse(rules.conflicts(self.plain, gspp))
+
+	def test_named_treatment_is_encoded(self):
+		rules = CompiledRules([("Organic", "Named Treatment", "")])
+		named = encode_batch(frappe._dict(treatment_name="Thiram + Apron"))
+		self.assertTrue(rules.conflicts(self.organic, named))
+
+	def test_bin_conflicts(self):
+		masks = [self.plain, self.organic, self.treated, self.pelleted]
+		self.assertEqual(self.rules.get_conflicting(self.organic, masks), [2, 3])
+		self.assertEqual(
+			sorted(self.rules.get_bin_conflicts(masks)),
+			[(1, 2), (1, 3), (2, 1), (3, 1)],
+		)
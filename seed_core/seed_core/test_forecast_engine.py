@@ -0,0 +1,72 @@
+# Copyright (c) 2026, aremtech and Contributors
+# See license.txt
+
+import numpy as np
+from frappe.tests import UnitTestCase
+
+from seed_core.seed_core.forecast_engine import (
+	ALPHAS,
+	fit,
+	get_seasonal,
+	run_holt,
+)
+
+
+class UnitTestForecastEngine(UnitTestCase):
+	"""
+	Unit tests for the Holt and seasonality fitting on synthetic series.
+	"""
+
+	def test_holt_follows_a_linear_series_exactly(self):
+		series = np.array([[10.0 + 2 * t for t in range(24)]])
+		level, trend, sse = run_holt(series, 0.5, 0.1, np.array([8.0]), np.array([2.0]))
+
+		self.assertAlmostEqual(sse[0], 0)
+		self.assertAlmostEqual(level[0], series[0, -1])
+		self.assertAlmostEqual(trend[0], 2)
+
+	def test_holt_rolls_rows_independently(self):
+		series = np.array([[5.0] * 12, [5.0] * 6 + [15.0] * 6])
+		level, _trend, sse = run_holt(series, np.full(2, 0.5), np.zeros(2), np.full(2, 5.0), np.zeros(2))
+
+		self.assertAlmostEqual(sse[0], 0)
+		self.assertAlmostEqual(level[0], 5)
+		self.assertGreater(sse[1], 0)
+		self.assertGreater(level[1], 14)
+
+	def test_seasonal_components_recover_the_calendar_pattern(self):
+		pattern = np.array([6.0, 4, 2, 0, -2, -4, -6, -4, -2, 0, 2, 8])
+		pattern -= pattern.mean()
+		# Three years starting in April (month index 3)
+		first_month = 2024 * 12 + 3
+		calendar = (np.arange(36) + first_month) % 12
+		series = np.vstack([100 + pattern[calendar], np.full(36, 50.0)])
+
+		seasonal = get_seasonal(series, first_month)
+
+		np.testing.assert_allclose(seasonal[0], pattern, atol=1e-9)
+		np.testing.assert_allclose(seasonal[1], 0, atol=1e-9)
+		np.testing.assert_allclose(seasonal.sum(axis=1), 0, atol=1e-9)
+
+	def test_fit_picks_a_trend_for_trending_series(self):
+		months = np.arange(36)
+		series = np.vstack([100 + 5.0 * months, np.full(36, 100.0)])
+
+		alpha, beta, level, trend, sse = fit(series)
+
+		self.assertGreater(beta[0], 0)
+		self.assertAlmostEqual(trend[0], 5, delta=0.5)
+		self.assertAlmostEqual(level[0], series[0, -1], delta=5)
+		self.assertAlmostEqual(sse[1], 0)
+		self.assertAlmostEqual(level[1], 100)
+		self.assertAlmostEqual(trend[1], 0)
+		self.assertIn(alpha[0], ALPHAS)
+
+	def test_fit_smooths_noise_with_a_low_alpha(self):
+		rng = np.random.default_rng(7)
+		series = 100 + rng.normal(0, 10, (1, 36))
+
+		alpha, _beta, level, _trend, _sse = fit(series)
+
+		self.assertEqual(alpha[0], min(ALPHAS))
+		self.assertAlmostEqual(level[0], 100, delta=10)